@@ -0,0 +1 @@
+"""Benchmarks of the generation pipeline on synthetic specs of any size."""
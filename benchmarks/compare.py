@@ -0,0 +1,268 @@
+"""Regression gate: rerun the benchmarks of a stored baseline and compare.
+
+Usage::
+
+    python -m benchmarks.compare --baseline benchmarks/baseline.json --repeat 5
+
+The baseline is a results file of :mod:`benchmarks.run`; its spec sizes, cases
+and settings are rerun (``--lines``/``--case`` select a subset) and every stage
+is compared on median wall time and tracemalloc peak. A stage regresses when it
+is slower than ``--time-tolerance`` allows *and* the slowdown exceeds the noise:
+the larger interquartile range of the two runs, but at least ``--min-time``.
+Memory likewise needs to exceed ``--memory-tolerance`` and ``--min-memory``.
+The exit status is 1 when any stage regressed, after printing the table. It is
+also 1 when a selected baseline run, stage or metric has no current measurement,
+unless ``--allow-missing`` is given.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from benchmarks.run import parse_lines, run_benchmarks
+from dataset_generator.io.writers import write_json
+
+DEFAULT_TIME_TOLERANCE = 0.25
+DEFAULT_MEMORY_TOLERANCE = 0.10
+DEFAULT_MIN_TIME_S = 0.02
+DEFAULT_MIN_MEMORY_MB = 0.5
+
+
+@dataclass(frozen=True)
+class Tolerances:
+    time: float = DEFAULT_TIME_TOLERANCE
+    memory: float = DEFAULT_MEMORY_TOLERANCE
+    min_time_s: float = DEFAULT_MIN_TIME_S
+    min_memory_mb: float = DEFAULT_MIN_MEMORY_MB
+
+
+@dataclass(frozen=True)
+class Row:
+    case: str
+    lines: int
+    stage: str
+    metric: str
+    baseline: float | None
+    current: float | None
+    regressed: bool = False
+
+    @property
+    def status(self) -> str:
+        if self.current is None:
+            return "missing"
+        if self.baseline is None:
+            return "new"
+        return "REGRESSED" if self.regressed else "ok"
+
+    @property
+    def change(self) -> str:
+        if self.baseline is None or self.current is None:
+            return "-"
+        if self.baseline == 0:
+            return "+inf%" if self.current > 0 else "+0.0%"
+        return f"{(self.current - self.baseline) / self.baseline:+.1%}"
+
+
+def _runs_by_key(results: dict[str, Any]) -> dict[tuple[str, int], dict[str, Any]]:
+    return {(run["case"], run["lines"]): run for run in results["runs"]}
+
+
+def _compare_stage(
+    case: str,
+    lines: int,
+    name: str,
+    baseline: dict[str, Any] | None,
+    current: dict[str, Any] | None,
+    tolerances: Tolerances,
+) -> list[Row]:
+    rows = []
+    base_time = baseline["wall_s"] if baseline else None
+    current_time = current["wall_s"] if current else None
+    regressed = False
+    if base_time is not None and current_time is not None:
+        noise = max(baseline.get("iqr_s", 0.0), current.get("iqr_s", 0.0), tolerances.min_time_s)
+        regressed = (
+            current_time > base_time * (1 + tolerances.time) and current_time - base_time > noise
+        )
+    rows.append(Row(case, lines, name, "wall_s", base_time, current_time, regressed))
+
+    base_memory = baseline.get("tracemalloc_peak_mb") if baseline else None
+    current_memory = current.get("tracemalloc_peak_mb") if current else None
+    if base_memory is not None or current_memory is not None:
+        regressed = (
+            base_memory is not None
+            and current_memory is not None
+            and current_memory > base_memory * (1 + tolerances.memory)
+            and current_memory - base_memory > tolerances.min_memory_mb
+        )
+        rows.append(
+            Row(case, lines, name, "tracemalloc_peak_mb", base_memory, current_memory, regressed)
+        )
+    return rows
+
+
+def compare_results(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    tolerances: Tolerances = Tolerances(),
+    runs: Iterable[tuple[str, int]] | None = None,
+) -> list[Row]:
+    """Compare every stage of the baseline ``runs`` (all of them by default) and of
+    the runs only ``current`` has.
+
+    Stages of a baseline run that ``current`` lacks come out as "missing".
+    """
+    baseline_runs = _runs_by_key(baseline)
+    current_runs = _runs_by_key(current)
+    keys = list(baseline_runs if runs is None else runs)
+    keys += [key for key in current_runs if key not in baseline_runs]
+    rows = []
+    for key in keys:
+        base_stages = baseline_runs.get(key, {}).get("stages", {})
+        stages = current_runs.get(key, {}).get("stages", {})
+        for name in [*base_stages, *(name for name in stages if name not in base_stages)]:
+            rows.extend(
+                _compare_stage(*key, name, base_stages.get(name), stages.get(name), tolerances)
+            )
+    return rows
+
+
+def format_table(rows: Sequence[Row]) -> str:
+    header = ("case", "lines", "stage", "metric", "baseline", "current", "change", "status")
+    body = [
+        (
+            row.case,
+            str(row.lines),
+            row.stage,
+            row.metric,
+            "-" if row.baseline is None else f"{row.baseline:g}",
+            "-" if row.current is None else f"{row.current:g}",
+            row.change,
+            row.status,
+        )
+        for row in rows
+    ]
+    widths = [max(len(line[i]) for line in [header, *body]) for i in range(len(header))]
+    numeric = {1, 4, 5, 6}
+
+    def _format(line: Sequence[str]) -> str:
+        cells = [
+            cell.rjust(width) if i in numeric else cell.ljust(width)
+            for i, (cell, width) in enumerate(zip(line, widths))
+        ]
+        return "  ".join(cells).rstrip()
+
+    separator = "  ".join("-" * width for width in widths)
+    return "\n".join([_format(header), separator, *(_format(line) for line in body)])
+
+
+def _load_json(path: str | Path) -> dict[str, Any]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def _selected_runs(
+    baseline: dict[str, Any], lines: Sequence[int] | None, cases: Sequence[str] | None
+) -> list[tuple[str, int]]:
+    keys = [
+        key
+        for key in _runs_by_key(baseline)
+        if (not cases or key[0] in cases) and (not lines or key[1] in lines)
+    ]
+    if not keys:
+        raise SystemExit("No baseline runs match the selected --lines/--case.")
+    return keys
+
+
+def _rerun(
+    baseline: dict[str, Any], runs: Sequence[tuple[str, int]], repeat: int | None
+) -> dict[str, Any]:
+    settings = dict(baseline["settings"])
+    selected_lines = list(dict.fromkeys(n for _, n in runs))
+    selected_cases = list(dict.fromkeys(c for c, _ in runs))
+    if repeat is not None:
+        settings["repeat"] = repeat
+    return run_benchmarks(selected_lines, cases=selected_cases, **settings)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare benchmarks against a stored baseline.")
+    parser.add_argument("--baseline", required=True, help="Baseline results JSON")
+    parser.add_argument(
+        "--current", help="Compare this results JSON instead of rerunning the benchmarks"
+    )
+    parser.add_argument("--lines", type=parse_lines, help="Compare only these spec sizes")
+    parser.add_argument("--case", action="append", help="Compare only this case (repeatable)")
+    parser.add_argument("--repeat", type=int, help="Timed runs per stage (default: baseline's)")
+    parser.add_argument(
+        "--time-tolerance",
+        type=float,
+        default=DEFAULT_TIME_TOLERANCE,
+        help="Allowed relative slowdown of the median time",
+    )
+    parser.add_argument(
+        "--memory-tolerance",
+        type=float,
+        default=DEFAULT_MEMORY_TOLERANCE,
+        help="Allowed relative growth of the tracemalloc peak",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=DEFAULT_MIN_TIME_S,
+        help="Slowdowns below this many seconds are noise",
+    )
+    parser.add_argument(
+        "--min-memory",
+        type=float,
+        default=DEFAULT_MIN_MEMORY_MB,
+        help="Memory growth below this many MB is noise",
+    )
+    parser.add_argument(
+        "--allow-missing",
+        action="store_true",
+        help="Do not fail when a baseline measurement is missing from the current results",
+    )
+    parser.add_argument("--out", help="Also write the rerun results to this JSON file")
+    args = parser.parse_args(argv)
+
+    baseline = _load_json(args.baseline)
+    runs = _selected_runs(baseline, args.lines, args.case)
+    if args.current:
+        current = _load_json(args.current)
+    else:
+        current = _rerun(baseline, runs, args.repeat)
+        if args.out:
+            write_json(args.out, current)
+
+    tolerances = Tolerances(
+        time=args.time_tolerance,
+        memory=args.memory_tolerance,
+        min_time_s=args.min_time,
+        min_memory_mb=args.min_memory,
+    )
+    rows = compare_results(baseline, current, tolerances, runs)
+    print(format_table(rows))
+    regressed = [row for row in rows if row.status == "REGRESSED"]
+    missing = [row for row in rows if row.status == "missing"]
+    if regressed:
+        print(f"\n{len(regressed)} regression(s) beyond tolerance.", file=sys.stderr)
+    if missing and not args.allow_missing:
+        print(
+            f"\n{len(missing)} baseline measurement(s) missing from the current results"
+            " (--allow-missing to accept).",
+            file=sys.stderr,
+        )
+    if regressed or (missing and not args.allow_missing):
+        return 1
+    print("\nNo regressions.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,246 @@
+"""Per-stage benchmarks of the pipeline on synthetic specs of growing size.
+
+Usage::
+
+    python -m benchmarks.run --lines 1000,10000,100000 --out benchmarks/results.json
+
+For every case and spec size the stages run in pipeline order, each on the
+output of the previous one. A stage is timed ``--repeat`` times and the median
+wall time and its interquartile range are kept, so a comparison can tell a
+change from noise (see :mod:`benchmarks.compare`). Then, unless ``--no-memory``,
+it runs once more under tracemalloc for its peak of traced memory (a separate
+run, since tracing slows Python down several times over).
+"""
+
+from __future__ import annotations
+
+import argparse
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Sequence
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, TypeVar
+
+from benchmarks.specs import CASES, write_spec
+from dataset_generator import __version__
+from dataset_generator.core.markdown import MarkdownDocument
+from dataset_generator.core.models import RunManifest
+from dataset_generator.extract.heuristics import extract_policies, extract_use_cases
+from dataset_generator.extract.support_parser import parse_support_faq, parse_support_tickets
+from dataset_generator.extract.tokenizer import tokenize
+from dataset_generator.generate.dataset import generate_examples
+from dataset_generator.generate.test_cases import generate_test_cases
+from dataset_generator.io.writers import (
+    write_dataset,
+    write_json,
+    write_policies,
+    write_run_manifest,
+    write_test_cases,
+    write_use_cases,
+)
+from dataset_generator.metrics import peak_rss_mb
+from dataset_generator.validate.validator import validate_out_dir
+
+T = TypeVar("T")
+
+DEFAULT_LINES = (1_000, 10_000, 100_000)
+
+
+def _median_iqr(values: Sequence[float]) -> tuple[float, float]:
+    if len(values) < 2:
+        return values[0], 0.0
+    q1, median, q3 = statistics.quantiles(values, n=4, method="inclusive")
+    return median, q3 - q1
+
+
+class StageTimer:
+    """Runs stages and records their median wall time and traced memory peak."""
+
+    def __init__(self, repeat: int = 1, memory: bool = True) -> None:
+        self.repeat = max(repeat, 1)
+        self.memory = memory
+        self.stages: dict[str, dict[str, Any]] = {}
+
+    def run(self, name: str, func: Callable[[], T]) -> T:
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+        median, iqr = _median_iqr(timings)
+        entry: dict[str, Any] = {
+            "wall_s": round(median, 4),
+            "iqr_s": round(iqr, 4),
+            "runs_s": [round(value, 4) for value in timings],
+        }
+        if self.memory:
+            tracemalloc.start()
+            try:
+                func()
+                entry["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+            finally:
+                tracemalloc.stop()
+        if isinstance(result, Sequence):
+            entry["items"] = len(result)
+        entry["peak_rss_mb"] = peak_rss_mb()
+        self.stages[name] = entry
+        return result
+
+
+def bench_spec(
+    spec_path: Path,
+    case: str,
+    work_dir: Path,
+    timer: StageTimer,
+    n_use_cases: int = 5,
+    n_test_cases_per_uc: int = 3,
+    n_examples_per_tc: int = 4,
+    seed: int = 42,
+) -> dict[str, dict[str, Any]]:
+    """Benchmark every stage on one spec and return the per-stage results."""
+    path = str(spec_path)
+    doc = timer.run("read", lambda: MarkdownDocument.read(path))
+    # Tokens are cached on the document, so time them on a fresh copy and let
+    # the extraction stages below measure extraction alone.
+    timer.run("tokenize", lambda: tokenize(MarkdownDocument(path=path, lines=doc.lines)))
+    tokenize(doc)
+
+    target = max(n_use_cases, 5)
+    use_cases = timer.run("extract_use_cases", lambda: extract_use_cases(doc, target, case=case))
+    policies = timer.run("extract_policies", lambda: extract_policies(doc, target, case=case))
+    if case == "support_bot":
+        timer.run("parse_support_faq", lambda: parse_support_faq(doc))
+        timer.run("parse_support_tickets", lambda: parse_support_tickets(doc))
+
+    test_cases = timer.run(
+        "generate_test_cases",
+        lambda: generate_test_cases(
+            use_cases=use_cases,
+            policies=policies,
+            n_per_uc=n_test_cases_per_uc,
+            seed=seed,
+            case=case,
+        ),
+    )
+    examples = timer.run(
+        "generate_examples",
+        lambda: generate_examples(
+            case, test_cases, use_cases, policies, n_examples_per_tc, seed, input_path=path
+        ),
+    )
+
+    out_dir = work_dir / f"out_{case}"
+    manifest = RunManifest(
+        seed=seed,
+        timestamp=datetime.now(timezone.utc).isoformat(),
+        generator_version=__version__,
+        llm={"provider": "none", "model": None, "temperature": 0.2},
+        input_path=path,
+        out_path=str(out_dir),
+    )
+
+    def write_all() -> None:
+        write_use_cases(out_dir, use_cases)
+        write_policies(out_dir, policies)
+        write_test_cases(out_dir, test_cases)
+        write_dataset(out_dir, examples)
+        write_run_manifest(out_dir, manifest)
+
+    timer.run("write", write_all)
+    ok, errors, _ = timer.run("validate_out_dir", lambda: validate_out_dir(out_dir))
+    if not ok:
+        raise RuntimeError(f"Benchmark output for {case} is invalid: {errors[:3]}")
+    return timer.stages
+
+
+def run_benchmarks(
+    lines: Sequence[int],
+    cases: Sequence[str] = CASES,
+    repeat: int = 1,
+    memory: bool = True,
+    spec_seed: int = 0,
+    **settings: Any,
+) -> dict[str, Any]:
+    runs = []
+    with tempfile.TemporaryDirectory(prefix="dataset_generator_bench_") as tmp:
+        work_dir = Path(tmp)
+        for n_lines in lines:
+            for case in cases:
+                spec_path = write_spec(work_dir / f"{case}_{n_lines}.md", case, n_lines, spec_seed)
+                timer = StageTimer(repeat=repeat, memory=memory)
+                stages = bench_spec(spec_path, case, work_dir, timer, **settings)
+                runs.append(
+                    {
+                        "case": case,
+                        "lines": n_lines,
+                        "bytes": spec_path.stat().st_size,
+                        "stages": stages,
+                        "total_wall_s": round(sum(s["wall_s"] for s in stages.values()), 4),
+                    }
+                )
+                print(
+                    f"{case:<16} {n_lines:>9} lines  {runs[-1]['total_wall_s']:>9.3f}s",
+                    file=sys.stderr,
+                )
+    return {
+        "generator_version": __version__,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"repeat": repeat, "memory": memory, "spec_seed": spec_seed, **settings},
+        "runs": runs,
+    }
+
+
+def parse_lines(value: str) -> list[int]:
+    try:
+        lines = [int(part.replace("_", "")) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma separated integers, got {value!r}")
+    if not lines or min(lines) < 1:
+        raise argparse.ArgumentTypeError("line counts must be positive")
+    return lines
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic specs.")
+    parser.add_argument(
+        "--lines",
+        type=parse_lines,
+        default=list(DEFAULT_LINES),
+        help="Comma separated spec sizes in lines, e.g. 1000,10000,1000000",
+    )
+    parser.add_argument("--case", choices=CASES, action="append", help="Case (repeatable)")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per stage")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--seed", type=int, default=42, help="Generation seed")
+    parser.add_argument("--spec-seed", type=int, default=0, help="Synthetic spec seed")
+    parser.add_argument("--n-use-cases", type=int, default=5)
+    parser.add_argument("--n-test-cases-per-uc", type=int, default=3)
+    parser.add_argument("--n-examples-per-tc", type=int, default=4)
+    parser.add_argument("--out", default="benchmarks/results.json", help="Results JSON file")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        args.lines,
+        cases=args.case or CASES,
+        repeat=args.repeat,
+        memory=not args.no_memory,
+        spec_seed=args.spec_seed,
+        n_use_cases=args.n_use_cases,
+        n_test_cases_per_uc=args.n_test_cases_per_uc,
+        n_examples_per_tc=args.n_examples_per_tc,
+        seed=args.seed,
+    )
+    write_json(args.out, results)
+    print(f"Results written to {args.out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
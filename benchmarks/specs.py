@@ -0,0 +1,189 @@
+"""Deterministic synthetic specs shaped like ``examples/*.md``, of any length.
+
+A spec is a title and a short brief followed by numbered sections that repeat
+until the requested number of lines is reached: policy bullets, FAQ items and a
+ticket table for the support case; rule bullets and noisy dialogues for the
+operator quality case. The same ``(case, n_lines, seed)`` always gives the same
+text, so timings of different revisions are comparable.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+from collections.abc import Iterator
+from itertools import islice
+from pathlib import Path
+from typing import Literal
+
+SpecCase = Literal["support_bot", "operator_quality"]
+
+CASES: tuple[SpecCase, ...] = ("support_bot", "operator_quality")
+
+_FAQ_TOPICS = (
+    ("Сроки доставки", "доставка по РФ 2–7 рабочих дней, международная — 7–21 рабочий день."),
+    ("Возврат", "возврат возможен в течение 14 дней при сохранении товарного вида."),
+    ("Смена адреса доставки", "адрес можно изменить только до передачи заказа в доставку."),
+    ("Оплата", "доступны карты, СБП, безнал для юрлиц. Чек приходит на email."),
+    ("Промокоды", "промокод вводится при оформлении заказа, после оплаты применить нельзя."),
+    ("Отмена заказа", "заказ можно отменить до отправки, для отмены нужен номер заказа."),
+    ("Гарантия", "гарантия на технику — 12 месяцев с даты покупки."),
+    ("Самовывоз", "заказ хранится в пункте выдачи 5 дней, затем возвращается на склад."),
+    ("Подарочные карты", "подарочную карту можно использовать частично, остаток сохраняется."),
+    ("Счёт для юрлиц", "счёт выставляется по реквизитам, оплата в течение 3 банковских дней."),
+)
+
+_POLICY_LINES = (
+    "У бота **нет доступа** к личному кабинету клиента и к персональным данным.",
+    "Если вопрос требует данных из личного кабинета — бот должен **передать на оператора**.",
+    "Бот не должен придумывать статусы заказов, сроки и суммы.",
+    "Нельзя обещать компенсацию без решения оператора.",
+    "На грубость бот должен отвечать вежливо и нейтрально.",
+    "Запрещено запрашивать данные банковской карты в чате.",
+    "При угрозах и жалобах на мошенничество нужна эскалация на оператора.",
+    "Ответ должен быть коротким: не больше трёх предложений.",
+)
+
+_TICKETS = (
+    ("Где мой заказ??? уже неделя прошла", "Уточните номер заказа — проверим статус."),
+    ("хочу вернуть товар, чек есть", "Возврат возможен в течение 14 дней. Подскажите номер заказа."),
+    ("можно поменять адрес? я ошибся в подъезде", "Адрес можно изменить до передачи в доставку."),
+    ("промокод не применился, верните скидку", "После оплаты промокод применить нельзя."),
+    ("дай статус заказа 123456", "У меня нет доступа к вашему ЛК. Передам запрос оператору."),
+    ("а у вас доставка в Казахстан есть?", "Есть международная доставка: 7–21 рабочий день."),
+    ("почему вы списали деньги два раза???", "Передам оператору, чтобы проверили платёж."),
+    ("вы тупые? оператор где?", "Понимаю ваше недовольство. Передаю обращение оператору."),
+    ("(пустое сообщение)", "Уточните, пожалуйста, ваш вопрос."),
+    ("как оплатить от юрлица?", "Доступна оплата безналом для юрлиц."),
+    ("мне нужен инвойс", "Передам запрос оператору. Уточните номер заказа и реквизиты."),
+    ("я забыл пароль от ЛК, что делать?", "Я не имею доступа к ЛК. Позвоните в поддержку."),
+)
+
+_NOISE = ("", " )))", " !!!", " 🙂", " плз", " срочно")
+
+_CONTEXTLESS_RULES = (
+    "Сообщение должно быть вежливым, без грубости, без сарказма.",
+    "Нельзя использовать капслок и слишком много восклицательных знаков.",
+    "Нужно исправлять явные опечатки и пунктуацию.",
+    "Названия лекарств нельзя “исправлять” в бытовые слова.",
+    "Оператор не должен отвечать матом, должен сохранять нейтральный тон.",
+    "Запрещено обещать результат лечения.",
+)
+
+_CONTEXT_RULES = (
+    "Если пользователь просит “номер врача” — оператор не должен давать личный номер.",
+    "Если пользователь сильно недоволен — эскалация на оператора 2 линии.",
+    "Если пользователь просит отменить запись — оператор должен уточнить ФИО, дату и время.",
+    "Если пользователь спрашивает цену — оператор должен назвать цену из прайса клиники.",
+    "Если пользователь выбирает клинику — оператор должен предложить ближайшую запись.",
+)
+
+_DIALOGUES = (
+    ("Мне надо срочно отменить прием завтра", "Извините! Напишите вашу фамилию и время приема!!!"),
+    ("сколько стоит прием терапевта?", "Прием терапевта стоит 2500 рублей. Записать вас?"),
+    ("дайте номер врача", "Личный номер врача дать не могу, могу записать вас на прием."),
+    ("никто не отвечает уже час", "извените за ожидание, сейчас всё проверю"),
+    ("можно к лору на субботу?", "На субботу есть запись в 10:00 и 12:30. Какое время удобно?"),
+)
+
+
+def _support_sections(rng: random.Random) -> Iterator[str]:
+    yield "# **Синтетическая спецификация: FAQ \\+ выгрузка обращений**"
+    yield ""
+    yield "## **Дано**"
+    yield ""
+    yield "Мы делаем чат-бота техподдержки, который отвечает на вопросы клиентов как оператор."
+    yield ""
+    ticket_id = 1001
+    section = 0
+    while True:
+        section += 1
+        yield f"## **Ограничения (раздел {section})**"
+        yield ""
+        for line in rng.sample(_POLICY_LINES, 4):
+            yield f"* {line}  "
+        yield ""
+        yield f"## **FAQ (раздел {section})**"
+        yield ""
+        for number, (topic, answer) in enumerate(rng.sample(_FAQ_TOPICS, 6), start=1):
+            yield f"{number}. **{topic}**: {answer}  "
+        yield ""
+        yield f"## **Выгрузка обращений (раздел {section})**"
+        yield ""
+        yield "| ticket_id | user_message | operator_answer (пример) |"
+        yield "| ----- | ----- | ----- |"
+        for _ in range(16):
+            message, answer = rng.choice(_TICKETS)
+            yield f"| {ticket_id} | «{message}{rng.choice(_NOISE)}» | «{answer}» |"
+            ticket_id += 1
+        yield ""
+
+
+def _operator_sections(rng: random.Random) -> Iterator[str]:
+    yield "# **Синтетическая спецификация: проверки качества оператора**"
+    yield ""
+    yield "## **Дано**"
+    yield ""
+    yield "Нужно сделать “агента”, который проверяет качество работы оператора медкомпании."
+    yield ""
+    yield "Агент проверяет:"
+    yield ""
+    yield "1. **Сообщение оператора само по себе**: орфография, пунктуация, tone of voice.  "
+    yield "2. **Сообщение оператора с учётом контекста диалога**: ответил ли он на запрос.  "
+    yield ""
+    section = 0
+    while True:
+        section += 1
+        yield f"## **Бесконтекстные правила (раздел {section})**"
+        yield ""
+        for line in rng.sample(_CONTEXTLESS_RULES, 4):
+            yield f"* {line}  "
+        yield ""
+        yield f"## **Контекстные правила (раздел {section})**"
+        yield ""
+        for line in rng.sample(_CONTEXT_RULES, 3):
+            yield f"* {line}  "
+        yield ""
+        yield f"## **Пример диалога (раздел {section})**"
+        yield ""
+        for _ in range(3):
+            message, answer = rng.choice(_DIALOGUES)
+            yield f"Пользователь: «{message}{rng.choice(_NOISE)}»"
+            yield ""
+            yield f"Оператор: «{answer}»"
+            yield ""
+
+
+def iter_spec_lines(case: SpecCase, n_lines: int, seed: int = 0) -> Iterator[str]:
+    """Yield the ``n_lines`` lines of the synthetic spec for ``case``."""
+    if case not in CASES:
+        raise ValueError(f"Unknown case: {case}")
+    rng = random.Random(f"{case}:{seed}")
+    sections = _support_sections(rng) if case == "support_bot" else _operator_sections(rng)
+    return islice(sections, n_lines)
+
+
+def write_spec(path: str | Path, case: SpecCase, n_lines: int, seed: int = 0) -> Path:
+    """Write the spec to ``path`` line by line, so 1M-line specs need no buffering."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with target.open("w", encoding="utf-8", newline="\n") as f:
+        for line in iter_spec_lines(case, n_lines, seed):
+            f.write(line)
+            f.write("\n")
+    return target
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Write a synthetic markdown spec.")
+    parser.add_argument("--case", choices=CASES, default="support_bot")
+    parser.add_argument("--lines", type=int, default=1000, help="Number of lines")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help="Output markdown file")
+    args = parser.parse_args()
+    write_spec(args.out, args.case, args.lines, args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
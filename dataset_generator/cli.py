@@ -1,10 +1,26 @@
-﻿from pathlib import Path
+﻿import json
+from pathlib import Path
 from typing import Literal
 
 import typer
 
+from dataset_generator.extract.drafts import DEFAULT_CHUNK_TOKENS
+from dataset_generator.llm.ollama_client import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_KEEPALIVE_EXPIRY,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_TIMEOUT,
+)
+from dataset_generator.llm.resilience import (
+    DEFAULT_FAILURE_THRESHOLD,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_RESET_TIMEOUT,
+)
+from dataset_generator.llm.transcript import TranscriptMissError
+from dataset_generator.merge import MergeError, merge_shards, parse_shard
 from dataset_generator.pipeline import PipelineConfig, run_pipeline
-from dataset_generator.validate.validator import format_report, validate_out_dir
+from dataset_generator.trace import tracing
+from dataset_generator.validate.validator import MAX_ISSUES_PER_CODE, format_report, validate_report
 
 app = typer.Typer(add_completion=False)
 
@@ -63,8 +79,141 @@ def generate(
         help="LLM temperature.",
         show_default=True,
     ),
+    llm_timeout: float | None = typer.Option(
+        None,
+        "--llm-timeout",
+        help=f"LLM request timeout in seconds (default: {DEFAULT_TIMEOUT:g}; connecting: {DEFAULT_CONNECT_TIMEOUT:g}).",
+        show_default=False,
+    ),
+    llm_pool_size: int | None = typer.Option(
+        None,
+        "--llm-pool-size",
+        help=f"Max pooled connections to the LLM server (default: {DEFAULT_POOL_SIZE}, or --llm-concurrency if higher).",
+        show_default=False,
+    ),
+    llm_keepalive: float | None = typer.Option(
+        None,
+        "--llm-keepalive",
+        help=f"Idle keep-alive expiry for pooled LLM connections, seconds (default: {DEFAULT_KEEPALIVE_EXPIRY:g}).",
+        show_default=False,
+    ),
+    llm_concurrency: int = typer.Option(
+        1,
+        "--llm-concurrency",
+        help="Max concurrent LLM requests during example generation.",
+        show_default=True,
+        min=1,
+    ),
+    llm_batch_size: int = typer.Option(
+        1,
+        "--llm-batch-size",
+        help="User messages packed into one expected-output LLM request.",
+        show_default=True,
+        min=1,
+    ),
+    llm_chunk_tokens: int = typer.Option(
+        DEFAULT_CHUNK_TOKENS,
+        "--llm-chunk-tokens",
+        help="Approximate token budget per document chunk for LLM draft extraction.",
+        show_default=True,
+        min=1,
+    ),
+    llm_max_retries: int = typer.Option(
+        DEFAULT_MAX_RETRIES,
+        "--llm-max-retries",
+        help="Retries per LLM call on transient errors (jittered exponential backoff).",
+        show_default=True,
+        min=0,
+    ),
+    llm_breaker_threshold: int = typer.Option(
+        DEFAULT_FAILURE_THRESHOLD,
+        "--llm-breaker-threshold",
+        help="Consecutive LLM failures that open the circuit breaker.",
+        show_default=True,
+        min=1,
+    ),
+    llm_breaker_reset: float = typer.Option(
+        DEFAULT_RESET_TIMEOUT,
+        "--llm-breaker-reset",
+        help="Seconds an open circuit breaker waits before letting one probe LLM call through.",
+        show_default=True,
+        min=0,
+    ),
+    llm_cache: bool = typer.Option(
+        False,
+        "--llm-cache/--no-llm-cache",
+        help="Reuse LLM responses from the on-disk cache (opt-in: cached completions are replayed even after the model or server changes).",
+        show_default=True,
+    ),
+    llm_cache_path: Path | None = typer.Option(
+        None,
+        "--llm-cache-path",
+        help="LLM cache file (default: ~/.cache/dataset_generator/llm_cache.sqlite3).",
+        show_default=False,
+    ),
+    llm_record: Path | None = typer.Option(
+        None,
+        "--llm-record",
+        help="Append every LLM request/response of the run to this transcript file.",
+        show_default=False,
+    ),
+    llm_replay: Path | None = typer.Option(
+        None,
+        "--llm-replay",
+        help="Answer LLM requests from a --llm-record transcript instead of the provider; fail on a miss.",
+        show_default=False,
+    ),
+    stage_cache: bool = typer.Option(
+        False,
+        "--stage-cache/--no-stage-cache",
+        help="Reuse extracted use cases, policies and test cases from earlier runs with the same inputs and generator code (opt-in).",
+        show_default=True,
+    ),
+    stage_cache_dir: Path | None = typer.Option(
+        None,
+        "--stage-cache-dir",
+        help="Stage cache directory (default: ~/.cache/dataset_generator/stages).",
+        show_default=False,
+    ),
+    stream: bool = typer.Option(
+        False,
+        "--stream/--no-stream",
+        help="Write examples to dataset.jsonl as they are generated, then derive dataset.json from it.",
+    ),
+    workers: int = typer.Option(
+        1,
+        "--workers",
+        help="Worker processes generating test-case shards (output is identical for any count).",
+        show_default=True,
+        min=1,
+    ),
+    shard: str | None = typer.Option(
+        None,
+        "--shard",
+        help="Generate only slice i of N (1-based, e.g. 2/4) of the test cases; combine slices with merge.",
+        show_default=False,
+    ),
+    trace_path: Path | None = typer.Option(
+        None,
+        "--trace",
+        help="Write a Chrome trace-event timeline of the run (chrome://tracing, Perfetto) to this file.",
+        show_default=False,
+    ),
 ) -> None:
     """Generate datasets (stub)."""
+    try:
+        shard_spec = parse_shard(shard) if shard is not None else None
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc), param_hint="--shard") from exc
+    if llm_record is not None and llm_replay is not None:
+        raise typer.BadParameter(
+            "use either --llm-record or --llm-replay", param_hint="--llm-replay"
+        )
+    transcript = llm_record or llm_replay
+    if transcript is not None and llm_provider == "none":
+        raise typer.BadParameter(
+            "transcripts need an LLM provider", param_hint="--llm-record/--llm-replay"
+        )
     config = PipelineConfig(
         input_path=str(input_path),
         out_dir=str(out_dir),
@@ -77,21 +226,103 @@ def generate(
         llm_model=llm_model,
         ollama_base_url=ollama_base_url,
         llm_temperature=llm_temperature,
+        llm_timeout=llm_timeout,
+        llm_pool_size=llm_pool_size,
+        llm_keepalive=llm_keepalive,
+        llm_concurrency=llm_concurrency,
+        llm_batch_size=llm_batch_size,
+        llm_chunk_tokens=llm_chunk_tokens,
+        llm_max_retries=llm_max_retries,
+        llm_breaker_threshold=llm_breaker_threshold,
+        llm_breaker_reset=llm_breaker_reset,
+        llm_cache=llm_cache,
+        llm_cache_path=str(llm_cache_path) if llm_cache_path else None,
+        llm_transcript=str(transcript) if transcript else None,
+        llm_transcript_mode="replay" if llm_replay is not None else "record",
+        stage_cache=stage_cache,
+        stage_cache_dir=str(stage_cache_dir) if stage_cache_dir else None,
+        stream=stream,
+        workers=workers,
+        shard=shard_spec,
     )
-    run_pipeline(config)
-    typer.echo(f"Generated dataset at {out_dir}")
+    try:
+        with tracing(trace_path, "dataset_generator generate"):
+            run_pipeline(config)
+    except TranscriptMissError as exc:
+        typer.echo(f"ERROR: {exc}")
+        raise typer.Exit(code=1) from exc
+    if shard_spec is not None:
+        typer.echo(f"Generated shard {shard_spec[0]}/{shard_spec[1]} at {out_dir}")
+    else:
+        typer.echo(f"Generated dataset at {out_dir}")
+
+
+@app.command()
+def merge(
+    shard_dirs: list[Path] = typer.Argument(..., help="Output directories of generate --shard runs."),
+    out_dir: Path = typer.Option(..., "--out", help="Output directory for the merged run."),
+) -> None:
+    """Merge generate --shard i/N outputs into one output directory."""
+    try:
+        merge_shards(shard_dirs, out_dir)
+    except MergeError as exc:
+        typer.echo(f"ERROR: {exc}")
+        raise typer.Exit(code=1) from exc
+    typer.echo(f"Merged {len(shard_dirs)} shards into {out_dir}")
 
 
 @app.command()
 def validate(
     out_dir: Path = typer.Option(..., "--out", help="Output directory to validate."),
+    jobs: int = typer.Option(
+        1,
+        "--jobs",
+        help="Worker processes for the per-example checks (1 = check in-process).",
+        show_default=True,
+        min=1,
+    ),
+    max_errors_per_code: int = typer.Option(
+        MAX_ISSUES_PER_CODE,
+        "--max-errors-per-code",
+        help="Errors listed per error code; the rest are only counted.",
+        show_default=True,
+        min=1,
+    ),
+    fail_fast: bool = typer.Option(
+        False,
+        "--fail-fast",
+        help="Stop at the first error.",
+    ),
+    report_json: Path | None = typer.Option(
+        None,
+        "--report-json",
+        help="Also write the structured report (issues, per-code counts, sample ids) to this file.",
+        show_default=False,
+    ),
+    trace_path: Path | None = typer.Option(
+        None,
+        "--trace",
+        help="Write a Chrome trace-event timeline of the validation phases to this file.",
+        show_default=False,
+    ),
 ) -> None:
     """Validate generated datasets (stub)."""
-    ok, errors, counts = validate_out_dir(out_dir)
+    with tracing(trace_path, "dataset_generator validate"):
+        report = validate_report(
+            out_dir, jobs=jobs, max_per_code=max_errors_per_code, fail_fast=fail_fast
+        )
+    errors = report.issues.messages()
+    if report_json is not None:
+        report_json.parent.mkdir(parents=True, exist_ok=True)
+        report_json.write_text(
+            json.dumps(report.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8"
+        )
     if any("Schema error" in err and "required property" in err for err in errors):
         typer.echo(
             "WARNING: Возможно, out_dir сгенерен старой версией. Пересоздайте через generate."
         )
-    typer.echo(format_report(ok, errors, counts))
-    if not ok:
+    typer.echo(format_report(report.ok, errors, report.counts, report.issues.omitted()))
+    if report.stopped_early:
+        typer.echo("Stopped at the first error (--fail-fast).")
+    if not report.ok:
         raise typer.Exit(code=1)
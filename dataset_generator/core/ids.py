@@ -3,10 +3,13 @@
 import re
 import unicodedata
 from dataclasses import dataclass, field
+from functools import lru_cache
 
 _ALLOWED_PREFIXES = {"uc_", "pol_", "tc_", "ex_"}
 
 
+# Examples of one test case share a few id bases, so the slugs repeat back to back.
+@lru_cache(maxsize=4096)
 def slugify(text: str) -> str:
     normalized = unicodedata.normalize("NFKD", text)
     ascii_text = normalized.encode("ascii", "ignore").decode("ascii")
@@ -43,3 +46,15 @@ class IdFactory:
             candidate = f"{base}_{count}"
         self._seen.add(candidate)
         return candidate
+
+
+def nth_id(prefix: str, text_seed: str, n: int) -> str:
+    """The id :meth:`IdFactory.new` returns for ``text_seed`` when it is the ``n``-th
+    (1-based) call whose seed slugifies to the same base.
+
+    Callers that can count earlier uses of a base derive ids without a shared factory.
+    """
+    if prefix not in _ALLOWED_PREFIXES:
+        raise ValueError("Unsupported prefix")
+    base = f"{prefix}{slugify(text_seed)}"
+    return base if n == 1 else f"{base}_{n}"
@@ -1,13 +1,27 @@
 ﻿from __future__ import annotations
 
-from dataclasses import dataclass
+import codecs
+import mmap
+import os
+import re
+from array import array
+from collections.abc import Callable, Iterator, Sequence
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any, TypeVar
+
+MMAP_THRESHOLD_BYTES = 64 * 1024 * 1024
+_ENCODING_PROBE_BYTES = 1024 * 1024
+_NEWLINE_RE = re.compile(rb"\n")
+
+T = TypeVar("T")
 
 
 @dataclass(frozen=True)
 class MarkdownDocument:
     path: str
     lines: list[str]
+    _derived: dict[str, Any] = field(default_factory=dict, init=False, repr=False, compare=False)
 
     @property
     def n_lines(self) -> int:
@@ -35,3 +49,125 @@ class MarkdownDocument:
         if line_end > self.n_lines:
             raise ValueError("Invalid line range")
         return "\n".join(self.lines[line_start - 1 : line_end])
+
+    def cached(self, key: str, build: Callable[[], T]) -> T:
+        """Return data derived from this document, building it on first use."""
+        if key not in self._derived:
+            self._derived[key] = build()
+        return self._derived[key]
+
+    def close(self) -> None:
+        return None
+
+
+def _detect_encoding(prefix: bytes) -> str:
+    # The prefix may end in the middle of a multi-byte sequence, hence final=False.
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+    except UnicodeDecodeError:
+        return "cp1251"
+    return "utf-8"
+
+
+class _MappedLines(Sequence):
+    """Lazily decoded view over the lines of a :class:`MappedMarkdownDocument`."""
+
+    def __init__(self, doc: "MappedMarkdownDocument") -> None:
+        self._doc = doc
+
+    def __len__(self) -> int:
+        return self._doc.n_lines
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._doc.line(i + 1) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("line index out of range")
+        return self._doc.line(index + 1)
+
+    def __iter__(self) -> Iterator[str]:
+        for number in range(1, len(self) + 1):
+            yield self._doc.line(number)
+
+
+class MappedMarkdownDocument:
+    """Read-only markdown document backed by ``mmap`` and a line-offset index.
+
+    Only the start offset of every line is kept in memory; lines are decoded on
+    access. Line breaks are ``\\n`` or ``\\r\\n``. Exposes the same ``lines`` /
+    ``n_lines`` / ``quote`` API as :class:`MarkdownDocument`.
+    """
+
+    def __init__(self, path: str, buffer: mmap.mmap | None, starts: array, encoding: str) -> None:
+        self.path = path
+        self.encoding = encoding
+        self._buffer = buffer
+        self._starts = starts
+        self._size = len(buffer) if buffer is not None else 0
+        self._derived: dict[str, Any] = {}
+
+    @classmethod
+    def read(cls, path: str) -> "MappedMarkdownDocument":
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls(path=path, buffer=None, starts=array("Q"), encoding="utf-8")
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        encoding = _detect_encoding(buffer[:_ENCODING_PROBE_BYTES])
+        starts = array("Q", [0])
+        starts.extend(match.end() for match in _NEWLINE_RE.finditer(buffer))
+        if starts[-1] == len(buffer):
+            starts.pop()
+        return cls(path=path, buffer=buffer, starts=starts, encoding=encoding)
+
+    @property
+    def n_lines(self) -> int:
+        return len(self._starts)
+
+    @property
+    def lines(self) -> _MappedLines:
+        return _MappedLines(self)
+
+    def line(self, number: int) -> str:
+        """Return line ``number`` (1-based) without its line break."""
+        start = self._starts[number - 1]
+        end = self._starts[number] - 1 if number < len(self._starts) else self._size
+        raw = self._buffer[start:end]
+        if raw.endswith(b"\n"):
+            raw = raw[:-1]
+        if raw.endswith(b"\r"):
+            raw = raw[:-1]
+        return raw.decode(self.encoding, errors="ignore")
+
+    def quote(self, line_start: int, line_end: int) -> str:
+        if line_start < 1 or line_end < 1 or line_start > line_end:
+            raise ValueError("Invalid line range")
+        if line_end > self.n_lines:
+            raise ValueError("Invalid line range")
+        return "\n".join(self.line(number) for number in range(line_start, line_end + 1))
+
+    def cached(self, key: str, build: Callable[[], T]) -> T:
+        """Return data derived from this document, building it on first use."""
+        if key not in self._derived:
+            self._derived[key] = build()
+        return self._derived[key]
+
+    def close(self) -> None:
+        if self._buffer is not None:
+            self._buffer.close()
+
+    def __enter__(self) -> "MappedMarkdownDocument":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def open_markdown(
+    path: str, mmap_threshold: int = MMAP_THRESHOLD_BYTES
+) -> MarkdownDocument | MappedMarkdownDocument:
+    """Read small files eagerly and map files of ``mmap_threshold`` bytes or more."""
+    if os.path.getsize(path) >= mmap_threshold:
+        return MappedMarkdownDocument.read(path)
+    return MarkdownDocument.read(path)
@@ -78,6 +78,22 @@ class RunManifest(BaseModel):
     llm: dict
     input_path: str
     out_path: str
+    metrics: dict = Field(default_factory=dict)
+
+
+class ShardManifest(BaseModel):
+    shard_index: int
+    shard_count: int
+    seed: int
+    timestamp: str
+    generator_version: str
+    llm: dict
+    input_path: str
+    out_path: str
+    settings: dict
+    test_case_ids: list[str]
+    n_examples: int
+    metrics: dict = Field(default_factory=dict)
 
 
 def to_json(obj: Any) -> dict:
@@ -96,4 +112,5 @@ def model_json_schema() -> dict:
         "DatasetInput": DatasetInput.model_json_schema(),
         "DatasetExample": DatasetExample.model_json_schema(),
         "RunManifest": RunManifest.model_json_schema(),
+        "ShardManifest": ShardManifest.model_json_schema(),
     }
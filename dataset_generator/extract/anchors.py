@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from dataset_generator.core.markdown import MarkdownDocument
+from dataset_generator.core.models import Evidence
+
+
+class _AhoCorasick:
+    """Multi-pattern substring matcher: one scan of the text finds every pattern."""
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[tuple[int, ...]] = [()]
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] += (pattern_id,)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[int]:
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                yield from out[state]
+
+
+class AnchorIndex:
+    """Per-document index that maps anchor phrases to the first line containing them.
+
+    Matching is case-insensitive and line-local, like a plain
+    ``anchor.lower() in line.lower()`` scan over the document. Lines are
+    lowercased one at a time during the scan rather than copied up front, so a
+    memory-mapped document stays mapped instead of being held in memory twice.
+    """
+
+    def __init__(self, doc: MarkdownDocument) -> None:
+        self._doc = doc
+
+    @classmethod
+    def for_document(cls, doc: MarkdownDocument) -> "AnchorIndex":
+        return doc.cached("anchor_index", lambda: cls(doc))
+
+    def first_lines(self, anchor_lists: list[list[str]]) -> list[int | None]:
+        """Resolve every anchor list in a single pass over the document.
+
+        For each list, returns the 1-based number of the first line containing
+        any of its anchors, or ``None``.
+        """
+        pattern_ids: dict[str, int] = {}
+        per_list: list[list[int]] = []
+        for anchors in anchor_lists:
+            ids = []
+            for anchor in anchors:
+                if not anchor.strip():
+                    continue
+                ids.append(pattern_ids.setdefault(anchor.lower(), len(pattern_ids)))
+            per_list.append(ids)
+
+        first_seen: dict[int, int] = {}
+        if pattern_ids:
+            automaton = _AhoCorasick(pattern_ids)
+            for line_idx, line in enumerate(self._doc.lines, start=1):
+                for pattern_id in automaton.iter_matches(line.lower()):
+                    first_seen.setdefault(pattern_id, line_idx)
+                if len(first_seen) == len(pattern_ids):
+                    break
+
+        return [
+            min((first_seen[i] for i in ids if i in first_seen), default=None)
+            for ids in per_list
+        ]
+
+
+def evidence_for_anchors(
+    doc: MarkdownDocument, anchor_lists: list[list[str]]
+) -> list[list[Evidence]]:
+    """Build single-line evidence for each anchor list (empty when nothing matches)."""
+    input_file = Path(doc.path).name
+    results: list[list[Evidence]] = []
+    for line_idx in AnchorIndex.for_document(doc).first_lines(anchor_lists):
+        if line_idx is None:
+            results.append([])
+            continue
+        results.append(
+            [
+                Evidence(
+                    input_file=input_file,
+                    line_start=line_idx,
+                    line_end=line_idx,
+                    quote=doc.quote(line_idx, line_idx),
+                )
+            ]
+        )
+    return results
@@ -1,42 +1,31 @@
 ﻿from __future__ import annotations
 
+from collections.abc import Sequence
 from typing import Literal
 
+from dataset_generator.core.markdown import MappedMarkdownDocument, MarkdownDocument
+from dataset_generator.extract.tokenizer import (
+    OPERATOR_QUALITY_KEYWORDS,
+    SUPPORT_KEYWORDS,
+    tokenize,
+)
+
 CaseType = Literal["support_bot", "operator_quality", "auto"]
 
 
-_SUPPORT_KEYWORDS = [
-    "faq",
-    "клиент",
-    "оператор",
-    "тикет",
-    "tickets",
-    "вопрос",
-    "ответ",
-    "поддержк",
-]
-
-_OPERATOR_QUALITY_KEYWORDS = [
-    "исправь",
-    "качество",
-    "проверки",
-    "валидац",
-    "диалог",
-    "оператор",
-    "ответ оператора",
-]
-
-
-def detect_case(lines: list[str], case_override: CaseType = "auto") -> Literal[
-    "support_bot", "operator_quality"
-]:
+def detect_case(
+    source: MarkdownDocument | MappedMarkdownDocument | Sequence[str],
+    case_override: CaseType = "auto",
+) -> Literal["support_bot", "operator_quality"]:
     if case_override != "auto":
         return case_override
 
-    text = "\n".join(lines).lower()
+    if isinstance(source, Sequence):
+        source = MarkdownDocument(path="", lines=list(source))
+    tokens = tokenize(source)
 
-    score_support = sum(1 for kw in _SUPPORT_KEYWORDS if kw in text)
-    score_operator = sum(1 for kw in _OPERATOR_QUALITY_KEYWORDS if kw in text)
+    score_support = sum(1 for kw in SUPPORT_KEYWORDS if tokens.has_keyword(kw))
+    score_operator = sum(1 for kw in OPERATOR_QUALITY_KEYWORDS if tokens.has_keyword(kw))
 
     if score_operator >= score_support and score_operator > 0:
         return "operator_quality"
@@ -1,12 +1,27 @@
 ﻿from __future__ import annotations
 
+import asyncio
+import json
+import re
 from dataclasses import dataclass
-from pathlib import Path
 
 from dataset_generator.core.ids import IdFactory
 from dataset_generator.core.markdown import MarkdownDocument
-from dataset_generator.core.models import Evidence, Policy, UseCase
+from dataset_generator.core.models import Policy, UseCase
 from dataset_generator.core.text_sanitize import sanitize_markdown_text
+from dataset_generator.extract.anchors import evidence_for_anchors
+from dataset_generator.extract.tokenizer import tokenize
+from dataset_generator.llm.base import aclose_llm_client, run_achat
+
+DEFAULT_CHUNK_TOKENS = 6000
+
+_NON_WORD_RE = re.compile(r"[^\w]+")
+
+
+@dataclass
+class DraftStats:
+    chunks: int = 0
+    failed_chunks: int = 0
 
 
 @dataclass(frozen=True)
@@ -42,33 +57,62 @@ def _normalize_policy_type(value: str | None) -> str:
     return "must"
 
 
-def extract_drafts(
-    doc: MarkdownDocument,
-    llm_client,
-    case: str,
-    seed: int,
-    temperature: float = 0.2,
-) -> tuple[list[UseCaseDraft], list[PolicyDraft]]:
+def _estimate_tokens(text: str) -> int:
+    # Rough budget only: ~4 characters per token for mixed Russian/English markdown.
+    return len(text) // 4 + 1
+
+
+def chunk_document(doc: MarkdownDocument, max_tokens: int = DEFAULT_CHUNK_TOKENS) -> list[str]:
+    """Split the document into prompt-sized chunks along markdown section boundaries.
+
+    Sections are packed greedily until ``max_tokens`` would be exceeded; a single
+    section larger than the budget is split between lines.
+    """
+    section_starts = {header.line for header in tokenize(doc).of_kind("header")}
+    sections: list[list[str]] = []
+    for idx, line in enumerate(doc.lines, start=1):
+        if not sections or idx in section_starts:
+            sections.append([])
+        sections[-1].append(line)
+
+    chunks: list[str] = []
+    current: list[str] = []
+    current_tokens = 0
+    for section in sections:
+        section_tokens = sum(_estimate_tokens(line) for line in section)
+        if current and current_tokens + section_tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        if section_tokens <= max_tokens:
+            current.extend(section)
+            current_tokens += section_tokens
+            continue
+        for line in section:
+            line_tokens = _estimate_tokens(line)
+            if current and current_tokens + line_tokens > max_tokens:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(line)
+            current_tokens += line_tokens
+    if current or not chunks:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _drafts_messages(chunk: str, case: str, seed: int) -> list[dict[str, str]]:
     system = (
         "You extract structured drafts of use cases and policies from markdown."
         " Return JSON with keys use_cases and policies."
         " use_cases: [{name, description, anchor_phrases}]"
         " policies: [{statement, type, anchor_phrases}]"
     )
-    user = (
-        f"Case: {case}. Seed: {seed}. Extract drafts from the document below.\n\n"
-        + "\n".join(doc.lines[:2000])
-    )
-    response = llm_client.chat(
-        messages=[{"role": "system", "content": system}, {"role": "user", "content": user}],
-        model=getattr(llm_client, "model", None) or "default",
-        temperature=temperature,
-        json_mode=True,
-    )
+    user = f"Case: {case}. Seed: {seed}. Extract drafts from the document below.\n\n" + chunk
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+
+def _parse_drafts(response: str | dict) -> tuple[list[UseCaseDraft], list[PolicyDraft]]:
     if isinstance(response, str):
         try:
-            import json
-
             payload = json.loads(response)
         except Exception:
             payload = {}
@@ -115,28 +159,106 @@ def extract_drafts(
     return use_cases, policies
 
 
-def _find_anchor_line(doc: MarkdownDocument, anchors: list[str]) -> int | None:
-    lowered_anchors = [a.lower() for a in anchors if a.strip()]
-    for idx, line in enumerate(doc.lines, start=1):
-        lowered_line = line.lower()
-        if any(anchor in lowered_line for anchor in lowered_anchors):
-            return idx
-    return None
-
-
-def _evidence_from_anchors(doc: MarkdownDocument, anchors: list[str]) -> list[Evidence]:
-    line_idx = _find_anchor_line(doc, anchors)
-    if line_idx is None:
-        return []
-    quote = doc.quote(line_idx, line_idx)
-    return [
-        Evidence(
-            input_file=Path(doc.path).name,
-            line_start=line_idx,
-            line_end=line_idx,
-            quote=quote,
+def _dedupe_key(text: str) -> str:
+    return " ".join(_NON_WORD_RE.sub(" ", text.lower()).split())
+
+
+def _merge_drafts(
+    results: list[tuple[list[UseCaseDraft], list[PolicyDraft]]],
+) -> tuple[list[UseCaseDraft], list[PolicyDraft]]:
+    use_cases: list[UseCaseDraft] = []
+    policies: list[PolicyDraft] = []
+    seen_use_cases: set[str] = set()
+    seen_policies: set[str] = set()
+    for chunk_use_cases, chunk_policies in results:
+        for draft in chunk_use_cases:
+            key = _dedupe_key(draft.name)
+            if key not in seen_use_cases:
+                seen_use_cases.add(key)
+                use_cases.append(draft)
+        for draft in chunk_policies:
+            key = _dedupe_key(draft.statement)
+            if key not in seen_policies:
+                seen_policies.add(key)
+                policies.append(draft)
+    return use_cases, policies
+
+
+async def _aextract_chunks(
+    llm_client,
+    prompts: list[list[dict[str, str]]],
+    temperature: float,
+    concurrency: int,
+) -> list[str | dict | Exception]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _one(messages: list[dict[str, str]]) -> str | dict:
+        async with semaphore:
+            return await run_achat(
+                llm_client,
+                messages=messages,
+                model=getattr(llm_client, "model", None) or "default",
+                temperature=temperature,
+                json_mode=True,
+            )
+
+    try:
+        return list(
+            await asyncio.gather(*(_one(messages) for messages in prompts), return_exceptions=True)
+        )
+    finally:
+        await aclose_llm_client(llm_client)
+
+
+def _chat_or_error(
+    llm_client, messages: list[dict[str, str]], temperature: float
+) -> str | dict | Exception:
+    try:
+        return llm_client.chat(
+            messages=messages,
+            model=getattr(llm_client, "model", None) or "default",
+            temperature=temperature,
+            json_mode=True,
         )
+    except Exception as exc:
+        return exc
+
+
+def extract_drafts(
+    doc: MarkdownDocument,
+    llm_client,
+    case: str,
+    seed: int,
+    temperature: float = 0.2,
+    max_chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    concurrency: int = 1,
+    stats: DraftStats | None = None,
+) -> tuple[list[UseCaseDraft], list[PolicyDraft]]:
+    """Extract drafts chunk by chunk and merge them.
+
+    A failed chunk is skipped and counted in ``stats``; the drafts of the other
+    chunks are kept. Only when every chunk fails is the first error raised.
+    """
+    prompts = [
+        _drafts_messages(chunk, case, seed) for chunk in chunk_document(doc, max_chunk_tokens)
     ]
+    if concurrency <= 1 or len(prompts) == 1:
+        responses = [_chat_or_error(llm_client, messages, temperature) for messages in prompts]
+    else:
+        responses = asyncio.run(_aextract_chunks(llm_client, prompts, temperature, concurrency))
+    for response in responses:
+        # Cancellation and other non-Exception errors must not pass as a failed chunk.
+        if isinstance(response, BaseException) and not isinstance(response, Exception):
+            raise response
+    errors = [response for response in responses if isinstance(response, Exception)]
+    if stats is not None:
+        stats.chunks += len(responses)
+        stats.failed_chunks += len(errors)
+    if len(errors) == len(responses):
+        raise errors[0]
+    return _merge_drafts(
+        [_parse_drafts(response) for response in responses if not isinstance(response, Exception)]
+    )
 
 
 def extract_use_cases_drafts(
@@ -145,8 +267,8 @@ def extract_use_cases_drafts(
 ) -> list[UseCase]:
     factory = IdFactory("uc_")
     results: list[UseCase] = []
-    for draft in drafts:
-        evidence = _evidence_from_anchors(doc, draft.anchor_phrases)
+    all_evidence = evidence_for_anchors(doc, [draft.anchor_phrases for draft in drafts])
+    for draft, evidence in zip(drafts, all_evidence):
         if not evidence:
             continue
         results.append(
@@ -167,8 +289,8 @@ def extract_policies_drafts(
 ) -> list[Policy]:
     factory = IdFactory("pol_")
     results: list[Policy] = []
-    for draft in drafts:
-        evidence = _evidence_from_anchors(doc, draft.anchor_phrases)
+    all_evidence = evidence_for_anchors(doc, [draft.anchor_phrases for draft in drafts])
+    for draft, evidence in zip(drafts, all_evidence):
         if not evidence:
             continue
         results.append(
@@ -8,21 +8,9 @@ from dataset_generator.core.ids import IdFactory
 from dataset_generator.core.markdown import MarkdownDocument
 from dataset_generator.core.models import Evidence, Policy, UseCase
 from dataset_generator.core.text_sanitize import sanitize_markdown_text
+from dataset_generator.extract.tokenizer import POLICY_KEYWORDS, MarkdownTokens, tokenize
 
 
-_FAQ_PREFIXES = ("q:", "q.", "вопрос:")
-_LIST_PREFIXES = ("- ", "* ")
-
-_POLICY_KEYWORDS = [
-    "нельзя",
-    "должен",
-    "должна",
-    "должны",
-    "запрещено",
-    "эскалация",
-    "конфиденциальность",
-]
-
 _POLICY_TYPE_MAP = [
     ("нельзя", "must_not"),
     ("запрещ", "must_not"),
@@ -47,50 +35,22 @@ class _Section:
     title: str
 
 
-def _is_header(line: str) -> bool:
-    return line.lstrip().startswith("#")
-
-
-def _header_title(line: str) -> str:
-    return line.lstrip("#").strip()
-
-
-def _collect_sections(lines: list[str]) -> list[_Section]:
+def _collect_sections(tokens: MarkdownTokens) -> list[_Section]:
+    headers = tokens.of_kind("header")
     sections: list[_Section] = []
-    current_start: int | None = None
-    current_title = ""
-    for idx, line in enumerate(lines, start=1):
-        if _is_header(line):
-            if current_start is not None:
-                sections.append(_Section(current_start, idx - 1, current_title))
-            current_start = idx
-            current_title = _header_title(line) or "Section"
-    if current_start is not None:
-        sections.append(_Section(current_start, len(lines), current_title))
+    for header, following in zip(headers, headers[1:]):
+        sections.append(_Section(header.line, following.line - 1, header.title or "Section"))
+    if headers:
+        sections.append(_Section(headers[-1].line, tokens.n_lines, headers[-1].title or "Section"))
     return sections
 
 
-def _collect_list_items(lines: list[str]) -> list[_Section]:
-    items: list[_Section] = []
-    for idx, line in enumerate(lines, start=1):
-        stripped = line.strip()
-        if stripped.startswith(_LIST_PREFIXES):
-            title = stripped.lstrip("-* ").strip() or "Item"
-            items.append(_Section(idx, idx, title))
-    return items
+def _collect_list_items(tokens: MarkdownTokens) -> list[_Section]:
+    return [_Section(item.line, item.end, item.title or "Item") for item in tokens.of_kind("list_item")]
 
 
-def _collect_faq(lines: list[str]) -> list[_Section]:
-    items: list[_Section] = []
-    for idx, line in enumerate(lines, start=1):
-        stripped = line.strip().lower()
-        if any(stripped.startswith(prefix) for prefix in _FAQ_PREFIXES):
-            end = idx
-            if idx < len(lines) and lines[idx].strip().lower().startswith("a:"):
-                end = idx + 1
-            title = lines[idx - 1].strip() or "FAQ"
-            items.append(_Section(idx, end, title))
-    return items
+def _collect_faq(tokens: MarkdownTokens) -> list[_Section]:
+    return [_Section(item.line, item.end, item.title or "FAQ") for item in tokens.of_kind("faq")]
 
 
 def _dedupe_sections(sections: Iterable[_Section]) -> list[_Section]:
@@ -105,11 +65,12 @@ def _dedupe_sections(sections: Iterable[_Section]) -> list[_Section]:
     return result
 
 
-def extract_use_cases(doc: MarkdownDocument, n: int) -> list[UseCase]:
+def extract_use_cases(doc: MarkdownDocument, n: int, case: str = "") -> list[UseCase]:
+    tokens = tokenize(doc)
     sections = []
-    sections.extend(_collect_sections(doc.lines))
-    sections.extend(_collect_list_items(doc.lines))
-    sections.extend(_collect_faq(doc.lines))
+    sections.extend(_collect_sections(tokens))
+    sections.extend(_collect_list_items(tokens))
+    sections.extend(_collect_faq(tokens))
     sections = _dedupe_sections(sections)
 
     factory = IdFactory("uc_")
@@ -131,7 +92,7 @@ def extract_use_cases(doc: MarkdownDocument, n: int) -> list[UseCase]:
         use_cases.append(
             UseCase(
                 id=factory.new(sec.title),
-                case="",
+                case=case,
                 name=name,
                 description=description,
                 evidence=evidence,
@@ -140,32 +101,31 @@ def extract_use_cases(doc: MarkdownDocument, n: int) -> list[UseCase]:
     return use_cases
 
 
-def extract_policies(doc: MarkdownDocument, n: int) -> list[Policy]:
+def extract_policies(doc: MarkdownDocument, n: int, case: str = "") -> list[Policy]:
     factory = IdFactory("pol_")
     policies: list[Policy] = []
-    for idx, line in enumerate(doc.lines, start=1):
-        lowered = line.lower()
-        if any(keyword in lowered for keyword in _POLICY_KEYWORDS):
-            if len(policies) >= n:
-                break
-            quote = doc.quote(idx, idx)
-            evidence = [
-                Evidence(
-                    input_file=Path(doc.path).name,
-                    line_start=idx,
-                    line_end=idx,
-                    quote=quote,
-                )
-            ]
-            statement = sanitize_markdown_text(line.strip())
-            policy_type = _policy_type_for_text(statement)
-            policies.append(
-                Policy(
-                    id=factory.new(line.strip()),
-                    case="",
-                    type=policy_type,
-                    statement=statement,
-                    evidence=evidence,
-                )
+    for idx in tokenize(doc).lines_with_any(POLICY_KEYWORDS):
+        if len(policies) >= n:
+            break
+        line = doc.lines[idx - 1]
+        quote = doc.quote(idx, idx)
+        evidence = [
+            Evidence(
+                input_file=Path(doc.path).name,
+                line_start=idx,
+                line_end=idx,
+                quote=quote,
             )
+        ]
+        statement = sanitize_markdown_text(line.strip())
+        policy_type = _policy_type_for_text(statement)
+        policies.append(
+            Policy(
+                id=factory.new(line.strip()),
+                case=case,
+                type=policy_type,
+                statement=statement,
+                evidence=evidence,
+            )
+        )
     return policies
@@ -4,27 +4,28 @@ import re
 
 from dataset_generator.core.markdown import MarkdownDocument
 from dataset_generator.core.text_sanitize import sanitize_markdown_text
+from dataset_generator.extract.tokenizer import tokenize
 
 
 _FAQ_HEADER_RE = re.compile(r"^\s*##\s+.*FAQ", re.IGNORECASE)
 _TICKETS_HEADER_RE = re.compile(r"^\s*##\s+.*выгрузк", re.IGNORECASE)
-_TABLE_ROW_RE = re.compile(r"^\s*\|\s*(.+?)\s*\|\s*(.+?)\s*\|\s*(.+?)\s*\|")
 
 
 def parse_support_faq(doc: MarkdownDocument) -> list[str]:
     items: list[str] = []
     in_faq = False
-    for line in doc.lines:
+    for block in tokenize(doc).of_kind("header", "numbered_item"):
+        line = block.text
         if line.lstrip().startswith("# "):
             in_faq = False
         if _FAQ_HEADER_RE.search(line):
             in_faq = True
             continue
         if in_faq:
-            if line.lstrip().startswith("#"):
+            if block.kind == "header":
                 in_faq = False
                 continue
-            if re.match(r"^\s*\d+\.", line):
+            if block.kind == "numbered_item":
                 text = sanitize_markdown_text(line)
                 if ":" in text:
                     text = text.split(":", 1)[0].strip()
@@ -36,7 +37,8 @@ def parse_support_faq(doc: MarkdownDocument) -> list[str]:
 def parse_support_tickets(doc: MarkdownDocument) -> list[dict]:
     rows: list[dict] = []
     in_table = False
-    for line in doc.lines:
+    for block in tokenize(doc).of_kind("header", "table_row"):
+        line = block.text
         if _TICKETS_HEADER_RE.search(line):
             in_table = True
             continue
@@ -44,14 +46,11 @@ def parse_support_tickets(doc: MarkdownDocument) -> list[dict]:
             in_table = False
         if not in_table:
             continue
-        match = _TABLE_ROW_RE.match(line)
-        if not match:
+        if block.kind != "table_row":
             continue
         if "---" in line:
             continue
-        ticket_id = match.group(1).strip()
-        user_message = match.group(2).strip()
-        operator_answer = match.group(3).strip()
+        ticket_id, user_message, operator_answer = block.cells
         if not ticket_id.isdigit():
             continue
         user_message = sanitize_markdown_text(user_message.strip("«»\""))
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Literal
+
+from dataset_generator.core.markdown import MarkdownDocument
+
+BlockKind = Literal["header", "list_item", "numbered_item", "faq", "table_row"]
+
+POLICY_KEYWORDS = (
+    "нельзя",
+    "должен",
+    "должна",
+    "должны",
+    "запрещено",
+    "эскалация",
+    "конфиденциальность",
+)
+
+SUPPORT_KEYWORDS = (
+    "faq",
+    "клиент",
+    "оператор",
+    "тикет",
+    "tickets",
+    "вопрос",
+    "ответ",
+    "поддержк",
+)
+
+OPERATOR_QUALITY_KEYWORDS = (
+    "исправь",
+    "качество",
+    "проверки",
+    "валидац",
+    "диалог",
+    "оператор",
+    "ответ оператора",
+)
+
+_KEYWORDS = tuple(dict.fromkeys(POLICY_KEYWORDS + SUPPORT_KEYWORDS + OPERATOR_QUALITY_KEYWORDS))
+# Only policy extraction needs line numbers; case detection just needs presence.
+_LINE_KEYWORDS = POLICY_KEYWORDS
+
+_HS = r"[^\S\n]*"  # horizontal whitespace: like \s*, but never crosses a line break
+# One pattern classifies every line that can start a block, so lines of plain text
+# never reach Python code. Each alternative mirrors the per-line checks the
+# extractors used before (e.g. ``stripped.startswith("- ")`` for list items).
+_BLOCK_RE = re.compile(
+    rf"^{_HS}(?:"
+    r"(?P<header>#+)"
+    rf"|\|{_HS}(?P<c1>.+?){_HS}\|{_HS}(?P<c2>.+?){_HS}\|{_HS}(?P<c3>.+?){_HS}\|(?P<table_row>)"
+    r"|[-*] (?=[^\n]*\S)(?P<list_item>)"
+    r"|\d+\.(?P<numbered_item>)"
+    r"|(?i:q[:.]|вопрос:)(?P<faq>)"
+    r"|(?i:a:)(?P<answer>)"
+    r")",
+    re.MULTILINE,
+)
+_BATCH_LINES = 65536
+
+
+@dataclass(slots=True)
+class Block:
+    kind: BlockKind
+    line: int
+    end: int
+    text: str
+    title: str = ""
+    level: int = 0
+    cells: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class MarkdownTokens:
+    """Typed block stream of a document (at most one block per line, in line order)
+    plus keyword hits: which known keywords occur, and on which lines for policy ones."""
+
+    n_lines: int
+    blocks: tuple[Block, ...]
+    keywords: frozenset[str]
+    keyword_lines: dict[str, tuple[int, ...]]
+    _by_kind: dict[str, list[Block]] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def of_kind(self, *kinds: BlockKind) -> list[Block]:
+        key = ",".join(kinds)
+        if key not in self._by_kind:
+            self._by_kind[key] = [block for block in self.blocks if block.kind in kinds]
+        return self._by_kind[key]
+
+    def has_keyword(self, keyword: str) -> bool:
+        return keyword in self.keywords
+
+    def lines_with_any(self, keywords: tuple[str, ...]) -> list[int]:
+        hits: set[int] = set()
+        for keyword in keywords:
+            hits.update(self.keyword_lines.get(keyword, ()))
+        return sorted(hits)
+
+
+def _tokenize(doc: MarkdownDocument) -> MarkdownTokens:
+    blocks: list[Block] = []
+    keywords: set[str] = set()
+    keyword_lines: dict[str, list[int]] = {keyword: [] for keyword in _LINE_KEYWORDS}
+    lines_iter = iter(doc.lines)
+    first_line = 1
+    while batch := list(islice(lines_iter, _BATCH_LINES)):
+        text = "\n".join(batch)
+
+        idx, pos = first_line, 0
+        for match in _BLOCK_RE.finditer(text):
+            start = match.start()
+            idx += text.count("\n", pos, start)
+            pos = start
+            kind = match.lastgroup
+            if kind == "answer":
+                # An answer right below a question extends that FAQ block.
+                if blocks and blocks[-1].kind == "faq" and blocks[-1].line == idx - 1:
+                    blocks[-1].end = idx
+                continue
+            line = batch[idx - first_line]
+            if kind == "header":
+                title = line.lstrip("#").strip()
+                blocks.append(Block(kind, idx, idx, line, title, len(match.group(kind))))
+            elif kind == "table_row":
+                blocks.append(Block(kind, idx, idx, line, cells=match.group("c1", "c2", "c3")))
+            elif kind == "list_item":
+                blocks.append(Block(kind, idx, idx, line, line.strip().lstrip("-* ").strip()))
+            elif kind == "faq":
+                blocks.append(Block(kind, idx, idx, line, line.strip()))
+            else:
+                blocks.append(Block(kind, idx, idx, line))
+
+        lowered = text.lower()
+        keywords.update(keyword for keyword in _KEYWORDS if keyword in lowered)
+        for keyword in keywords.intersection(_LINE_KEYWORDS):
+            idx, pos = first_line, 0
+            while (start := lowered.find(keyword, pos)) >= 0:
+                idx += lowered.count("\n", pos, start)
+                keyword_lines[keyword].append(idx)
+                # One hit per line is enough: continue from the start of the next line.
+                pos = lowered.find("\n", start)
+                if pos < 0:
+                    break
+
+        first_line += len(batch)
+
+    return MarkdownTokens(
+        n_lines=first_line - 1,
+        blocks=tuple(blocks),
+        keywords=frozenset(keywords),
+        keyword_lines={keyword: tuple(lines) for keyword, lines in keyword_lines.items()},
+    )
+
+
+def tokenize(doc: MarkdownDocument) -> MarkdownTokens:
+    """Tokenize the document once; later calls return the cached result."""
+    return doc.cached("markdown_tokens", lambda: _tokenize(doc))
@@ -14,6 +14,7 @@ def generate_test_cases(
     policies: list[Policy],
     n_per_uc: int,
     seed: int,
+    case: str = "",
 ) -> list[TestCase]:
     if n_per_uc < 1:
         return []
@@ -36,7 +37,7 @@ def generate_test_cases(
             test_cases.append(
                 TestCase(
                     id=factory.new(f"{uc.id}-{axis}"),
-                    case="",
+                    case=case,
                     use_case_id=uc.id,
                     parameters={"axis": axis},
                     policy_ids=policy_ids,
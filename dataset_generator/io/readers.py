@@ -0,0 +1,206 @@
+﻿from __future__ import annotations
+
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+READ_CHUNK_CHARS = 1024 * 1024
+BLOCK_SEARCH_CHARS = 4 * READ_CHUNK_CHARS
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",:]}"
+
+
+class _Scanner:
+    """Buffered cursor over a JSON text file that decodes one value at a time."""
+
+    def __init__(self, path: Path, chunk_chars: int) -> None:
+        self._file = path.open("r", encoding="utf-8")
+        self._chunk_chars = chunk_chars
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._file.read(self._chunk_chars)
+        if not chunk:
+            self._eof = True
+            return False
+        if self._pos > len(self._buf) // 2:
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+        self._buf += chunk
+        return True
+
+    def skip(self) -> str:
+        """Skip whitespace and return it."""
+        skipped = ""
+        while True:
+            start = self._pos
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            skipped += self._buf[start : self._pos]
+            if self._pos < len(self._buf) or not self._fill():
+                return skipped
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ("" at end of file)."""
+        self.skip()
+        return self._buf[self._pos : self._pos + 1]
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}", self._buf, self._pos)
+        self._pos += 1
+
+    def end(self) -> None:
+        if self.peek():
+            raise json.JSONDecodeError("Extra data", self._buf, self._pos)
+
+    def block(self, separator: str) -> tuple[str, int] | None:
+        """Cut off about ``chunk_chars`` of array items ending before a ``separator``.
+
+        ``separator`` is a comma, a line break and the indentation the items start
+        at; deeper lines carry more of its last character. The cut is taken on
+        trust, as is the item count (separators not followed by that character).
+        Returns None when no separator turns up nearby.
+        """
+        self.peek()
+        target = self._chunk_chars
+        search = target
+        while True:
+            cut = self._buf.find(separator, self._pos + search)
+            after = cut + len(separator)
+            if cut != -1 and after < len(self._buf):
+                if self._buf[after] not in _WHITESPACE:
+                    break
+                search = cut + 1 - self._pos
+                continue
+            if cut == -1:
+                search = max(target, len(self._buf) - self._pos - len(separator))
+            # Give up rather than buffer the rest of an unexpectedly laid out file.
+            if search > target + BLOCK_SEARCH_CHARS or not self._fill():
+                return None
+        text = self._buf[self._pos : cut]
+        count = text.count(separator) - text.count(separator + separator[-1]) + 1
+        self._pos = cut + 1
+        return text, count
+
+    def value(self, raw: bool = False) -> Any:
+        """Decode the next value; with ``raw`` return its JSON text instead."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number cut by the buffer edge ("12" of "123", "2" of "2.5") still
+            # decodes, so only trust a value that is followed by a delimiter or EOF.
+            if (end < len(self._buf) and self._buf[end] in _DELIMITERS) or not self._fill():
+                start, self._pos = self._pos, end
+                return self._buf[start:end] if raw else value
+
+
+class JsonArrayStream:
+    """Iterate the items of ``document[key]`` without loading the whole JSON file.
+
+    The file must hold a top-level object; other members are decoded normally.
+    Once iteration finishes, :attr:`document` holds the top-level value with the
+    streamed array replaced by ``[]``. Anything that is not an object with an
+    array under ``key`` is loaded as a whole into :attr:`document` and yields
+    no items.
+
+    With ``raw=True`` the items come as ``(text, count)`` blocks: the JSON text of
+    ``count`` consecutive items, comma-separated. Blocks of a pretty-printed array
+    are cut by layout alone, without decoding, so their boundaries and counts hold
+    only for layouts like ``json.dumps(indent=...)``; whoever decodes a block
+    must check that ``"[" + text + "]"`` holds exactly ``count`` items.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        key: str,
+        chunk_chars: int = READ_CHUNK_CHARS,
+        raw: bool = False,
+    ) -> None:
+        self.path = Path(path)
+        self.key = key
+        self.chunk_chars = chunk_chars
+        self.raw = raw
+        self.document: Any = None
+
+    def __iter__(self) -> Iterator[Any]:
+        scanner = _Scanner(self.path, self.chunk_chars)
+        try:
+            if scanner.peek() != "{":
+                scanner.close()
+                with self.path.open("r", encoding="utf-8") as f:
+                    self.document = json.load(f)
+                return
+            scanner.expect("{")
+            document: dict[str, Any] = {}
+            if scanner.peek() == "}":
+                scanner.expect("}")
+            else:
+                while True:
+                    if scanner.peek() != '"':
+                        scanner.expect('"')
+                    name = scanner.value()
+                    scanner.expect(":")
+                    if name == self.key and scanner.peek() == "[":
+                        scanner.expect("[")
+                        document[name] = []
+                        leading = scanner.skip()
+                        if scanner.peek() == "]":
+                            scanner.expect("]")
+                        else:
+                            if self.raw:
+                                yield from self._blocks(scanner, leading)
+                            while True:
+                                yield (scanner.value(raw=True), 1) if self.raw else scanner.value()
+                                if scanner.peek() == "]":
+                                    scanner.expect("]")
+                                    break
+                                scanner.expect(",")
+                    else:
+                        document[name] = scanner.value()
+                    if scanner.peek() == "}":
+                        scanner.expect("}")
+                        break
+                    scanner.expect(",")
+            scanner.end()
+            self.document = document
+        finally:
+            scanner.close()
+
+    @staticmethod
+    def _blocks(scanner: _Scanner, leading: str) -> Iterator[tuple[str, int]]:
+        # Pretty-printed arrays start every item on a new line at the indentation
+        # of the first one. JSON strings cannot hold a raw line break, so finding
+        # the next such line is a plain text search; the last items are cut exactly.
+        indent = leading.rpartition("\n")[2]
+        if "\n" not in leading or not indent:
+            return
+        separator = ",\n" + indent
+        while (block := scanner.block(separator)) is not None:
+            yield block
+
+
+def iter_jsonl(path: str | Path, raw: bool = False) -> Iterator[Any]:
+    """Yield one decoded value per non-empty line of a JSON Lines file.
+
+    With ``raw=True`` each line comes as a ``(text, 1)`` block, as in :class:`JsonArrayStream`.
+    """
+    with Path(path).open("r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield (line, 1) if raw else json.loads(line)
@@ -1,10 +1,21 @@
 ﻿from __future__ import annotations
 
 import json
+from collections.abc import Iterable
 from pathlib import Path
 from typing import Any
 
-from dataset_generator.core.models import DatasetExample, Policy, RunManifest, TestCase, UseCase
+from dataset_generator.core.models import (
+    DatasetExample,
+    Policy,
+    RunManifest,
+    ShardManifest,
+    TestCase,
+    UseCase,
+)
+from dataset_generator.trace import traced
+
+JSONL_BUFFER_BYTES = 1024 * 1024
 
 
 def ensure_dir(path: str | Path) -> Path:
@@ -21,6 +32,7 @@ def write_json(path: str | Path, data_dict: Any) -> None:
         f.write("\n")
 
 
+@traced("io")
 def write_use_cases(out_dir: str | Path, items: list[UseCase]) -> Path:
     target_dir = ensure_dir(out_dir)
     target = target_dir / "use_cases.json"
@@ -28,6 +40,7 @@ def write_use_cases(out_dir: str | Path, items: list[UseCase]) -> Path:
     return target
 
 
+@traced("io")
 def write_policies(out_dir: str | Path, items: list[Policy]) -> Path:
     target_dir = ensure_dir(out_dir)
     target = target_dir / "policies.json"
@@ -35,6 +48,7 @@ def write_policies(out_dir: str | Path, items: list[Policy]) -> Path:
     return target
 
 
+@traced("io")
 def write_test_cases(out_dir: str | Path, items: list[TestCase]) -> Path:
     target_dir = ensure_dir(out_dir)
     target = target_dir / "test_cases.json"
@@ -42,6 +56,7 @@ def write_test_cases(out_dir: str | Path, items: list[TestCase]) -> Path:
     return target
 
 
+@traced("io")
 def write_dataset(out_dir: str | Path, items: list[DatasetExample]) -> Path:
     target_dir = ensure_dir(out_dir)
     target = target_dir / "dataset.json"
@@ -49,8 +64,72 @@ def write_dataset(out_dir: str | Path, items: list[DatasetExample]) -> Path:
     return target
 
 
+@traced("io")
+def write_dataset_jsonl(
+    out_dir: str | Path, items: Iterable[DatasetExample], buffer_bytes: int = JSONL_BUFFER_BYTES
+) -> Path:
+    """Write examples to ``dataset.jsonl`` one line at a time as they are produced."""
+    return write_dataset_jsonl_items(out_dir, (item.model_dump() for item in items), buffer_bytes)
+
+
+@traced("io")
+def write_dataset_jsonl_items(
+    out_dir: str | Path, items: Iterable[dict[str, Any]], buffer_bytes: int = JSONL_BUFFER_BYTES
+) -> Path:
+    """Write decoded examples to ``dataset.jsonl``, one line each."""
+    target_dir = ensure_dir(out_dir)
+    target = target_dir / "dataset.jsonl"
+    with target.open("w", encoding="utf-8", newline="\n", buffering=buffer_bytes) as f:
+        for data in items:
+            f.write(json.dumps(data, ensure_ascii=False, sort_keys=True))
+            f.write("\n")
+    return target
+
+
+@traced("io")
+def write_dataset_items(
+    out_dir: str | Path, items: Iterable[dict[str, Any]], buffer_bytes: int = JSONL_BUFFER_BYTES
+) -> Path:
+    """Write decoded examples to ``dataset.json`` one at a time.
+
+    The output is byte-for-byte what :func:`write_dataset` produces for the same examples.
+    """
+    target_dir = ensure_dir(out_dir)
+    target = target_dir / "dataset.json"
+    with target.open("w", encoding="utf-8", newline="\n", buffering=buffer_bytes) as f:
+        f.write('{\n  "examples": [')
+        first = True
+        for data in items:
+            item = json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write("\n    " if first else ",\n    ")
+            # json.dumps escapes newlines inside strings, so every "\n" here is layout.
+            f.write(item.replace("\n", "\n    "))
+            first = False
+        f.write("]\n}\n" if first else "\n  ]\n}\n")
+    return target
+
+
+@traced("io")
+def write_dataset_from_jsonl(
+    out_dir: str | Path, jsonl_path: str | Path, buffer_bytes: int = JSONL_BUFFER_BYTES
+) -> Path:
+    """Convert ``dataset.jsonl`` into ``dataset.json`` without loading it whole."""
+    with Path(jsonl_path).open("r", encoding="utf-8") as src:
+        items = (json.loads(line) for line in src if line.strip())
+        return write_dataset_items(out_dir, items, buffer_bytes)
+
+
+@traced("io")
 def write_run_manifest(out_dir: str | Path, item: RunManifest) -> Path:
     target_dir = ensure_dir(out_dir)
     target = target_dir / "run_manifest.json"
     write_json(target, item.model_dump())
     return target
+
+
+@traced("io")
+def write_shard_manifest(out_dir: str | Path, item: ShardManifest) -> Path:
+    target_dir = ensure_dir(out_dir)
+    target = target_dir / "shard_manifest.json"
+    write_json(target, item.model_dump())
+    return target
@@ -1,5 +1,6 @@
 ﻿from __future__ import annotations
 
+import asyncio
 from typing import Any, Protocol
 
 
@@ -12,3 +13,47 @@ class LLMClient(Protocol):
         json_mode: bool,
     ) -> str | dict:
         ...
+
+
+class AsyncLLMClient(Protocol):
+    async def achat(
+        self,
+        messages: list[dict[str, Any]],
+        model: str,
+        temperature: float,
+        json_mode: bool,
+    ) -> str | dict:
+        ...
+
+
+async def run_achat(
+    client: Any,
+    messages: list[dict[str, Any]],
+    model: str,
+    temperature: float,
+    json_mode: bool,
+) -> str | dict:
+    achat = getattr(client, "achat", None)
+    if achat is not None:
+        return await achat(
+            messages=messages, model=model, temperature=temperature, json_mode=json_mode
+        )
+    return await asyncio.to_thread(
+        client.chat,
+        messages=messages,
+        model=model,
+        temperature=temperature,
+        json_mode=json_mode,
+    )
+
+
+def close_llm_client(client: object) -> None:
+    close = getattr(client, "close", None)
+    if callable(close):
+        close()
+
+
+async def aclose_llm_client(client: object) -> None:
+    aclose = getattr(client, "aclose", None)
+    if callable(aclose):
+        await aclose()
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any
+
+from dataset_generator.llm.base import aclose_llm_client, close_llm_client, run_achat
+
+DEFAULT_MAX_ENTRIES = 100_000
+
+
+def default_cache_path() -> Path:
+    base = os.getenv("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "dataset_generator" / "llm_cache.sqlite3"
+
+
+def cache_key(
+    messages: list[dict[str, Any]],
+    model: str | None,
+    temperature: float,
+    json_mode: bool,
+) -> str:
+    payload = json.dumps(
+        {
+            "messages": messages,
+            "model": model,
+            "temperature": temperature,
+            "json_mode": json_mode,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CachedLLMClient:
+    """Content-addressed SQLite cache in front of any LLM client.
+
+    Entries are evicted least-recently-used first once ``max_entries`` is exceeded.
+    Failed calls are never cached.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        path: str | Path | None = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.client = client
+        self.model = getattr(client, "model", None)
+        self.path = Path(path) if path is not None else default_cache_path()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " last_used INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)"
+        )
+
+    # The recency clock and the entry count live in the database, not in this
+    # object, so processes and runs sharing the file keep a consistent LRU order.
+    _NEXT_TICK = "(SELECT COALESCE(MAX(last_used), 0) + 1 FROM responses)"
+
+    def _get(self, key: str) -> tuple[bool, str | dict | None]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+            self._conn.execute(
+                f"UPDATE responses SET last_used = {self._NEXT_TICK} WHERE key = ?", (key,)
+            )
+            self.hits += 1
+        return True, json.loads(row[0])
+
+    def _put(self, key: str, response: str | dict) -> None:
+        payload = json.dumps(response, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO responses (key, response, last_used)"
+                    f" VALUES (?, ?, {self._NEXT_TICK})",
+                    (key, payload),
+                )
+                (size,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+                overflow = size - self.max_entries
+                if overflow > 0:
+                    self._conn.execute(
+                        "DELETE FROM responses WHERE key IN"
+                        " (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                        (overflow,),
+                    )
+                    self.evictions += overflow
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _entries(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def chat(
+        self,
+        messages: list[dict[str, Any]],
+        model: str,
+        temperature: float,
+        json_mode: bool,
+    ) -> str | dict:
+        key = cache_key(messages, model, temperature, json_mode)
+        found, cached = self._get(key)
+        if found:
+            return cached
+        response = self.client.chat(
+            messages=messages, model=model, temperature=temperature, json_mode=json_mode
+        )
+        self._put(key, response)
+        return response
+
+    async def achat(
+        self,
+        messages: list[dict[str, Any]],
+        model: str,
+        temperature: float,
+        json_mode: bool,
+    ) -> str | dict:
+        key = cache_key(messages, model, temperature, json_mode)
+        found, cached = self._get(key)
+        if found:
+            return cached
+        response = await run_achat(
+            self.client,
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            json_mode=json_mode,
+        )
+        self._put(key, response)
+        return response
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": self._entries(),
+            "max_entries": self.max_entries,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+        close_llm_client(self.client)
+
+    async def aclose(self) -> None:
+        await aclose_llm_client(self.client)
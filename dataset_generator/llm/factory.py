@@ -15,6 +15,9 @@ class NoneLLMClient(LLMClient):
     ) -> str | dict:
         raise RuntimeError("LLM provider is none")
 
+    def close(self) -> None:
+        return None
+
 
 def get_llm_client(
     provider: str,
@@ -22,6 +25,9 @@ def get_llm_client(
     model: str | None = None,
     base_url: str | None = None,
     temperature: float = 0.2,
+    timeout: float | None = None,
+    pool_size: int | None = None,
+    keepalive_expiry: float | None = None,
 ) -> LLMClient:
     if provider == "none":
         return NoneLLMClient()
@@ -32,5 +38,14 @@ def get_llm_client(
         base_url_final = base_url or os.getenv(
             "OLLAMA_BASE_URL", "http://localhost:11434/v1/"
         )
-        return OllamaClient(base_url=base_url_final, model=model_final)
+        pool_options = {
+            key: value
+            for key, value in (
+                ("timeout", timeout),
+                ("pool_size", pool_size),
+                ("keepalive_expiry", keepalive_expiry),
+            )
+            if value is not None
+        }
+        return OllamaClient(base_url=base_url_final, model=model_final, **pool_options)
     raise ValueError("Unsupported LLM provider")
@@ -1,16 +1,212 @@
 ﻿from __future__ import annotations
 
+import asyncio
 import json
 import os
+import threading
 from typing import Any
 
 from dataset_generator.llm.base import LLMClient
 
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_POOL_SIZE = 8
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+
+
+def _build_http_client(
+    openai_module: Any,
+    *,
+    asynchronous: bool = False,
+    timeout: float,
+    connect_timeout: float,
+    pool_size: int,
+    keepalive_expiry: float,
+) -> Any | None:
+    # Build the pooled transport through the SDK's own httpx flavour, so the
+    # limits/timeout objects always match the client class it expects.
+    client_name = "DefaultAsyncHttpxClient" if asynchronous else "DefaultHttpxClient"
+    client_cls = getattr(openai_module, client_name, None)
+    default_limits = getattr(openai_module, "DEFAULT_CONNECTION_LIMITS", None)
+    timeout_cls = getattr(openai_module, "Timeout", None)
+    if client_cls is None or default_limits is None or timeout_cls is None:
+        return None
+    limits = type(default_limits)(
+        max_connections=pool_size,
+        max_keepalive_connections=pool_size,
+        keepalive_expiry=keepalive_expiry,
+    )
+    return client_cls(limits=limits, timeout=timeout_cls(timeout, connect=connect_timeout))
+
+
+def _response_content(response: Any, json_mode: bool) -> str | dict:
+    content = response.choices[0].message.content
+    if json_mode:
+        if isinstance(content, str):
+            try:
+                return json.loads(content)
+            except json.JSONDecodeError as exc:
+                raise ValueError("Invalid JSON response from Ollama") from exc
+        if isinstance(content, dict):
+            return content
+    return content
+
+
+def _close_on_loop(client: Any, loop: asyncio.AbstractEventLoop) -> None:
+    """Close an async SDK client on the event loop its connection pool belongs to.
+
+    A pool whose loop has already closed cannot be closed any more; callers that
+    drive :meth:`OllamaClient.achat` under ``asyncio.run`` close it with
+    :meth:`OllamaClient.aclose` before the loop ends, as the pipeline does.
+    """
+    close = getattr(client, "close", None)
+    if not callable(close) or loop.is_closed():
+        return
+    if not loop.is_running():
+        loop.run_until_complete(close())
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        loop.create_task(close())
+    else:
+        asyncio.run_coroutine_threadsafe(close(), loop).result()
+
 
 class OllamaClient(LLMClient):
-    def __init__(self, base_url: str | None = None, model: str | None = None) -> None:
+    def __init__(
+        self,
+        base_url: str | None = None,
+        model: str | None = None,
+        *,
+        timeout: float = DEFAULT_TIMEOUT,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+    ) -> None:
+        if pool_size < 1:
+            raise ValueError("pool_size must be >= 1")
         self.base_url = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/v1/")
         self.model = model or os.getenv("OLLAMA_MODEL", "llama3.2")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.pool_size = pool_size
+        self.keepalive_expiry = keepalive_expiry
+        self._client: Any | None = None
+        self._async_clients: dict[asyncio.AbstractEventLoop, Any] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "OllamaClient":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _get_client(self) -> Any:
+        with self._lock:
+            if self._client is not None:
+                return self._client
+            try:
+                import openai
+                from openai import OpenAI
+            except Exception as exc:  # pragma: no cover - depends on optional dep
+                raise RuntimeError(
+                    "openai package is missing; reinstall dependencies (pip install -e .)"
+                ) from exc
+
+            try:
+                http_client = _build_http_client(
+                    openai,
+                    timeout=self.timeout,
+                    connect_timeout=self.connect_timeout,
+                    pool_size=self.pool_size,
+                    keepalive_expiry=self.keepalive_expiry,
+                )
+                # Retries are owned by ResilientLLMClient, not by the SDK.
+                if http_client is None:
+                    self._client = OpenAI(
+                        base_url=self.base_url,
+                        api_key="ollama",
+                        timeout=self.timeout,
+                        max_retries=0,
+                    )
+                else:
+                    self._client = OpenAI(
+                        base_url=self.base_url,
+                        api_key="ollama",
+                        http_client=http_client,
+                        max_retries=0,
+                    )
+            except Exception as exc:
+                raise RuntimeError(f"Ollama server unavailable at {self.base_url}") from exc
+            return self._client
+
+    def _get_async_client(self) -> Any:
+        # httpx async pools are bound to the event loop that opened them, so
+        # there is one client per loop; clients of closed loops are dropped.
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._async_clients = {
+                other: client
+                for other, client in self._async_clients.items()
+                if not other.is_closed()
+            }
+            if loop in self._async_clients:
+                return self._async_clients[loop]
+            try:
+                import openai
+                from openai import AsyncOpenAI
+            except Exception as exc:  # pragma: no cover - depends on optional dep
+                raise RuntimeError(
+                    "openai package is missing; reinstall dependencies (pip install -e .)"
+                ) from exc
+
+            try:
+                http_client = _build_http_client(
+                    openai,
+                    asynchronous=True,
+                    timeout=self.timeout,
+                    connect_timeout=self.connect_timeout,
+                    pool_size=self.pool_size,
+                    keepalive_expiry=self.keepalive_expiry,
+                )
+                if http_client is None:
+                    async_client = AsyncOpenAI(
+                        base_url=self.base_url,
+                        api_key="ollama",
+                        timeout=self.timeout,
+                        max_retries=0,
+                    )
+                else:
+                    async_client = AsyncOpenAI(
+                        base_url=self.base_url,
+                        api_key="ollama",
+                        http_client=http_client,
+                        max_retries=0,
+                    )
+            except Exception as exc:
+                raise RuntimeError(f"Ollama server unavailable at {self.base_url}") from exc
+            self._async_clients[loop] = async_client
+            return async_client
+
+    def close(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+            async_clients, self._async_clients = self._async_clients, {}
+        close = getattr(client, "close", None)
+        if callable(close):
+            close()
+        for loop, async_client in async_clients.items():
+            _close_on_loop(async_client, loop)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        close = getattr(client, "close", None)
+        if callable(close):
+            await close()
 
     def chat(
         self,
@@ -19,16 +215,29 @@ class OllamaClient(LLMClient):
         temperature: float = 0.2,
         json_mode: bool = False,
     ) -> str | dict:
+        client = self._get_client()
         try:
-            from openai import OpenAI
-        except Exception as exc:  # pragma: no cover - depends on optional dep
-            raise RuntimeError(
-                "openai package is missing; reinstall dependencies (pip install -e .)"
-            ) from exc
+            response = client.chat.completions.create(
+                model=model or self.model,
+                messages=messages,
+                temperature=temperature,
+                response_format={"type": "json_object"} if json_mode else None,
+            )
+        except Exception as exc:
+            raise RuntimeError(f"Ollama server unavailable at {self.base_url}") from exc
+
+        return _response_content(response, json_mode)
 
+    async def achat(
+        self,
+        messages: list[dict[str, Any]],
+        model: str | None = None,
+        temperature: float = 0.2,
+        json_mode: bool = False,
+    ) -> str | dict:
+        client = self._get_async_client()
         try:
-            client = OpenAI(base_url=self.base_url, api_key="ollama")
-            response = client.chat.completions.create(
+            response = await client.chat.completions.create(
                 model=model or self.model,
                 messages=messages,
                 temperature=temperature,
@@ -37,13 +246,5 @@ class OllamaClient(LLMClient):
         except Exception as exc:
             raise RuntimeError(f"Ollama server unavailable at {self.base_url}") from exc
 
-        content = response.choices[0].message.content
-        if json_mode:
-            if isinstance(content, str):
-                try:
-                    return json.loads(content)
-                except json.JSONDecodeError as exc:
-                    raise ValueError("Invalid JSON response from Ollama") from exc
-            if isinstance(content, dict):
-                return content
-        return content
+        return _response_content(response, json_mode)
+
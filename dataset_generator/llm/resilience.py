@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from array import array
+from typing import Any
+
+from dataset_generator.llm.base import aclose_llm_client, close_llm_client, run_achat
+
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 8.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the backend while the circuit breaker is open."""
+
+
+def _is_transient(exc: Exception) -> bool:
+    # Malformed replies (ValueError) and a missing SDK will not get better on
+    # retry; connection problems and timeouts surface as RuntimeError/OSError.
+    if isinstance(exc, CircuitOpenError) or isinstance(exc.__cause__, ImportError):
+        return False
+    # Clients wrap SDK errors, so an HTTP status is looked up on the cause too:
+    # rate limits and server errors pass, other 4xx (bad model, auth) do not.
+    for error in (exc, exc.__cause__):
+        status = getattr(error, "status_code", None)
+        if isinstance(status, int):
+            return status in (408, 429) or status >= 500
+    return isinstance(exc, (RuntimeError, OSError, TimeoutError))
+
+
+class ResilientLLMClient:
+    """Retries transient LLM failures and short-circuits a dead backend.
+
+    After ``failure_threshold`` consecutive failed calls the breaker opens and
+    every call fails fast with :class:`CircuitOpenError`. Once ``reset_timeout``
+    seconds have passed, one probe call is let through (half-open); success
+    closes the breaker, failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        rng: random.Random | None = None,
+    ) -> None:
+        if max_retries < 0:
+            raise ValueError("max_retries must be >= 0")
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be >= 1")
+        self.client = client
+        self.model = getattr(client, "model", None)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at: float | None = None
+        self._probe_in_flight = False
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.breaker_trips = 0
+        self.short_circuited = 0
+        # Seconds per backend attempt, failed ones included.
+        self.latencies = array("d")
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, min(cap, base * 2**attempt)].
+        ceiling = min(self.backoff_max, self.backoff_base * (2**attempt))
+        with self._lock:
+            return self._rng.uniform(0.0, ceiling)
+
+    def _before_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+            if self._opened_at is None:
+                return
+            if self._clock() - self._opened_at < self.reset_timeout or self._probe_in_flight:
+                self.short_circuited += 1
+                raise CircuitOpenError("LLM circuit breaker is open")
+            self._probe_in_flight = True
+
+    def _on_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def _on_failure(self, transient: bool) -> None:
+        with self._lock:
+            self.failures += 1
+            if not transient:
+                # The backend answered, so it is reachable: do not count this
+                # towards opening the breaker.
+                self._consecutive_failures = 0
+                self._opened_at = None
+                self._probe_in_flight = False
+                return
+            self._consecutive_failures += 1
+            probing = self._probe_in_flight
+            self._probe_in_flight = False
+            if probing or (
+                self._opened_at is None
+                and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._opened_at = self._clock()
+                self.breaker_trips += 1
+
+    def _count_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def chat(
+        self,
+        messages: list[dict[str, Any]],
+        model: str,
+        temperature: float,
+        json_mode: bool,
+    ) -> str | dict:
+        self._before_call()
+        attempt = 0
+        while True:
+            started = self._clock()
+            try:
+                response = self.client.chat(
+                    messages=messages, model=model, temperature=temperature, json_mode=json_mode
+                )
+            except Exception as exc:
+                self.latencies.append(self._clock() - started)
+                transient = _is_transient(exc)
+                if transient and attempt < self.max_retries:
+                    self._count_retry()
+                    self._sleep(self._backoff(attempt))
+                    attempt += 1
+                    continue
+                self._on_failure(transient)
+                raise
+            self.latencies.append(self._clock() - started)
+            self._on_success()
+            return response
+
+    async def achat(
+        self,
+        messages: list[dict[str, Any]],
+        model: str,
+        temperature: float,
+        json_mode: bool,
+    ) -> str | dict:
+        self._before_call()
+        attempt = 0
+        while True:
+            started = self._clock()
+            try:
+                response = await run_achat(
+                    self.client,
+                    messages=messages,
+                    model=model,
+                    temperature=temperature,
+                    json_mode=json_mode,
+                )
+            except Exception as exc:
+                self.latencies.append(self._clock() - started)
+                transient = _is_transient(exc)
+                if transient and attempt < self.max_retries:
+                    self._count_retry()
+                    await asyncio.sleep(self._backoff(attempt))
+                    attempt += 1
+                    continue
+                self._on_failure(transient)
+                raise
+            self.latencies.append(self._clock() - started)
+            self._on_success()
+            return response
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "breaker_trips": self.breaker_trips,
+            "short_circuited": self.short_circuited,
+        }
+
+    def close(self) -> None:
+        close_llm_client(self.client)
+
+    async def aclose(self) -> None:
+        await aclose_llm_client(self.client)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from typing import Any
+
+from dataset_generator.llm.base import aclose_llm_client, close_llm_client, run_achat
+from dataset_generator.trace import lane_span
+
+
+def _prompt_chars(messages: list[dict[str, Any]]) -> int:
+    return sum(len(str(message.get("content", ""))) for message in messages)
+
+
+def _response_chars(response: str | dict) -> int:
+    return len(response) if isinstance(response, str) else len(str(response))
+
+
+class TracingLLMClient:
+    """Records every call to the wrapped client as a span of the active trace.
+
+    Each in-flight call gets its own lane, so concurrent requests show up side by
+    side. Spans carry the prompt and response sizes and the call outcome.
+    """
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+        self.model = getattr(client, "model", None)
+
+    def chat(
+        self,
+        messages: list[dict[str, Any]],
+        model: str,
+        temperature: float,
+        json_mode: bool,
+    ) -> str | dict:
+        with lane_span(
+            "chat", "llm", model=model, messages=len(messages), prompt_chars=_prompt_chars(messages)
+        ) as args:
+            response = self.client.chat(
+                messages=messages, model=model, temperature=temperature, json_mode=json_mode
+            )
+            args["response_chars"] = _response_chars(response)
+            return response
+
+    async def achat(
+        self,
+        messages: list[dict[str, Any]],
+        model: str,
+        temperature: float,
+        json_mode: bool,
+    ) -> str | dict:
+        with lane_span(
+            "achat", "llm", model=model, messages=len(messages), prompt_chars=_prompt_chars(messages)
+        ) as args:
+            response = await run_achat(
+                self.client,
+                messages=messages,
+                model=model,
+                temperature=temperature,
+                json_mode=json_mode,
+            )
+            args["response_chars"] = _response_chars(response)
+            return response
+
+    def close(self) -> None:
+        close_llm_client(self.client)
+
+    async def aclose(self) -> None:
+        await aclose_llm_client(self.client)
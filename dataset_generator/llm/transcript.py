@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Literal
+
+from dataset_generator.llm.base import aclose_llm_client, close_llm_client, run_achat
+from dataset_generator.llm.cache import cache_key
+
+TranscriptMode = Literal["record", "replay"]
+
+
+class TranscriptMissError(LookupError):
+    """A replayed run made a request that the transcript does not hold."""
+
+
+class ReplayedLLMError(RuntimeError):
+    """A call that failed in the recorded run fails the same way on replay."""
+
+
+class TranscriptLLMClient:
+    """Records LLM calls to a transcript file, or serves a run from one.
+
+    In ``record`` mode every call to the wrapped client is appended to the
+    transcript as one JSON line: the request hash (see
+    :func:`~dataset_generator.llm.cache.cache_key`), the model and either the
+    response or the error. In ``replay`` mode no client is needed: calls are
+    answered from the transcript by request hash, in recorded order when a
+    request repeats, and recorded errors are raised again as
+    :class:`ReplayedLLMError`. A request missing from the transcript raises
+    :class:`TranscriptMissError`; :meth:`check` re-raises it for callers that
+    swallowed it into a fallback.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        path: str | Path,
+        mode: TranscriptMode,
+        model: str | None = None,
+    ) -> None:
+        if mode not in ("record", "replay"):
+            raise ValueError("mode must be 'record' or 'replay'")
+        if mode == "record" and client is None:
+            raise ValueError("record mode needs a client to record")
+        self.client = client
+        self.path = Path(path)
+        self.mode = mode
+        self.recorded = 0
+        self.hits = 0
+        self.misses: list[str] = []
+        self._lock = threading.Lock()
+        self._entries: dict[str, deque[dict[str, Any]]] = {}
+        self._file = None
+        if mode == "record":
+            self.model = getattr(client, "model", None)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a", encoding="utf-8", newline="\n")
+        else:
+            self.model = model or self._load()
+
+    def _load(self) -> str | None:
+        if not self.path.exists():
+            raise FileNotFoundError(f"LLM transcript not found: {self.path}")
+        model = None
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self._entries.setdefault(entry["key"], deque()).append(entry)
+                model = model or entry.get("model")
+        return model
+
+    def _append(self, key: str, model: str | None, outcome: dict[str, Any]) -> None:
+        line = json.dumps(
+            {"key": key, "model": model, **outcome}, ensure_ascii=False, separators=(",", ":")
+        )
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.recorded += 1
+
+    def _replay(self, key: str) -> str | dict:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.misses.append(key)
+                raise TranscriptMissError(f"LLM request {key} is not in transcript {self.path}")
+            # Repeated requests get the recorded outcomes in order; the last one sticks.
+            entry = entries.popleft() if len(entries) > 1 else entries[0]
+            self.hits += 1
+        if "error" in entry:
+            raise ReplayedLLMError(entry["error"])
+        return entry["response"]
+
+    def chat(
+        self,
+        messages: list[dict[str, Any]],
+        model: str,
+        temperature: float,
+        json_mode: bool,
+    ) -> str | dict:
+        key = cache_key(messages, model, temperature, json_mode)
+        if self.mode == "replay":
+            return self._replay(key)
+        try:
+            response = self.client.chat(
+                messages=messages, model=model, temperature=temperature, json_mode=json_mode
+            )
+        except Exception as exc:
+            self._append(key, model, {"error": f"{type(exc).__name__}: {exc}"})
+            raise
+        self._append(key, model, {"response": response})
+        return response
+
+    async def achat(
+        self,
+        messages: list[dict[str, Any]],
+        model: str,
+        temperature: float,
+        json_mode: bool,
+    ) -> str | dict:
+        key = cache_key(messages, model, temperature, json_mode)
+        if self.mode == "replay":
+            return self._replay(key)
+        try:
+            response = await run_achat(
+                self.client,
+                messages=messages,
+                model=model,
+                temperature=temperature,
+                json_mode=json_mode,
+            )
+        except Exception as exc:
+            self._append(key, model, {"error": f"{type(exc).__name__}: {exc}"})
+            raise
+        self._append(key, model, {"response": response})
+        return response
+
+    def check(self) -> None:
+        """Raise :class:`TranscriptMissError` if any replayed request was missing."""
+        if self.misses:
+            raise TranscriptMissError(
+                f"{len(self.misses)} LLM request(s) are not in transcript {self.path}"
+                f" (first: {self.misses[0]})"
+            )
+
+    def stats(self) -> dict[str, Any]:
+        stats: dict[str, Any] = {"path": str(self.path), "mode": self.mode}
+        if self.mode == "record":
+            stats["recorded"] = self.recorded
+        else:
+            stats.update(hits=self.hits, misses=len(self.misses))
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if self.client is not None:
+            close_llm_client(self.client)
+
+    async def aclose(self) -> None:
+        if self.client is not None:
+            await aclose_llm_client(self.client)
@@ -0,0 +1,143 @@
+﻿"""Merging the outputs of ``generate --shard i/N`` runs into one output directory."""
+
+from __future__ import annotations
+
+import shutil
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from dataset_generator.core.models import RunManifest, ShardManifest
+from dataset_generator.io.readers import JsonArrayStream, iter_jsonl
+from dataset_generator.io.writers import (
+    ensure_dir,
+    write_dataset_from_jsonl,
+    write_dataset_items,
+    write_dataset_jsonl_items,
+    write_run_manifest,
+)
+
+SHARD_MANIFEST = "shard_manifest.json"
+SHARED_FILES = ("use_cases.json", "policies.json", "test_cases.json")
+
+
+class MergeError(ValueError):
+    """Shard outputs that do not form one complete run."""
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """Parse ``"i/N"`` (1-based) into ``(i, N)``."""
+    index, sep, count = value.partition("/")
+    try:
+        shard = (int(index), int(count))
+    except ValueError:
+        shard = (0, 0)
+    if not sep or not 1 <= shard[0] <= shard[1]:
+        raise ValueError(f"Invalid shard {value!r}: expected i/N with 1 <= i <= N")
+    return shard
+
+
+def _load_shards(shard_dirs: Iterable[str | Path]) -> list[tuple[Path, ShardManifest]]:
+    shards: list[tuple[Path, ShardManifest]] = []
+    for shard_dir in map(Path, shard_dirs):
+        path = shard_dir / SHARD_MANIFEST
+        if not path.exists():
+            raise MergeError(f"{shard_dir}: {SHARD_MANIFEST} not found")
+        manifest = ShardManifest.model_validate_json(path.read_text(encoding="utf-8"))
+        shards.append((shard_dir, manifest))
+    if not shards:
+        raise MergeError("No shards to merge")
+    shards.sort(key=lambda shard: shard[1].shard_index)
+
+    first_dir, first = shards[0]
+    indices = [manifest.shard_index for _, manifest in shards]
+    if indices != list(range(1, first.shard_count + 1)) or any(
+        manifest.shard_count != first.shard_count for _, manifest in shards
+    ):
+        raise MergeError(f"Expected shards 1..{first.shard_count}, got {indices}")
+    for shard_dir, manifest in shards[1:]:
+        for field in ("seed", "generator_version", "settings"):
+            if getattr(manifest, field) != getattr(first, field):
+                raise MergeError(f"{shard_dir}: {field} differs from shard 1")
+        # Use cases, policies and test cases are generated in full by every shard.
+        for name in SHARED_FILES:
+            if (shard_dir / name).read_bytes() != (first_dir / name).read_bytes():
+                raise MergeError(f"{shard_dir}: {name} differs from shard 1")
+    return shards
+
+
+def _shard_examples(shard_dir: Path) -> Iterator[Any]:
+    jsonl_path = shard_dir / "dataset.jsonl"
+    if jsonl_path.exists():
+        return iter_jsonl(jsonl_path)
+    return iter(JsonArrayStream(shard_dir / "dataset.json", "examples"))
+
+
+def _checked_examples(shards: list[tuple[Path, ShardManifest]]) -> Iterator[dict[str, Any]]:
+    # Ids are planned over the whole run, but shards come from separate processes
+    # (and hosts), so uniqueness is checked again here.
+    seen_ids: set[str] = set()
+    for shard_dir, manifest in shards:
+        test_case_ids = set(manifest.test_case_ids)
+        count = 0
+        for example in _shard_examples(shard_dir):
+            if not isinstance(example, dict) or not isinstance(example.get("id"), str):
+                raise MergeError(f"{shard_dir}: example without an id")
+            if example["id"] in seen_ids:
+                raise MergeError(f"{shard_dir}: duplicate example id across shards: {example['id']}")
+            if example.get("test_case_id") not in test_case_ids:
+                raise MergeError(
+                    f"{shard_dir}: example {example['id']} is outside the shard's test cases"
+                )
+            seen_ids.add(example["id"])
+            count += 1
+            yield example
+        if count != manifest.n_examples:
+            raise MergeError(
+                f"{shard_dir}: {count} examples, shard manifest says {manifest.n_examples}"
+            )
+
+
+def merge_shards(shard_dirs: Iterable[str | Path], out_dir: str | Path) -> Path:
+    """Concatenate shard outputs, in shard order, into a regular output directory.
+
+    The result is what the unsharded run writes (``run_manifest.json`` aside).
+    ``dataset.jsonl`` is written too when every shard has one. Examples are
+    streamed, so memory grows only with the set of seen ids.
+    """
+    shards = _load_shards(shard_dirs)
+    target = ensure_dir(out_dir)
+    if any(shard_dir.resolve() == target.resolve() for shard_dir, _ in shards):
+        raise MergeError("The merge output directory must not be one of the shards")
+
+    first_dir, first = shards[0]
+    for name in SHARED_FILES:
+        shutil.copyfile(first_dir / name, target / name)
+    dataset_files = [target / "dataset.json", target / "dataset.jsonl"]
+    for path in dataset_files:
+        path.unlink(missing_ok=True)
+    examples = _checked_examples(shards)
+    try:
+        if all((shard_dir / "dataset.jsonl").exists() for shard_dir, _ in shards):
+            write_dataset_from_jsonl(target, write_dataset_jsonl_items(target, examples))
+        else:
+            write_dataset_items(target, examples)
+    except MergeError:
+        for path in dataset_files:
+            path.unlink(missing_ok=True)
+        raise
+
+    llm_info = {key: first.llm.get(key) for key in ("provider", "model", "temperature")}
+    llm_info["shards"] = [manifest.llm for _, manifest in shards]
+    manifest = RunManifest(
+        seed=first.seed,
+        timestamp=datetime.now(timezone.utc).isoformat(),
+        generator_version=first.generator_version,
+        llm=llm_info,
+        input_path=first.input_path,
+        out_path=str(target),
+        metrics={"shards": [manifest.metrics for _, manifest in shards]},
+    )
+    write_run_manifest(target, manifest)
+    return target
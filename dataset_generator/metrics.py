@@ -0,0 +1,134 @@
+﻿"""Per-stage time and memory of a pipeline run, for the manifest ``metrics`` block."""
+
+from __future__ import annotations
+
+import math
+import os
+import sys
+import time
+import tracemalloc
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+from dataset_generator.trace import span
+
+try:
+    import resource
+except ModuleNotFoundError:  # Windows
+    resource = None
+
+
+def peak_rss_mb() -> float | None:
+    """High-water resident set size of this process so far, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentiles(values: Sequence[float], points: Sequence[int] = (50, 95, 99)) -> dict[str, float]:
+    """Nearest-rank percentiles of ``values``, keyed ``"p50"``, ``"p95"``, ..."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    return {
+        f"p{point}": ordered[max(math.ceil(point / 100 * len(ordered)) - 1, 0)]
+        for point in points
+    }
+
+
+def latency_summary(seconds: Sequence[float]) -> dict[str, Any]:
+    summary: dict[str, Any] = {"count": len(seconds)}
+    if seconds:
+        for key, value in percentiles(seconds).items():
+            summary[key] = round(value * 1000, 1)
+        summary["max"] = round(max(seconds) * 1000, 1)
+    return summary
+
+
+def _children_cpu() -> float:
+    # CPU time of finished child processes (e.g. generation workers).
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+@dataclass
+class _OpenStage:
+    name: str
+    wall: float
+    cpu: float
+    child_wall: float = 0.0
+    child_cpu: float = 0.0
+    traced_peak: int = 0
+
+
+class RunMetrics:
+    """Wall and CPU time plus memory per named stage of one run.
+
+    Stages may nest; a stage's times exclude its nested stages, so the stage
+    times add up to the measured part of the run, and a repeated stage name
+    accumulates. ``peak_rss_mb`` is the process high-water mark when the stage
+    ended; ``tracemalloc_peak_mb`` (only while tracemalloc is tracing, e.g.
+    ``PYTHONTRACEMALLOC=1``) is the peak of traced memory within the stage.
+    CPU time covers this process; worker processes are reported in the total.
+    """
+
+    def __init__(self) -> None:
+        self.stages: dict[str, dict[str, Any]] = {}
+        self._open: list[_OpenStage] = []
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._children_cpu = _children_cpu()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            if self._open:
+                self._open[-1].traced_peak = max(
+                    self._open[-1].traced_peak, tracemalloc.get_traced_memory()[1]
+                )
+            tracemalloc.reset_peak()
+        current = _OpenStage(name, time.perf_counter(), time.process_time())
+        self._open.append(current)
+        try:
+            with span(name, "stage"):
+                yield
+        finally:
+            self._open.pop()
+            wall = time.perf_counter() - current.wall
+            cpu = time.process_time() - current.cpu
+            entry = self.stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0})
+            entry["wall_s"] += wall - current.child_wall
+            entry["cpu_s"] += cpu - current.child_cpu
+            entry["peak_rss_mb"] = peak_rss_mb()
+            if tracing and tracemalloc.is_tracing():
+                traced_peak = max(current.traced_peak, tracemalloc.get_traced_memory()[1])
+                entry["tracemalloc_peak_mb"] = max(
+                    entry.get("tracemalloc_peak_mb", 0.0), round(traced_peak / 2**20, 1)
+                )
+                tracemalloc.reset_peak()
+            if self._open:
+                self._open[-1].child_wall += wall
+                self._open[-1].child_cpu += cpu
+
+    def to_dict(self) -> dict[str, Any]:
+        stages = {
+            name: {
+                key: round(value, 4) if key.endswith("_s") else value
+                for key, value in entry.items()
+            }
+            for name, entry in self.stages.items()
+        }
+        return {
+            "stages": stages,
+            "total": {
+                "wall_s": round(time.perf_counter() - self._wall, 4),
+                "cpu_s": round(time.process_time() - self._cpu, 4),
+                "children_cpu_s": round(_children_cpu() - self._children_cpu, 4),
+                "peak_rss_mb": peak_rss_mb(),
+            },
+        }
@@ -1,35 +1,74 @@
 ﻿from __future__ import annotations
 
-from dataclasses import dataclass
+import hashlib
+from collections.abc import Iterable, Iterator
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Literal
+from typing import Any, Literal
 
 import typer
 
 from dataset_generator import __version__
 from dataset_generator.core.ids import IdFactory
-from dataset_generator.core.markdown import MarkdownDocument
-from dataset_generator.core.models import Evidence, Policy, RunManifest, UseCase
+from dataset_generator.core.markdown import MarkdownDocument, open_markdown
+from dataset_generator.core.models import (
+    Evidence,
+    Policy,
+    RunManifest,
+    ShardManifest,
+    TestCase,
+    UseCase,
+)
 from dataset_generator.core.text_sanitize import sanitize_markdown_text
 from dataset_generator.extract.heuristics import _policy_type_for_text
 from dataset_generator.extract.case_classifier import detect_case
-from dataset_generator.extract.drafts import extract_drafts
+from dataset_generator.extract.drafts import DEFAULT_CHUNK_TOKENS, DraftStats, extract_drafts
 from dataset_generator.extract.drafts_to_models import drafts_to_policies, drafts_to_use_cases
 from dataset_generator.extract.heuristics import extract_policies, extract_use_cases
+from dataset_generator.llm.base import LLMClient, close_llm_client
+from dataset_generator.llm.cache import DEFAULT_MAX_ENTRIES, CachedLLMClient
 from dataset_generator.llm.factory import get_llm_client
-from dataset_generator.generate.dataset import generate_examples
+from dataset_generator.llm.ollama_client import DEFAULT_POOL_SIZE
+from dataset_generator.llm.resilience import (
+    DEFAULT_FAILURE_THRESHOLD,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_RESET_TIMEOUT,
+    ResilientLLMClient,
+)
+from dataset_generator import trace
+from dataset_generator.llm.tracing import TracingLLMClient
+from dataset_generator.llm.transcript import (
+    TranscriptLLMClient,
+    TranscriptMissError,
+    TranscriptMode,
+)
+from dataset_generator.metrics import RunMetrics, latency_summary
+from dataset_generator.stage_cache import StageCache, stage_key
+from dataset_generator.generate.dataset import (
+    ExpectedOutputStats,
+    generated_test_cases,
+    iter_examples,
+    shard_bounds,
+)
 from dataset_generator.generate.test_cases import generate_test_cases
 from dataset_generator.io.writers import (
     write_dataset,
+    write_dataset_from_jsonl,
+    write_dataset_jsonl,
     write_policies,
     write_run_manifest,
+    write_shard_manifest,
     write_test_cases,
     write_use_cases,
 )
 
 CaseType = Literal["support_bot", "operator_quality", "auto"]
 
+STREAM_WINDOW = 512
+_HASH_BLOCK_BYTES = 1 << 20
+
 
 @dataclass(frozen=True)
 class PipelineConfig:
@@ -44,9 +83,41 @@ class PipelineConfig:
     llm_model: str | None
     ollama_base_url: str | None
     llm_temperature: float
+    llm_timeout: float | None = None
+    llm_pool_size: int | None = None
+    llm_keepalive: float | None = None
+    llm_concurrency: int = 1
+    llm_batch_size: int = 1
+    llm_chunk_tokens: int = DEFAULT_CHUNK_TOKENS
+    llm_max_retries: int = DEFAULT_MAX_RETRIES
+    llm_breaker_threshold: int = DEFAULT_FAILURE_THRESHOLD
+    llm_breaker_reset: float = DEFAULT_RESET_TIMEOUT
+    llm_cache: bool = False
+    llm_cache_path: str | None = None
+    llm_cache_max_entries: int = DEFAULT_MAX_ENTRIES
+    stream: bool = False
+    workers: int = 1
+    shard: tuple[int, int] | None = None
+    stage_cache: bool = False
+    stage_cache_dir: str | None = None
+    llm_transcript: str | None = None
+    llm_transcript_mode: TranscriptMode = "record"
 
 
-def _pad_use_cases(doc: MarkdownDocument, items: list[UseCase], target: int) -> list[UseCase]:
+class _Counted(Iterator[Any]):
+    def __init__(self, items: Iterable[Any]) -> None:
+        self._items = iter(items)
+        self.count = 0
+
+    def __next__(self) -> Any:
+        item = next(self._items)
+        self.count += 1
+        return item
+
+
+def _pad_use_cases(
+    doc: MarkdownDocument, items: list[UseCase], target: int, case: str = ""
+) -> list[UseCase]:
     if len(items) >= target:
         return items
 
@@ -75,7 +146,7 @@ def _pad_use_cases(doc: MarkdownDocument, items: list[UseCase], target: int) ->
         padded.append(
             UseCase(
                 id=uc_id,
-                case="",
+                case=case,
                 name=name,
                 description=description,
                 evidence=[
@@ -94,7 +165,9 @@ def _pad_use_cases(doc: MarkdownDocument, items: list[UseCase], target: int) ->
     return padded
 
 
-def _pad_policies(doc: MarkdownDocument, items: list[Policy], target: int) -> list[Policy]:
+def _pad_policies(
+    doc: MarkdownDocument, items: list[Policy], target: int, case: str = ""
+) -> list[Policy]:
     if len(items) >= target:
         return items
 
@@ -122,7 +195,7 @@ def _pad_policies(doc: MarkdownDocument, items: list[Policy], target: int) -> li
         padded.append(
             Policy(
                 id=pol_id,
-                case="",
+                case=case,
                 type=_policy_type_for_text(statement),
                 statement=statement,
                 evidence=[
@@ -141,9 +214,157 @@ def _pad_policies(doc: MarkdownDocument, items: list[Policy], target: int) -> li
     return padded
 
 
+def _llm_pool_size(config: PipelineConfig) -> int | None:
+    # Concurrent generation needs at least one pooled connection per in-flight request.
+    if config.llm_pool_size is not None:
+        return config.llm_pool_size
+    if config.llm_concurrency > DEFAULT_POOL_SIZE:
+        return config.llm_concurrency
+    return None
+
+
+def _stream_window(config: PipelineConfig) -> int:
+    # A whole number of concurrent batches, so window edges never split an LLM batch.
+    unit = max(config.llm_concurrency, 1) * max(config.llm_batch_size, 1)
+    return max(STREAM_WINDOW // unit, 1) * unit
+
+
+def _build_llm_client(config: PipelineConfig) -> tuple[LLMClient, dict[str, Any]]:
+    """Create the provider client wrapped in the configured layers.
+
+    Returns the outermost client and the layers that report stats into the
+    manifest ``llm`` block, keyed by block name.
+
+    A replayed run answers every call from the transcript, so it has no other
+    layers; a recorded run records outermost, so that cache hits are captured too.
+    """
+    if config.llm_transcript is not None and config.llm_transcript_mode == "replay":
+        replay = TranscriptLLMClient(
+            None, config.llm_transcript, "replay", model=config.llm_model
+        )
+        traced = TracingLLMClient(replay) if trace.active() is not None else replay
+        return traced, {"transcript": replay}
+
+    client: LLMClient = get_llm_client(
+        config.llm_provider,
+        model=config.llm_model,
+        base_url=config.ollama_base_url,
+        temperature=config.llm_temperature,
+        timeout=config.llm_timeout,
+        pool_size=_llm_pool_size(config),
+        keepalive_expiry=config.llm_keepalive,
+    )
+    if trace.active() is not None:
+        # Innermost, so the trace shows every request that reaches the server.
+        client = TracingLLMClient(client)
+    layers: dict[str, Any] = {}
+    client = ResilientLLMClient(
+        client,
+        max_retries=config.llm_max_retries,
+        failure_threshold=config.llm_breaker_threshold,
+        reset_timeout=config.llm_breaker_reset,
+    )
+    layers["resilience"] = client
+    if config.llm_cache:
+        client = CachedLLMClient(
+            client, path=config.llm_cache_path, max_entries=config.llm_cache_max_entries
+        )
+        layers["cache"] = client
+    if config.llm_transcript is not None:
+        client = TranscriptLLMClient(client, config.llm_transcript, "record")
+        layers["transcript"] = client
+    return client, layers
+
+
+def _shard_settings(config: PipelineConfig, case: str) -> dict[str, Any]:
+    # Everything the shards of one run must agree on, checked again by merge.
+    return {
+        "case": case,
+        "n_use_cases": config.n_use_cases,
+        "n_test_cases_per_uc": config.n_test_cases_per_uc,
+        "n_examples_per_tc": config.n_examples_per_tc,
+        "input_sha256": _file_sha256(config.input_path),
+    }
+
+
 def run_pipeline(config: PipelineConfig) -> Path:
-    doc = MarkdownDocument.read(config.input_path)
-    detected_case = detect_case(doc.lines, case_override=config.case)
+    with trace.span("run_pipeline", "pipeline"), ExitStack() as stack:
+        return _run_pipeline(config, stack)
+
+
+@dataclass(frozen=True)
+class _Extracted:
+    case: str
+    use_cases: list[UseCase]
+    policies: list[Policy]
+    llm_used: bool
+    draft_stats: DraftStats = field(default_factory=DraftStats)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "case": self.case,
+            "use_cases": [uc.model_dump() for uc in self.use_cases],
+            "policies": [pol.model_dump() for pol in self.policies],
+            "llm_used": self.llm_used,
+            "draft_stats": asdict(self.draft_stats),
+        }
+
+    def complete(self, llm_client: LLMClient | None) -> bool:
+        """Whether this is what the inputs give, i.e. no LLM call failed on the way."""
+        if llm_client is None:
+            return True
+        return self.llm_used and not self.draft_stats.failed_chunks
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> _Extracted:
+        return cls(
+            case=data["case"],
+            use_cases=[UseCase.model_validate(uc) for uc in data["use_cases"]],
+            policies=[Policy.model_validate(pol) for pol in data["policies"]],
+            llm_used=data["llm_used"],
+            draft_stats=DraftStats(**data.get("draft_stats", {})),
+        )
+
+
+def _file_sha256(path: str | Path) -> str:
+    # Hashed in blocks, so a large input is never held in memory whole.
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(_HASH_BLOCK_BYTES):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _extract_inputs(config: PipelineConfig, llm_client: LLMClient | None) -> dict[str, Any]:
+    # Heuristic extraction depends on the document alone; the seed and the LLM
+    # settings matter only when the LLM extracts drafts.
+    llm = None
+    if llm_client is not None:
+        llm = {
+            "provider": config.llm_provider,
+            "model": getattr(llm_client, "model", None),
+            "temperature": config.llm_temperature,
+            "chunk_tokens": config.llm_chunk_tokens,
+            "seed": config.seed,
+        }
+    return {
+        "input_name": Path(config.input_path).name,
+        "input_sha256": _file_sha256(config.input_path),
+        "case": config.case,
+        "n_use_cases": config.n_use_cases,
+        "llm": llm,
+    }
+
+
+def _extract_stage(
+    config: PipelineConfig,
+    doc: MarkdownDocument,
+    llm_client: LLMClient | None,
+    metrics: RunMetrics,
+) -> _Extracted:
+    """Detect the case and extract (then pad) use cases and policies."""
+    with metrics.stage("classify"):
+        detected_case = detect_case(doc, case_override=config.case)
 
     target_use_cases = max(config.n_use_cases, 5)
     target_policies = max(config.n_use_cases, 5)
@@ -151,86 +372,232 @@ def run_pipeline(config: PipelineConfig) -> Path:
     use_cases: list[UseCase] = []
     policies: list[Policy] = []
     llm_used = False
-    llm_provider_used = "none"
-    llm_fallback_reason: str | None = None
-    llm_client = None
-    if config.llm_provider != "none":
+    draft_stats = DraftStats()
+    if llm_client is not None:
         try:
-            llm_client = get_llm_client(
-                config.llm_provider,
-                model=config.llm_model,
-                base_url=config.ollama_base_url,
-                temperature=config.llm_temperature,
-            )
             uc_drafts, pol_drafts = extract_drafts(
-                doc, llm_client, detected_case, config.seed, temperature=config.llm_temperature
+                doc,
+                llm_client,
+                detected_case,
+                config.seed,
+                temperature=config.llm_temperature,
+                max_chunk_tokens=config.llm_chunk_tokens,
+                concurrency=config.llm_concurrency,
+                stats=draft_stats,
             )
+            if draft_stats.failed_chunks:
+                typer.echo(
+                    f"WARNING: LLM extraction failed for {draft_stats.failed_chunks}"
+                    f" of {draft_stats.chunks} chunks; they are skipped."
+                )
             if uc_drafts:
                 use_cases = drafts_to_use_cases(uc_drafts, doc, detected_case)
             if pol_drafts:
                 policies = drafts_to_policies(pol_drafts, doc, detected_case)
             llm_used = True
-            llm_provider_used = config.llm_provider
+        except TranscriptMissError:
+            raise
         except Exception as exc:
-            typer.echo(
-                f"WARNING: LLM unavailable, fallback to heuristics. Reason: {exc}"
-            )
-            llm_used = False
-            llm_provider_used = "none"
-            llm_fallback_reason = str(exc)[:200]
+            _warn_llm_fallback(exc)
 
     if not use_cases:
-        use_cases = extract_use_cases(doc, target_use_cases)
+        use_cases = extract_use_cases(doc, target_use_cases, case=detected_case)
     if not policies:
-        policies = extract_policies(doc, target_policies)
+        policies = extract_policies(doc, target_policies, case=detected_case)
 
-    use_cases = _pad_use_cases(doc, use_cases, target_use_cases)
-    policies = _pad_policies(doc, policies, target_policies)
+    with metrics.stage("pad"):
+        use_cases = _pad_use_cases(doc, use_cases, target_use_cases, case=detected_case)
+        policies = _pad_policies(doc, policies, target_policies, case=detected_case)
+    return _Extracted(detected_case, use_cases, policies, llm_used, draft_stats)
 
-    use_cases = [uc.model_copy(update={"case": detected_case}) for uc in use_cases]
-    policies = [pol.model_copy(update={"case": detected_case}) for pol in policies]
 
-    test_cases = generate_test_cases(
-        use_cases=use_cases,
-        policies=policies,
+def _test_cases_stage(config: PipelineConfig, extracted: _Extracted) -> list[TestCase]:
+    return generate_test_cases(
+        use_cases=extracted.use_cases,
+        policies=extracted.policies,
         n_per_uc=config.n_test_cases_per_uc,
         seed=config.seed,
+        case=extracted.case,
     )
-    test_cases = [
-        tc.model_copy(update={"case": detected_case}) for tc in test_cases
-    ]
 
-    examples = generate_examples(
-        case=detected_case,
-        test_cases=test_cases,
-        use_cases=use_cases,
-        policies=policies,
-        n_per_tc=config.n_examples_per_tc,
-        seed=config.seed,
-        input_path=config.input_path,
-        llm_client=llm_client if llm_used else None,
-        llm_temperature=config.llm_temperature,
-    )
+
+def _warn_llm_fallback(exc: Exception) -> None:
+    typer.echo(f"WARNING: LLM unavailable, fallback to heuristics. Reason: {exc}")
+
+
+def _llm_metrics(
+    config: PipelineConfig,
+    llm_layers: dict[str, Any],
+    extracted: _Extracted,
+    output_stats: ExpectedOutputStats,
+) -> dict[str, Any]:
+    resilience = llm_layers.get("resilience")
+    return {
+        "calls": resilience.calls if resilience else 0,
+        "retries": resilience.retries if resilience else 0,
+        "failures": resilience.failures if resilience else 0,
+        "fallbacks": {
+            "extract": config.llm_provider != "none" and not extracted.llm_used,
+            "expected_outputs": output_stats.fallbacks,
+        },
+        "extract_chunks": {
+            "total": extracted.draft_stats.chunks,
+            "failed": extracted.draft_stats.failed_chunks,
+        },
+        "expected_outputs_requested": output_stats.requested,
+        "latency_ms": latency_summary(resilience.latencies if resilience else []),
+    }
+
+
+def _run_pipeline(config: PipelineConfig, stack: ExitStack) -> Path:
+    metrics = RunMetrics()
+    with metrics.stage("read"):
+        doc = open_markdown(config.input_path)
+        stack.callback(doc.close)
+    stage_cache = StageCache(config.stage_cache_dir) if config.stage_cache else None
+
+    llm_client = None
+    llm_layers: dict[str, Any] = {}
+    if config.llm_provider != "none":
+        try:
+            llm_client, llm_layers = _build_llm_client(config)
+            stack.callback(close_llm_client, llm_client)
+        except Exception as exc:
+            _warn_llm_fallback(exc)
+
+    # Each stage is cached under a hash of its inputs, so a rerun that changes
+    # only later settings (e.g. --n-examples-per-tc) reuses the earlier stages.
+    # The keys hash the whole input, so they are only computed with a cache.
+    with metrics.stage("extract"):
+        cached = extract_key = None
+        if stage_cache:
+            extract_key = stage_key("extract", _extract_inputs(config, llm_client))
+            cached = stage_cache.get("extract", extract_key)
+        if cached is not None:
+            extracted = _Extracted.from_dict(cached)
+        else:
+            extracted = _extract_stage(config, doc, llm_client, metrics)
+            # A fallback after an LLM failure is not what these inputs should give.
+            if stage_cache and extracted.complete(llm_client):
+                stage_cache.put("extract", extract_key, extracted.to_dict())
+
+    with metrics.stage("test_cases"):
+        cached = test_cases_key = None
+        if stage_cache:
+            test_cases_key = stage_key(
+                "test_cases",
+                {
+                    "extract": extract_key,
+                    "n_test_cases_per_uc": config.n_test_cases_per_uc,
+                    "seed": config.seed,
+                },
+            )
+            cached = stage_cache.get("test_cases", test_cases_key)
+        if cached is not None:
+            test_cases = [TestCase.model_validate(tc) for tc in cached]
+        else:
+            test_cases = _test_cases_stage(config, extracted)
+            if stage_cache and extracted.complete(llm_client):
+                stage_cache.put(
+                    "test_cases", test_cases_key, [tc.model_dump() for tc in test_cases]
+                )
+
+    detected_case = extracted.case
+    use_cases = extracted.use_cases
+    policies = extracted.policies
+    llm_used = extracted.llm_used
+    llm_provider_used = config.llm_provider if llm_used else "none"
 
     out_dir = Path(config.out_dir)
-    write_use_cases(out_dir, use_cases)
-    write_policies(out_dir, policies)
-    write_test_cases(out_dir, test_cases)
-    write_dataset(out_dir, examples)
+    with metrics.stage("write"):
+        write_use_cases(out_dir, use_cases)
+        write_policies(out_dir, policies)
+        write_test_cases(out_dir, test_cases)
+
+    output_stats = ExpectedOutputStats()
+    examples = _Counted(
+        iter_examples(
+            case=detected_case,
+            test_cases=test_cases,
+            use_cases=use_cases,
+            policies=policies,
+            n_per_tc=config.n_examples_per_tc,
+            seed=config.seed,
+            input_path=config.input_path,
+            llm_client=llm_client if llm_used else None,
+            llm_temperature=config.llm_temperature,
+            llm_concurrency=config.llm_concurrency,
+            llm_batch_size=config.llm_batch_size,
+            window=_stream_window(config) if config.stream else None,
+            workers=config.workers,
+            shard=config.shard,
+            stats=output_stats,
+        )
+    )
+    # Expected outputs fall back quietly on LLM errors, so replay misses are
+    # surfaced here, before anything derived from them is kept.
+    transcript = llm_layers.get("transcript")
+    if config.stream:
+        # Examples are written to dataset.jsonl as they are generated, so that
+        # writing is part of the examples stage.
+        with metrics.stage("examples"):
+            jsonl_path = write_dataset_jsonl(out_dir, examples)
+        if transcript is not None:
+            transcript.check()
+        with metrics.stage("write"):
+            write_dataset_from_jsonl(out_dir, jsonl_path)
+    else:
+        with metrics.stage("examples"):
+            items = list(examples)
+        if transcript is not None:
+            transcript.check()
+        with metrics.stage("write"):
+            write_dataset(out_dir, items)
 
     llm_info = {
         "provider": llm_provider_used,
         "model": getattr(llm_client, "model", None) if llm_client else None,
         "temperature": config.llm_temperature,
     }
+    for name, layer in llm_layers.items():
+        llm_info[name] = layer.stats()
+
+    run_metrics = metrics.to_dict()
+    if stage_cache is not None:
+        run_metrics["stage_cache"] = stage_cache.stats()
+    if config.llm_provider != "none":
+        run_metrics["llm"] = _llm_metrics(config, llm_layers, extracted, output_stats)
+
+    timestamp = datetime.now(timezone.utc).isoformat()
+    if config.shard is not None:
+        # Shards slice the test cases that get examples, exactly as iter_examples does.
+        sharded = generated_test_cases(test_cases, use_cases)
+        start, stop = shard_bounds(len(sharded), config.shard)
+        shard_manifest = ShardManifest(
+            shard_index=config.shard[0],
+            shard_count=config.shard[1],
+            seed=config.seed,
+            timestamp=timestamp,
+            generator_version=__version__,
+            llm=llm_info,
+            input_path=config.input_path,
+            out_path=str(out_dir),
+            settings=_shard_settings(config, detected_case),
+            test_case_ids=[tc.id for tc in sharded[start:stop]],
+            n_examples=examples.count,
+            metrics=run_metrics,
+        )
+        write_shard_manifest(out_dir, shard_manifest)
+        return out_dir
 
     manifest = RunManifest(
         seed=config.seed,
-        timestamp=datetime.now(timezone.utc).isoformat(),
+        timestamp=timestamp,
         generator_version=__version__,
         llm=llm_info,
         input_path=config.input_path,
         out_path=str(out_dir),
+        metrics=run_metrics,
     )
     write_run_manifest(out_dir, manifest)
 
@@ -0,0 +1,100 @@
+﻿"""On-disk cache of pipeline stage outputs, addressed by a hash of the stage inputs."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from dataset_generator import __version__
+
+
+def default_stage_cache_dir() -> Path:
+    base = os.getenv("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "dataset_generator" / "stages"
+
+
+@lru_cache(maxsize=None)
+def code_fingerprint() -> str:
+    """Hash of the package's Python sources.
+
+    The version string is not bumped on every change, so it cannot tell edited
+    extraction code from the code that wrote an entry. The whole package is
+    hashed rather than a list of stage modules, which could miss a new import.
+    """
+    root = Path(__file__).resolve().parent
+    digest = hashlib.sha256()
+    for path in sorted(root.rglob("*.py")):
+        digest.update(path.relative_to(root).as_posix().encode("utf-8") + b"\0")
+        digest.update(path.read_bytes() + b"\0")
+    return digest.hexdigest()
+
+
+def stage_key(stage: str, inputs: dict[str, Any]) -> str:
+    """Hash of everything a stage output depends on, including the generator code."""
+    payload = json.dumps(
+        {
+            "stage": stage,
+            "generator_version": __version__,
+            "code": code_fingerprint(),
+            "inputs": inputs,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class StageCache:
+    """One JSON file per stage output, under ``<path>/<stage>/<key>.json``.
+
+    Entries are written atomically, so concurrent runs sharing the directory
+    never read a partial output. Unreadable entries count as misses.
+    ``stages`` records, per stage, whether its last lookup was a hit.
+    """
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.path = Path(path) if path is not None else default_stage_cache_dir()
+        self.hits = 0
+        self.misses = 0
+        self.stages: dict[str, bool] = {}
+
+    def _entry(self, stage: str, key: str) -> Path:
+        return self.path / stage / f"{key}.json"
+
+    def get(self, stage: str, key: str) -> Any | None:
+        try:
+            with self._entry(stage, key).open("r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            self.stages[stage] = False
+            return None
+        self.hits += 1
+        self.stages[stage] = True
+        return value
+
+    def put(self, stage: str, key: str, value: Any) -> None:
+        target = self._entry(stage, key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_name, target)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "from_cache": dict(self.stages),
+            "path": str(self.path),
+        }
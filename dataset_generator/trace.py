@@ -0,0 +1,190 @@
+﻿"""Chrome trace-event timeline of a run (opens in chrome://tracing and Perfetto).
+
+Tracing is off unless a :func:`tracing` block is active, and then every
+:func:`span` becomes a complete ("X") event. Spans on one thread must nest, so
+calls that overlap on one thread (concurrent LLM requests) go to :func:`lane_span`,
+which puts each in-flight call on its own numbered lane.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, ContextManager, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_LANE_TID_BASE = 1_000_000
+
+
+class Tracer:
+    def __init__(self, process_name: str = "dataset_generator") -> None:
+        self.pid = os.getpid()
+        self.events: list[dict[str, Any]] = []
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._free_lanes: list[int] = []
+        self._lanes = 0
+        self._threads: dict[int, int] = {}
+        self._metadata("process_name", 0, process_name)
+
+    def _metadata(self, kind: str, tid: int, name: str) -> None:
+        self.events.append(
+            {"name": kind, "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+        )
+
+    def now_us(self) -> float:
+        return (time.perf_counter() - self._start) * 1e6
+
+    def thread_tid(self) -> int:
+        ident = threading.get_ident()
+        with self._lock:
+            tid = self._threads.get(ident)
+            if tid is None:
+                tid = self._threads[ident] = len(self._threads) + 1
+                name = threading.current_thread().name
+                self._metadata("thread_name", tid, "main" if tid == 1 else name)
+        return tid
+
+    def acquire_lane(self) -> int:
+        with self._lock:
+            if self._free_lanes:
+                self._free_lanes.sort()
+                return self._free_lanes.pop(0)
+            lane = self._lanes
+            self._lanes += 1
+            self._metadata("thread_name", _LANE_TID_BASE + lane, f"llm lane {lane}")
+            return lane
+
+    def release_lane(self, lane: int) -> None:
+        with self._lock:
+            self._free_lanes.append(lane)
+
+    @contextmanager
+    def span(self, name: str, cat: str, tid: int, args: dict[str, Any]) -> Iterator[dict[str, Any]]:
+        start = self.now_us()
+        try:
+            yield args
+        except BaseException as exc:
+            args.setdefault("outcome", type(exc).__name__)
+            raise
+        finally:
+            args.setdefault("outcome", "ok")
+            self.events.append(
+                {
+                    "name": name,
+                    "cat": cat,
+                    "ph": "X",
+                    "ts": round(start, 1),
+                    "dur": round(self.now_us() - start, 1),
+                    "pid": self.pid,
+                    "tid": tid,
+                    "args": args,
+                }
+            )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"traceEvents": self.events, "displayTimeUnit": "ms"}
+
+
+_active: Tracer | None = None
+
+
+def active() -> Tracer | None:
+    return _active
+
+
+@contextmanager
+def tracing(path: str | Path | None, process_name: str = "dataset_generator") -> Iterator[None]:
+    """Record spans while the block runs and write them to ``path`` (no-op if None).
+
+    The trace is written even if the block raises, so failed runs can be inspected.
+    """
+    global _active
+    if path is None:
+        yield
+        return
+    previous, _active = _active, Tracer(process_name)
+    tracer = _active
+    try:
+        yield
+    finally:
+        _active = previous
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(json.dumps(tracer.to_dict(), ensure_ascii=False), encoding="utf-8")
+
+
+def span(name: str, cat: str, **args: Any) -> ContextManager[dict[str, Any]]:
+    """A span on the calling thread; yields its ``args`` so callers can add to them."""
+    tracer = _active
+    if tracer is None:
+        return nullcontext(args)
+    return tracer.span(name, cat, tracer.thread_tid(), args)
+
+
+@contextmanager
+def lane_span(name: str, cat: str, **args: Any) -> Iterator[dict[str, Any]]:
+    """A span on its own lane, for calls that may overlap on one thread."""
+    tracer = _active
+    if tracer is None:
+        yield args
+        return
+    lane = tracer.acquire_lane()
+    try:
+        with tracer.span(name, cat, _LANE_TID_BASE + lane, args) as span_args:
+            yield span_args
+    finally:
+        tracer.release_lane(lane)
+
+
+def traced(cat: str) -> Callable[[F], F]:
+    """Decorator: run the function inside a span named after it."""
+
+    def decorate(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _active is None:
+                return func(*args, **kwargs)
+            with span(func.__name__, cat):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+class Phases:
+    """Consecutive spans of one procedure, started with :meth:`next`.
+
+    Lets long functions mark phase boundaries without nesting their body in
+    ``with`` blocks; the open phase ends at the next :meth:`next` or on exit.
+    """
+
+    def __init__(self, cat: str) -> None:
+        self.cat = cat
+        self._current: ContextManager[dict[str, Any]] | None = None
+
+    def next(self, name: str) -> None:
+        self.close()
+        self._current = span(name, self.cat)
+        self._current.__enter__()
+
+    def close(self) -> None:
+        if self._current is not None:
+            current, self._current = self._current, None
+            current.__exit__(None, None, None)
+
+    def __enter__(self) -> Phases:
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if self._current is not None:
+            current, self._current = self._current, None
+            current.__exit__(exc_type, exc, tb)
@@ -0,0 +1,140 @@
+﻿"""Structured validation issues and their capped, aggregated log."""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+MAX_SAMPLE_IDS = 5
+
+
+@dataclass(frozen=True)
+class Issue:
+    code: str
+    message: str
+    file: str | None = None
+    item_id: str | None = None
+    path: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class CodeSummary:
+    count: int = 0
+    sample_ids: list[str] = field(default_factory=list)
+
+    def add_sample(self, item_id: str | None) -> None:
+        if item_id is not None and item_id not in self.sample_ids and len(self.sample_ids) < MAX_SAMPLE_IDS:
+            self.sample_ids.append(item_id)
+
+
+class FailFast(Exception):
+    """Raised by a fail-fast :class:`IssueLog` on the first issue."""
+
+    def __init__(self, issue: Issue) -> None:
+        super().__init__(issue.message)
+        self.issue = issue
+
+
+class IssueLog:
+    """Ordered issues with per-code counts.
+
+    Every issue is counted, but only the first ``max_per_code`` issues of each
+    code are kept (all of them when ``None``), so a generator that breaks every
+    item costs a few records per code rather than one per item.
+    """
+
+    def __init__(self, max_per_code: int | None = None, fail_fast: bool = False) -> None:
+        self.max_per_code = max_per_code
+        self.fail_fast = fail_fast
+        self.issues: list[Issue] = []
+        self.summary: dict[str, CodeSummary] = {}
+        self._kept: dict[str, int] = {}
+
+    @property
+    def total(self) -> int:
+        return sum(summary.count for summary in self.summary.values())
+
+    def __bool__(self) -> bool:
+        return bool(self.summary)
+
+    def add(
+        self,
+        code: str,
+        message: str,
+        *,
+        file: str | None = None,
+        item_id: Any = None,
+        path: str | None = None,
+    ) -> None:
+        item_id = item_id if isinstance(item_id, str) else None
+        self.record(Issue(code, message, file, item_id, path))
+
+    def record(self, issue: Issue) -> None:
+        if self.fail_fast:
+            raise FailFast(issue)
+        summary = self.summary.setdefault(issue.code, CodeSummary())
+        summary.count += 1
+        summary.add_sample(issue.item_id)
+        self._keep(issue)
+
+    def extend(self, other: IssueLog) -> None:
+        """Append the issues of ``other`` after the ones already logged."""
+        if self.fail_fast and other.issues:
+            raise FailFast(other.issues[0])
+        for issue in other.issues:
+            self._keep(issue)
+        for code, other_summary in other.summary.items():
+            summary = self.summary.setdefault(code, CodeSummary())
+            summary.count += other_summary.count
+            for item_id in other_summary.sample_ids:
+                summary.add_sample(item_id)
+
+    def _keep(self, issue: Issue) -> None:
+        kept = self._kept.get(issue.code, 0)
+        if self.max_per_code is None or kept < self.max_per_code:
+            self.issues.append(issue)
+            self._kept[issue.code] = kept + 1
+
+    def messages(self) -> list[str]:
+        return [issue.message for issue in self.issues]
+
+    def omitted(self) -> dict[str, int]:
+        """Issues counted but not kept, per code."""
+        return {
+            code: summary.count - self._kept.get(code, 0)
+            for code, summary in self.summary.items()
+            if summary.count > self._kept.get(code, 0)
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "total": self.total,
+            "by_code": {
+                code: {"count": summary.count, "sample_ids": summary.sample_ids}
+                for code, summary in self.summary.items()
+            },
+            "omitted": self.omitted(),
+            "issues": [issue.to_dict() for issue in self.issues],
+        }
+
+
+@dataclass
+class ValidationReport:
+    issues: IssueLog
+    counts: dict[str, Any]
+    stopped_early: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return not self.issues
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "stopped_early": self.stopped_early,
+            "counts": self.counts,
+            **self.issues.to_dict(),
+        }
@@ -0,0 +1,109 @@
+﻿"""JSON schemas of the output files, derived from the pydantic models.
+
+Schemas are built and compiled once per process and reused for every file and
+item. Items that pass strict pydantic validation are known to satisfy the derived
+schema, so jsonschema only runs (to produce its error messages) on the rest.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterator
+
+from jsonschema import ValidationError
+from jsonschema.protocols import Validator
+from jsonschema.validators import validator_for
+from pydantic import BaseModel
+from pydantic import ValidationError as PydanticValidationError
+
+from dataset_generator.core.models import DatasetExample, Policy, RunManifest, TestCase, UseCase
+
+# file name -> (container key, item model); container key is None for a bare object.
+SCHEMA_MODELS: dict[str, tuple[str | None, type[BaseModel]]] = {
+    "use_cases.json": ("use_cases", UseCase),
+    "policies.json": ("policies", Policy),
+    "test_cases.json": ("test_cases", TestCase),
+    "dataset.json": ("examples", DatasetExample),
+    "run_manifest.json": (None, RunManifest),
+}
+
+
+def _inline_refs(node: Any, defs: dict[str, Any], seen: tuple[str, ...] = ()) -> Any:
+    # The models are not recursive, so every "#/$defs/..." reference can be inlined.
+    # Self-contained subschemas can be compiled on their own and skip ref lookups.
+    if isinstance(node, list):
+        return [_inline_refs(value, defs, seen) for value in node]
+    if not isinstance(node, dict):
+        return node
+    ref = node.get("$ref")
+    if isinstance(ref, str) and ref.startswith("#/$defs/"):
+        name = ref.removeprefix("#/$defs/")
+        if name in seen:
+            raise ValueError(f"Recursive schema reference: {ref}")
+        return _inline_refs(defs[name], defs, seen + (name,))
+    return {key: _inline_refs(value, defs, seen) for key, value in node.items()}
+
+
+def model_schema(model: type[BaseModel]) -> dict[str, Any]:
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+    return _inline_refs(schema, defs)
+
+
+def file_schema(file_name: str) -> dict[str, Any]:
+    container_key, model = SCHEMA_MODELS[file_name]
+    item_schema = model_schema(model)
+    if container_key is None:
+        return item_schema
+    return {
+        "type": "object",
+        "required": [container_key],
+        "properties": {container_key: {"type": "array", "items": item_schema}},
+    }
+
+
+def _compile(schema: dict[str, Any]) -> Validator:
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+class CompiledSchema:
+    """Compiled validators of one output file: the whole document and one item."""
+
+    def __init__(self, file_name: str) -> None:
+        container_key, model = SCHEMA_MODELS[file_name]
+        schema = file_schema(file_name)
+        self.file_name = file_name
+        self.model = model
+        self.file_validator = _compile(schema)
+        self.item_validator = (
+            _compile(schema["properties"][container_key]["items"])
+            if container_key is not None
+            else self.file_validator
+        )
+
+    def iter_errors(self, document: Any) -> Iterator[ValidationError]:
+        return self.file_validator.iter_errors(document)
+
+    def iter_item_errors(self, item: Any) -> Iterator[ValidationError]:
+        # Strict mode never coerces, so whatever it accepts also matches the JSON
+        # schema (which has no checks beyond types and required fields). The
+        # reverse does not hold (e.g. custom validators), hence the fallback.
+        try:
+            self.model.model_validate(item, strict=True)
+        except PydanticValidationError as exc:
+            # Custom validators (e.g. Message.role) run only once the value has the
+            # right type; if nothing else failed, the schema is satisfied.
+            if any(error["type"] != "value_error" for error in exc.errors()):
+                return self.item_validator.iter_errors(item)
+        return iter(())
+
+
+_COMPILED: dict[str, CompiledSchema] = {}
+
+
+def compiled_schema(file_name: str) -> CompiledSchema:
+    """Return the cached :class:`CompiledSchema` of an output file."""
+    if file_name not in _COMPILED:
+        _COMPILED[file_name] = CompiledSchema(file_name)
+    return _COMPILED[file_name]
@@ -1,13 +1,19 @@
 ﻿from __future__ import annotations
 
 import json
-from collections import Counter, defaultdict
+from collections import Counter, defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
-from jsonschema import ValidationError, validate
+from jsonschema import ValidationError
+from jsonschema.exceptions import best_match, relevance
 
-from dataset_generator.core.markdown import MarkdownDocument
+from dataset_generator import trace
+from dataset_generator.core.markdown import MarkdownDocument, open_markdown
+from dataset_generator.io.readers import JsonArrayStream, iter_jsonl
+from dataset_generator.validate.report import FailFast, Issue, IssueLog, ValidationReport
+from dataset_generator.validate.schemas import SCHEMA_MODELS, compiled_schema
 
 
 REQUIRED_FILES = {
@@ -38,6 +44,9 @@ SUPPORT_BOT_SOURCES = {"tickets", "faq_paraphrase", "corner"}
 MIN_UNIQUE_USER_CONTENTS = 5
 MIN_UNIQUE_EXPECTED_OUTPUTS = 5
 MIN_EXAMPLES_FOR_DIVERSITY_CHECK = 15
+VALIDATE_CHUNK_SIZE = 2048
+VALIDATE_BLOCK_CHARS = 1024 * 1024
+MAX_ISSUES_PER_CODE = 20
 
 
 def _load_json(path: Path) -> Any:
@@ -45,52 +54,486 @@ def _load_json(path: Path) -> Any:
         return json.load(f)
 
 
-def _schema_for_list(container_key: str, required_fields: list[str]) -> dict:
-    return {
-        "type": "object",
-        "required": [container_key],
-        "properties": {
-            container_key: {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "required": required_fields,
-                    "properties": {key: {} for key in required_fields},
-                },
-            }
-        },
-    }
+def _primary_input_text(example: dict) -> str:
+    input_obj = example.get("input", {})
+    messages = input_obj.get("messages", []) if isinstance(input_obj, dict) else []
+    if not isinstance(messages, list):
+        return ""
+
+    if example.get("case") == "operator_quality":
+        for msg in reversed(messages):
+            if isinstance(msg, dict) and msg.get("role") == "operator":
+                content = msg.get("content")
+                return content if isinstance(content, str) else ""
+    else:
+        for msg in messages:
+            if isinstance(msg, dict) and msg.get("role") == "user":
+                content = msg.get("content")
+                return content if isinstance(content, str) else ""
+
+    for msg in messages:
+        if isinstance(msg, dict):
+            content = msg.get("content")
+            if isinstance(content, str):
+                return content
+    return ""
+
+
+class _ExampleChecks:
+    """Per-example checks of a dataset (or of one chunk of it).
+
+    Only aggregate state is kept: the test cases that have examples, counters and
+    diversity sets capped at the size the checks need. Issues are bucketed so the
+    report keeps the order of the separate checks. Instances are picklable and
+    merge in dataset order, so chunks can be checked in worker processes.
+    """
+
+    def __init__(
+        self,
+        file_name: str,
+        start: int = 0,
+        max_per_code: int | None = None,
+        fail_fast: bool = False,
+    ) -> None:
+        self.file_name = file_name
+        self.start = start
+        self.fail_fast = fail_fast
+        self.count = 0
+        self.formats: dict[str, int] = {}
+        # (jsonschema relevance key, issue) of the best schema error so far.
+        self.schema_error: tuple[tuple, Issue] | None = None
+        self.example_issues = IssueLog(max_per_code, fail_fast)
+        self.metadata_issues = IssueLog(max_per_code, fail_fast)
+        self.test_case_ids: set[str] = set()
+        self.sources_present: set[str] = set()
+        self.support_examples = 0
+        self.unique_user_contents: set[str] = set()
+        self.unique_expected_outputs: set[str] = set()
+
+    def add(self, ex: Any) -> None:
+        index = self.start + self.count
+        self.count += 1
+        item_id = ex.get("id") if isinstance(ex, dict) else None
+        item_errors = list(compiled_schema("dataset.json").iter_item_errors(ex))
+        if item_errors:
+            for error in item_errors:
+                error.relative_path.extendleft((index, "examples"))
+            self._add_schema_error(
+                _schema_error_summary(best_match(item_errors), self.file_name, item_id)
+            )
+        if not isinstance(ex, dict):
+            return
 
+        fmt = ex.get("format")
+        if isinstance(fmt, str):
+            self.formats[fmt] = self.formats.get(fmt, 0) + 1
 
-def _schema_for_manifest() -> dict:
-    return {
-        "type": "object",
-        "required": [
-            "seed",
-            "timestamp",
-            "generator_version",
-            "llm",
-            "input_path",
-            "out_path",
-        ],
-    }
+        self._check_example(ex, fmt, index, item_id)
+
+        tc_id = ex.get("test_case_id")
+        if isinstance(tc_id, str):
+            self.test_case_ids.add(tc_id)
+
+        expected_output = ex.get("expected_output")
+        if isinstance(expected_output, str):
+            _add_capped(self.unique_expected_outputs, expected_output, MIN_UNIQUE_EXPECTED_OUTPUTS)
+        primary_text = _primary_input_text(ex)
+        if primary_text:
+            _add_capped(self.unique_user_contents, primary_text, MIN_UNIQUE_USER_CONTENTS)
+
+        metadata = ex.get("metadata", {})
+        if ex.get("case") == "support_bot":
+            self.support_examples += 1
+            source = metadata.get("source") if isinstance(metadata, dict) else None
+            if source not in SUPPORT_BOT_SOURCES:
+                self.metadata_issues.add(
+                    "support_bot.source_invalid",
+                    "support_bot: metadata.source invalid",
+                    file=self.file_name,
+                    item_id=item_id,
+                    path=_json_path("examples", index, "metadata", "source"),
+                )
+            else:
+                self.sources_present.add(source)
+        split = metadata.get("split") if isinstance(metadata, dict) else None
+        if split not in ALLOWED_SPLITS:
+            self.metadata_issues.add(
+                "dataset.split_invalid",
+                "dataset: metadata.split invalid",
+                file=self.file_name,
+                item_id=item_id,
+                path=_json_path("examples", index, "metadata", "split"),
+            )
+
+    def merge(self, other: _ExampleChecks) -> None:
+        """Fold in the checks of the chunk that directly follows this one."""
+        self.count += other.count
+        for fmt, n in other.formats.items():
+            self.formats[fmt] = self.formats.get(fmt, 0) + n
+        if other.schema_error is not None:
+            self._add_schema_error(other.schema_error)
+        self.example_issues.extend(other.example_issues)
+        self.metadata_issues.extend(other.metadata_issues)
+        self.test_case_ids.update(other.test_case_ids)
+        self.sources_present.update(other.sources_present)
+        self.support_examples += other.support_examples
+        for value in other.unique_user_contents:
+            _add_capped(self.unique_user_contents, value, MIN_UNIQUE_USER_CONTENTS)
+        for value in other.unique_expected_outputs:
+            _add_capped(self.unique_expected_outputs, value, MIN_UNIQUE_EXPECTED_OUTPUTS)
+
+    def _add_schema_error(self, summary: tuple[tuple, Issue]) -> None:
+        if self.fail_fast:
+            raise FailFast(summary[1])
+        # Same choice as best_match over all errors: the most relevant wins, the
+        # earliest on ties.
+        if self.schema_error is None or summary[0] > self.schema_error[0]:
+            self.schema_error = summary
+
+    def _check_example(self, ex: dict, fmt: Any, index: int, item_id: Any) -> None:
+        def _issue(code: str, message: str, *path: str | int) -> None:
+            self.example_issues.add(
+                code,
+                message,
+                file=self.file_name,
+                item_id=item_id,
+                path=_json_path("examples", index, *path),
+            )
+
+        evaluation = ex.get("evaluation_criteria", [])
+        if not isinstance(evaluation, list) or len(evaluation) < 3:
+            _issue(
+                "dataset.evaluation_criteria_too_few",
+                "dataset: evaluation_criteria must have at least 3 items",
+                "evaluation_criteria",
+            )
+
+        policy_ids = ex.get("policy_ids", [])
+        if not isinstance(policy_ids, list) or len(policy_ids) < 1:
+            _issue(
+                "dataset.policy_ids_empty",
+                "dataset: policy_ids must have at least 1 item",
+                "policy_ids",
+            )
+
+        input_obj = ex.get("input", {})
+        messages = input_obj.get("messages", []) if isinstance(input_obj, dict) else []
+        if not isinstance(messages, list):
+            _issue(
+                "dataset.messages_not_list",
+                "dataset: input.messages must be list",
+                "input",
+                "messages",
+            )
+        else:
+            for msg_index, msg in enumerate(messages):
+                role = msg.get("role") if isinstance(msg, dict) else None
+                if role not in ALLOWED_ROLES:
+                    _issue(
+                        "dataset.role_invalid",
+                        "dataset: message role invalid",
+                        "input",
+                        "messages",
+                        msg_index,
+                        "role",
+                    )
+
+        if ex.get("case") not in ALLOWED_CASES:
+            _issue("dataset.case_invalid", "dataset: case invalid", "case")
+        if fmt not in ALLOWED_FORMATS:
+            _issue("dataset.format_invalid", "dataset: format invalid", "format")
+        if fmt == "dialog_last_turn_correction":
+            tmi = input_obj.get("target_message_index") if isinstance(input_obj, dict) else None
+            if not isinstance(tmi, int):
+                _issue(
+                    "dataset.target_index_missing",
+                    "dataset: target_message_index required for dialog_last_turn_correction",
+                    "input",
+                    "target_message_index",
+                )
+            else:
+                if not isinstance(messages, list) or tmi < 0 or tmi >= len(messages):
+                    _issue(
+                        "dataset.target_index_out_of_bounds",
+                        "dataset: target_message_index out of bounds",
+                        "input",
+                        "target_message_index",
+                    )
+                else:
+                    last_operator_index = None
+                    for idx, msg in enumerate(messages):
+                        if isinstance(msg, dict) and msg.get("role") == "operator":
+                            last_operator_index = idx
+                    if last_operator_index is None or tmi != last_operator_index:
+                        _issue(
+                            "dataset.target_index_not_last_operator",
+                            "dataset: target_message_index must point to last operator message",
+                            "input",
+                            "target_message_index",
+                        )
+
+
+class _DatasetPass(_ExampleChecks):
+    """Example checks plus the id checks, which need every id seen so far."""
+
+    def __init__(
+        self, file_name: str, max_per_code: int | None = None, fail_fast: bool = False
+    ) -> None:
+        super().__init__(file_name, max_per_code=max_per_code, fail_fast=fail_fast)
+        self.max_per_code = max_per_code
+        self.id_issues = IssueLog(max_per_code, fail_fast)
+        self._seen_ids: set[str] = set()
+
+    def add(self, ex: Any) -> None:
+        if isinstance(ex, dict):
+            self._check_id(self.start + self.count, ex.get("id"))
+        super().add(ex)
+
+    def run_parallel(self, blocks: Iterable[tuple[str, int]], jobs: int) -> None:
+        """Check blocks of items in JSON text, decoding and checking them in worker processes.
+
+        Blocks are ``(text, count)`` as yielded by the raw readers and go out in
+        chunks of about VALIDATE_CHUNK_SIZE items. Workers send back partial
+        aggregates and the ids of their items, which are checked here in dataset
+        order. This process never decodes an item: blocks are cut by layout, so a
+        worker checks that its text holds the counted items, and raises
+        :class:`_BlocksMisread` here when it does not.
+        """
+        start = 0
+        texts: list[str] = []
+        count = 0
+        pending: deque[Future[_ChunkResult | None]] = deque()
+
+        def _submit() -> None:
+            pending.append(
+                pool.submit(
+                    _check_example_texts,
+                    self.file_name,
+                    start,
+                    texts,
+                    count,
+                    self.max_per_code,
+                    self.fail_fast,
+                )
+            )
+
+        def _merge_next() -> None:
+            result = pending.popleft().result()
+            if result is None:
+                raise _BlocksMisread
+            checks, ids, failure = result
+            for index, item_id in ids:
+                self._check_id(index, item_id)
+            if failure is not None:
+                raise FailFast(failure)
+            self.merge(checks)
+
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            try:
+                for text, n in blocks:
+                    texts.append(text)
+                    count += n
+                    if count < VALIDATE_CHUNK_SIZE:
+                        continue
+                    _submit()
+                    start += count
+                    texts, count = [], 0
+                    # Bound the chunks in flight so memory stays flat on large datasets.
+                    if len(pending) >= 2 * jobs:
+                        _merge_next()
+                if texts:
+                    _submit()
+                while pending:
+                    _merge_next()
+            except Exception:
+                for future in pending:
+                    future.cancel()
+                raise
+
+    def _check_id(self, index: int, item_id: Any) -> None:
+        prefix = ALLOWED_ID_PREFIXES["dataset.json"]
+        _check_item_id(
+            self.id_issues,
+            self.file_name,
+            prefix,
+            self._seen_ids,
+            item_id,
+            _json_path("examples", index, "id"),
+        )
+
+
+class _BlocksMisread(Exception):
+    """A chunk's text did not decode to the items it was counted as."""
+
+
+_ChunkResult = tuple[_ExampleChecks, list[tuple[int, Any]], Issue | None]
+
+
+def _check_example_texts(
+    file_name: str,
+    start: int,
+    texts: list[str],
+    count: int,
+    max_per_code: int | None,
+    fail_fast: bool,
+) -> _ChunkResult | None:
+    try:
+        items = json.loads("[" + ",".join(texts) + "]")
+    except json.JSONDecodeError:
+        return None
+    if len(items) != count:
+        return None
+    checks = _ExampleChecks(file_name, start, max_per_code, fail_fast)
+    ids: list[tuple[int, Any]] = []
+    try:
+        for ex in items:
+            if isinstance(ex, dict):
+                ids.append((start + checks.count, ex.get("id")))
+            checks.add(ex)
+    except FailFast as exc:
+        # FailFast itself does not cross the process boundary; report its issue.
+        return checks, ids, exc.issue
+    return checks, ids, None
+
+
+def _check_item_id(
+    issues: IssueLog,
+    file_name: str,
+    prefix: str,
+    seen: set[str],
+    item_id: Any,
+    path: str,
+) -> None:
+    stem = file_name.split(".", 1)[0]
+    if not isinstance(item_id, str):
+        issues.add(
+            f"{stem}.id_missing",
+            f"{file_name}: id is missing or not a string",
+            file=file_name,
+            path=path,
+        )
+        return
+    if not item_id.startswith(prefix):
+        issues.add(
+            f"{stem}.id_prefix",
+            f"{file_name}: id '{item_id}' missing prefix {prefix}",
+            file=file_name,
+            item_id=item_id,
+            path=path,
+        )
+    if item_id in seen:
+        issues.add(
+            f"{stem}.id_duplicate",
+            f"{file_name}: duplicate id '{item_id}'",
+            file=file_name,
+            item_id=item_id,
+            path=path,
+        )
+    seen.add(item_id)
+
+
+def _json_path(*parts: str | int) -> str:
+    path = "$"
+    for part in parts:
+        path += f"[{part}]" if isinstance(part, int) else f".{part}"
+    return path
+
+
+def _schema_error_summary(
+    error: ValidationError, file_name: str, item_id: Any = None
+) -> tuple[tuple, Issue]:
+    # ValidationError does not pickle, so chunks report its relevance and an Issue.
+    key = relevance(error)
+    issue = Issue(
+        "schema",
+        f"Schema error in {file_name}: {error.message}",
+        file_name,
+        item_id if isinstance(item_id, str) else None,
+        _json_path(*error.absolute_path),
+    )
+    return (key[0], tuple(key[1])) + key[2:], issue
+
+
+def _add_capped(values: set[str], value: str, cap: int) -> None:
+    # The diversity checks only compare against a threshold, so stop growing there.
+    if len(values) < cap:
+        values.add(value)
 
 
-def validate_out_dir(out_dir: str | Path) -> tuple[bool, list[str], dict[str, int]]:
-    out_path = Path(out_dir)
-    errors: list[str] = []
-    counts: dict[str, int] = {}
+def _dataset_path(out_path: Path) -> Path | None:
+    for name in ("dataset.json", "dataset.jsonl"):
+        if (out_path / name).exists():
+            return out_path / name
+    return None
 
-    missing = [name for name in REQUIRED_FILES if not (out_path / name).exists()]
+
+def _dataset_stream(dataset_path: Path, raw: bool) -> JsonArrayStream | None:
+    if dataset_path.suffix == ".jsonl":
+        return None
+    if raw:
+        return JsonArrayStream(dataset_path, "examples", VALIDATE_BLOCK_CHARS, raw=True)
+    return JsonArrayStream(dataset_path, "examples")
+
+
+def validate_out_dir(
+    out_dir: str | Path, jobs: int = 1
+) -> tuple[bool, list[str], dict[str, int]]:
+    """Validate a generated output directory; every error message is returned.
+
+    See :func:`validate_report` for structured, capped issues and fail-fast mode.
+    """
+    report = validate_report(out_dir, jobs=jobs, max_per_code=None)
+    return report.ok, report.issues.messages(), report.counts
+
+
+def validate_report(
+    out_dir: str | Path,
+    jobs: int = 1,
+    max_per_code: int | None = MAX_ISSUES_PER_CODE,
+    fail_fast: bool = False,
+) -> ValidationReport:
+    """Validate a generated output directory into a :class:`ValidationReport`.
+
+    ``dataset.json`` (or ``dataset.jsonl`` when only the streamed output exists)
+    is read incrementally and checked in a single pass, so memory does not grow
+    with the number of examples. With ``jobs > 1`` chunks of examples are checked
+    in that many worker processes; cross-item checks stay in this process.
+
+    Every issue is counted, but only ``max_per_code`` are kept per code. With
+    ``fail_fast`` validation stops at the first issue found.
+    """
+    issues = IssueLog(max_per_code, fail_fast)
+    counts: dict[str, Any] = {}
+    try:
+        with trace.span("validate", "validate"), trace.Phases("validate") as phases:
+            _validate_into(Path(out_dir), issues, counts, jobs, phases)
+    except FailFast as exc:
+        issues = IssueLog(max_per_code)
+        issues.record(exc.issue)
+        return ValidationReport(issues, counts, stopped_early=True)
+    return ValidationReport(issues, counts)
+
+
+def _validate_into(
+    out_path: Path, issues: IssueLog, counts: dict[str, Any], jobs: int, phases: trace.Phases
+) -> None:
+    max_per_code, fail_fast = issues.max_per_code, issues.fail_fast
+    phases.next("load")
+
+    dataset_path = _dataset_path(out_path)
+    missing = [
+        name
+        for name in REQUIRED_FILES
+        if not (out_path / name).exists() and not (name == "dataset.json" and dataset_path)
+    ]
     if missing:
         for name in missing:
-            errors.append(f"Missing file: {name}")
-        return False, errors, counts
+            issues.add("missing_file", f"Missing file: {name}", file=name)
+        return
 
     use_cases_doc = _load_json(out_path / "use_cases.json")
     policies_doc = _load_json(out_path / "policies.json")
     test_cases_doc = _load_json(out_path / "test_cases.json")
-    dataset_doc = _load_json(out_path / "dataset.json")
     manifest = _load_json(out_path / "run_manifest.json")
 
     use_cases = use_cases_doc.get("use_cases", []) if isinstance(use_cases_doc, dict) else []
@@ -98,53 +541,35 @@ def validate_out_dir(out_dir: str | Path) -> tuple[bool, list[str], dict[str, in
     test_cases = (
         test_cases_doc.get("test_cases", []) if isinstance(test_cases_doc, dict) else []
     )
-    dataset = dataset_doc.get("examples", []) if isinstance(dataset_doc, dict) else []
+
+    phases.next("dataset")
+    dataset_pass = _DatasetPass(dataset_path.name, max_per_code, fail_fast)
+    stream = _dataset_stream(dataset_path, raw=jobs > 1)
+    if jobs > 1:
+        try:
+            dataset_pass.run_parallel(stream or iter_jsonl(dataset_path, raw=True), jobs)
+        except (json.JSONDecodeError, _BlocksMisread):
+            # Blocks cut from an unusual layout (or broken JSON): start over
+            # serially, which decodes exactly and reports broken JSON as usual.
+            jobs = 1
+            dataset_pass = _DatasetPass(dataset_path.name, max_per_code, fail_fast)
+            stream = _dataset_stream(dataset_path, raw=False)
+    if jobs <= 1:
+        for ex in stream or iter_jsonl(dataset_path):
+            dataset_pass.add(ex)
+    # The streamed array is replaced by [], so only top-level errors remain here.
+    dataset_doc = stream.document if stream is not None else {"examples": []}
 
     counts["use_cases"] = len(use_cases)
     counts["policies"] = len(policies)
     counts["test_cases"] = len(test_cases)
-    counts["dataset"] = len(dataset)
-    formats_count: dict[str, int] = {}
-    for ex in dataset:
-        fmt = ex.get("format") if isinstance(ex, dict) else None
-        if isinstance(fmt, str):
-            formats_count[fmt] = formats_count.get(fmt, 0) + 1
-    counts["formats"] = formats_count
-
-    schema_map = {
-        "use_cases.json": _schema_for_list(
-            "use_cases", ["id", "case", "name", "description", "evidence"]
-        ),
-        "policies.json": _schema_for_list(
-            "policies", ["id", "case", "type", "statement", "evidence"]
-        ),
-        "test_cases.json": _schema_for_list(
-            "test_cases",
-            ["id", "case", "use_case_id", "parameters", "policy_ids", "description"],
-        ),
-        "dataset.json": _schema_for_list(
-            "examples",
-            [
-                "id",
-                "case",
-                "format",
-                "use_case_id",
-                "test_case_id",
-                "input",
-                "expected_output",
-                "evaluation_criteria",
-                "policy_ids",
-                "metadata",
-            ]
-        ),
-        "run_manifest.json": _schema_for_manifest(),
-    }
+    counts["dataset"] = dataset_pass.count
+    counts["formats"] = dataset_pass.formats
 
     data_map = {
         "use_cases.json": use_cases_doc,
         "policies.json": policies_doc,
         "test_cases.json": test_cases_doc,
-        "dataset.json": dataset_doc,
         "run_manifest.json": manifest,
     }
 
@@ -152,28 +577,43 @@ def validate_out_dir(out_dir: str | Path) -> tuple[bool, list[str], dict[str, in
         "use_cases.json": use_cases,
         "policies.json": policies,
         "test_cases.json": test_cases,
-        "dataset.json": dataset,
     }
 
-    for name, schema in schema_map.items():
-        try:
-            validate(instance=data_map[name], schema=schema)
-        except ValidationError as exc:
-            errors.append(f"Schema error in {name}: {exc.message}")
-
+    phases.next("schemas")
+    for name in SCHEMA_MODELS:
+        if name == "dataset.json":
+            error = best_match(compiled_schema(name).iter_errors(dataset_doc))
+            summary = (
+                _schema_error_summary(error, dataset_path.name) if error is not None else None
+            )
+            item_error = dataset_pass.schema_error
+            if item_error is not None and (summary is None or item_error[0] > summary[0]):
+                summary = item_error
+            if summary is not None:
+                issues.record(summary[1])
+            continue
+        error = best_match(compiled_schema(name).iter_errors(data_map[name]))
+        if error is not None:
+            issues.record(_schema_error_summary(error, name)[1])
+
+    phases.next("ids")
     for file_name, prefix in ALLOWED_ID_PREFIXES.items():
+        if file_name == "dataset.json":
+            issues.extend(dataset_pass.id_issues)
+            continue
         seen: set[str] = set()
-        for item in list_map.get(file_name, []):
-            item_id = item.get("id")
-            if not isinstance(item_id, str):
-                errors.append(f"{file_name}: id is missing or not a string")
-                continue
-            if not item_id.startswith(prefix):
-                errors.append(f"{file_name}: id '{item_id}' missing prefix {prefix}")
-            if item_id in seen:
-                errors.append(f"{file_name}: duplicate id '{item_id}'")
-            seen.add(item_id)
+        container_key = SCHEMA_MODELS[file_name][0]
+        for index, item in enumerate(list_map.get(file_name, [])):
+            _check_item_id(
+                issues,
+                file_name,
+                prefix,
+                seen,
+                item.get("id"),
+                _json_path(container_key, index, "id"),
+            )
 
+    phases.next("evidence")
     markdown_cache: dict[str, MarkdownDocument] = {}
 
     def _resolve_input_path(path_str: str) -> Path | None:
@@ -202,7 +642,12 @@ def validate_out_dir(out_dir: str | Path) -> tuple[bool, list[str], dict[str, in
 
     manifest_input_path = manifest.get("input_path")
     if not isinstance(manifest_input_path, str):
-        errors.append("run_manifest.json: input_path missing or invalid")
+        issues.add(
+            "run_manifest.input_path_invalid",
+            "run_manifest.json: input_path missing or invalid",
+            file="run_manifest.json",
+            path="$.input_path",
+        )
         manifest_input_path = None
 
     def _get_md() -> MarkdownDocument | None:
@@ -211,105 +656,95 @@ def validate_out_dir(out_dir: str | Path) -> tuple[bool, list[str], dict[str, in
         if manifest_input_path not in markdown_cache:
             md_path = _resolve_input_path(manifest_input_path)
             if md_path is None:
-                errors.append(
-                    f"run_manifest.json: input_path not found: {manifest_input_path}"
+                issues.add(
+                    "run_manifest.input_path_not_found",
+                    f"run_manifest.json: input_path not found: {manifest_input_path}",
+                    file="run_manifest.json",
+                    path="$.input_path",
                 )
                 return None
-            markdown_cache[manifest_input_path] = MarkdownDocument.read(str(md_path))
+            markdown_cache[manifest_input_path] = open_markdown(str(md_path))
         return markdown_cache[manifest_input_path]
 
     def _check_evidence(items: list[dict], context: str) -> None:
-        for item in items:
+        file_name = f"{context}.json"
+        for index, item in enumerate(items):
+            item_id = item.get("id")
+
+            def _issue(check: str, message: str, *path: str | int) -> None:
+                issues.add(
+                    f"{context}.{check}",
+                    f"{context}: {message}",
+                    file=file_name,
+                    item_id=item_id,
+                    path=_json_path(context, index, "evidence", *path),
+                )
+
             evidence_list = item.get("evidence", [])
             if not isinstance(evidence_list, list):
-                errors.append(f"{context}: evidence must be list")
+                _issue("evidence_not_list", "evidence must be list")
                 continue
-            for ev in evidence_list:
+            for ev_index, ev in enumerate(evidence_list):
                 input_file = ev.get("input_file")
                 line_start = ev.get("line_start")
                 line_end = ev.get("line_end")
                 quote = ev.get("quote")
                 if not isinstance(input_file, str):
-                    errors.append(f"{context}: evidence.input_file missing")
+                    _issue("evidence_file_missing", "evidence.input_file missing", ev_index, "input_file")
                     continue
                 if not isinstance(line_start, int) or not isinstance(line_end, int):
-                    errors.append(f"{context}: evidence line range invalid")
+                    _issue("evidence_range_invalid", "evidence line range invalid", ev_index)
                     continue
                 if line_start > line_end or line_start < 1:
-                    errors.append(f"{context}: evidence line range invalid")
+                    _issue("evidence_range_invalid", "evidence line range invalid", ev_index)
                     continue
                 md = _get_md()
                 if md is None:
                     continue
                 if line_end > md.n_lines:
-                    errors.append(f"{context}: evidence line range out of bounds")
+                    _issue("evidence_out_of_bounds", "evidence line range out of bounds", ev_index)
                     continue
                 expected = md.quote(line_start, line_end)
                 if quote != expected:
-                    errors.append(f"{context}: evidence quote mismatch")
+                    _issue("evidence_quote_mismatch", "evidence quote mismatch", ev_index, "quote")
 
     _check_evidence(use_cases, "use_cases")
     _check_evidence(policies, "policies")
 
-    for uc in use_cases:
+    def _field_issue(context: str, index: int, item: dict, field_name: str, check: str, message: str) -> None:
+        issues.add(
+            f"{context}.{check}",
+            f"{context}: {message}",
+            file=f"{context}.json",
+            item_id=item.get("id"),
+            path=_json_path(context, index, field_name),
+        )
+
+    for index, uc in enumerate(use_cases):
         if uc.get("case") not in ALLOWED_CASES:
-            errors.append("use_cases: case invalid")
+            _field_issue("use_cases", index, uc, "case", "case_invalid", "case invalid")
 
-    for pol in policies:
+    for index, pol in enumerate(policies):
         if pol.get("case") not in ALLOWED_CASES:
-            errors.append("policies: case invalid")
+            _field_issue("policies", index, pol, "case", "case_invalid", "case invalid")
         if pol.get("type") not in ALLOWED_POLICY_TYPES:
-            errors.append("policies: type invalid")
+            _field_issue("policies", index, pol, "type", "type_invalid", "type invalid")
 
-    for tc in test_cases:
+    for index, tc in enumerate(test_cases):
         if tc.get("case") not in ALLOWED_CASES:
-            errors.append("test_cases: case invalid")
+            _field_issue("test_cases", index, tc, "case", "case_invalid", "case invalid")
         if not isinstance(tc.get("parameters"), dict):
-            errors.append("test_cases: parameters must be object")
-
-    for ex in dataset:
-        evaluation = ex.get("evaluation_criteria", [])
-        if not isinstance(evaluation, list) or len(evaluation) < 3:
-            errors.append("dataset: evaluation_criteria must have at least 3 items")
+            _field_issue(
+                "test_cases", index, tc, "parameters", "parameters_not_object", "parameters must be object"
+            )
 
-        policy_ids = ex.get("policy_ids", [])
-        if not isinstance(policy_ids, list) or len(policy_ids) < 1:
-            errors.append("dataset: policy_ids must have at least 1 item")
-
-        input_obj = ex.get("input", {})
-        messages = input_obj.get("messages", []) if isinstance(input_obj, dict) else []
-        if not isinstance(messages, list):
-            errors.append("dataset: input.messages must be list")
-        else:
-            for msg in messages:
-                role = msg.get("role") if isinstance(msg, dict) else None
-                if role not in ALLOWED_ROLES:
-                    errors.append("dataset: message role invalid")
-
-        if ex.get("case") not in ALLOWED_CASES:
-            errors.append("dataset: case invalid")
-        fmt = ex.get("format")
-        if fmt not in ALLOWED_FORMATS:
-            errors.append("dataset: format invalid")
-        if fmt == "dialog_last_turn_correction":
-            tmi = input_obj.get("target_message_index") if isinstance(input_obj, dict) else None
-            if not isinstance(tmi, int):
-                errors.append("dataset: target_message_index required for dialog_last_turn_correction")
-            else:
-                if not isinstance(messages, list) or tmi < 0 or tmi >= len(messages):
-                    errors.append("dataset: target_message_index out of bounds")
-                else:
-                    last_operator_index = None
-                    for idx, msg in enumerate(messages):
-                        if isinstance(msg, dict) and msg.get("role") == "operator":
-                            last_operator_index = idx
-                    if last_operator_index is None or tmi != last_operator_index:
-                        errors.append("dataset: target_message_index must point to last operator message")
+    issues.extend(dataset_pass.example_issues)
 
+    phases.next("coverage")
     if counts["use_cases"] < 5:
-        errors.append("coverage: use_cases must be >= 5")
+        issues.add("coverage.use_cases", "coverage: use_cases must be >= 5", file="use_cases.json")
     if counts["policies"] < 5:
-        errors.append("coverage: policies must be >= 5")
+        issues.add("coverage.policies", "coverage: policies must be >= 5", file="policies.json")
 
     tc_by_uc: dict[str, list[dict]] = defaultdict(list)
     for tc in test_cases:
@@ -321,93 +756,58 @@ def validate_out_dir(out_dir: str | Path) -> tuple[bool, list[str], dict[str, in
         uc_id = uc.get("id")
         if isinstance(uc_id, str):
             if len(tc_by_uc.get(uc_id, [])) < 3:
-                errors.append(f"coverage: use_case {uc_id} must have >= 3 test cases")
-
-    ex_by_tc: dict[str, list[dict]] = defaultdict(list)
-    for ex in dataset:
-        tc_id = ex.get("test_case_id")
-        if isinstance(tc_id, str):
-            ex_by_tc[tc_id].append(ex)
+                issues.add(
+                    "coverage.use_case_test_cases",
+                    f"coverage: use_case {uc_id} must have >= 3 test cases",
+                    file="test_cases.json",
+                    item_id=uc_id,
+                )
 
     for tc in test_cases:
         tc_id = tc.get("id")
         if isinstance(tc_id, str):
-            if len(ex_by_tc.get(tc_id, [])) < 1:
-                errors.append(f"coverage: test_case {tc_id} must have >= 1 example")
-
-    sources_present = set()
-    support_examples = 0
-    unique_user_contents: set[str] = set()
-    unique_expected_outputs: set[str] = set()
-
-    def _primary_input_text(example: dict) -> str:
-        input_obj = example.get("input", {})
-        messages = input_obj.get("messages", []) if isinstance(input_obj, dict) else []
-        if not isinstance(messages, list):
-            return ""
-
-        if example.get("case") == "operator_quality":
-            for msg in reversed(messages):
-                if isinstance(msg, dict) and msg.get("role") == "operator":
-                    content = msg.get("content")
-                    return content if isinstance(content, str) else ""
-        else:
-            for msg in messages:
-                if isinstance(msg, dict) and msg.get("role") == "user":
-                    content = msg.get("content")
-                    return content if isinstance(content, str) else ""
-
-        for msg in messages:
-            if isinstance(msg, dict):
-                content = msg.get("content")
-                if isinstance(content, str):
-                    return content
-        return ""
-    for ex in dataset:
-        expected_output = ex.get("expected_output")
-        if isinstance(expected_output, str):
-            unique_expected_outputs.add(expected_output)
-
-        primary_text = _primary_input_text(ex)
-        if primary_text:
-            unique_user_contents.add(primary_text)
+            if tc_id not in dataset_pass.test_case_ids:
+                issues.add(
+                    "coverage.test_case_examples",
+                    f"coverage: test_case {tc_id} must have >= 1 example",
+                    file=dataset_path.name,
+                    item_id=tc_id,
+                )
 
-        if ex.get("case") == "support_bot":
-            support_examples += 1
-            metadata = ex.get("metadata", {})
-            source = metadata.get("source") if isinstance(metadata, dict) else None
-            if source not in SUPPORT_BOT_SOURCES:
-                errors.append("support_bot: metadata.source invalid")
-            else:
-                sources_present.add(source)
-        metadata = ex.get("metadata", {})
-        split = metadata.get("split") if isinstance(metadata, dict) else None
-        if split not in ALLOWED_SPLITS:
-            errors.append("dataset: metadata.split invalid")
+    issues.extend(dataset_pass.metadata_issues)
 
-    if support_examples > 0:
-        missing_sources = SUPPORT_BOT_SOURCES - sources_present
+    if dataset_pass.support_examples > 0:
+        missing_sources = SUPPORT_BOT_SOURCES - dataset_pass.sources_present
         if missing_sources:
-            errors.append(
-                "support_bot: missing sources " + ", ".join(sorted(missing_sources))
+            issues.add(
+                "support_bot.sources_missing",
+                "support_bot: missing sources " + ", ".join(sorted(missing_sources)),
+                file=dataset_path.name,
             )
 
-    if len(dataset) >= MIN_EXAMPLES_FOR_DIVERSITY_CHECK:
-        if len(unique_user_contents) < MIN_UNIQUE_USER_CONTENTS:
-            errors.append(
+    if dataset_pass.count >= MIN_EXAMPLES_FOR_DIVERSITY_CHECK:
+        if len(dataset_pass.unique_user_contents) < MIN_UNIQUE_USER_CONTENTS:
+            issues.add(
+                "dataset.diversity_inputs",
                 "dataset: not enough unique primary input texts "
-                f"(>= {MIN_UNIQUE_USER_CONTENTS} required)"
+                f"(>= {MIN_UNIQUE_USER_CONTENTS} required)",
+                file=dataset_path.name,
             )
-        if len(unique_expected_outputs) < MIN_UNIQUE_EXPECTED_OUTPUTS:
-            errors.append(
+        if len(dataset_pass.unique_expected_outputs) < MIN_UNIQUE_EXPECTED_OUTPUTS:
+            issues.add(
+                "dataset.diversity_outputs",
                 "dataset: not enough unique expected_output "
-                f"(>= {MIN_UNIQUE_EXPECTED_OUTPUTS} required)"
+                f"(>= {MIN_UNIQUE_EXPECTED_OUTPUTS} required)",
+                file=dataset_path.name,
             )
 
-    return len(errors) == 0, errors, counts
-
 
-def format_report(ok: bool, errors: list[str], counts: dict[str, int]) -> str:
+def format_report(
+    ok: bool,
+    errors: list[str],
+    counts: dict[str, int],
+    omitted: dict[str, int] | None = None,
+) -> str:
     lines = [
         f"use_cases: {counts.get('use_cases', 0)}",
         f"policies: {counts.get('policies', 0)}",
@@ -423,4 +823,6 @@ def format_report(ok: bool, errors: list[str], counts: dict[str, int]) -> str:
     if errors:
         lines.append("Errors:")
         lines.extend([f"- {err}" for err in errors])
+    if omitted:
+        lines.extend(f"- ... {n} more {code}" for code, n in omitted.items())
     return "\n".join(lines)
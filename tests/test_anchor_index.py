@@ -0,0 +1,59 @@
+import random
+from pathlib import Path
+
+from dataset_generator.core.markdown import MappedMarkdownDocument, MarkdownDocument
+from dataset_generator.extract.anchors import AnchorIndex, evidence_for_anchors
+
+
+def _naive_first_line(doc: MarkdownDocument, anchors: list[str]) -> int | None:
+    lowered_anchors = [a.lower() for a in anchors if a.strip()]
+    for idx, line in enumerate(doc.lines, start=1):
+        if any(anchor in line.lower() for anchor in lowered_anchors):
+            return idx
+    return None
+
+
+def test_anchor_index_matches_naive_scan(tmp_path: Path) -> None:
+    rng = random.Random(0)
+    alphabet = "абвгд ab"
+    lines = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30))) for _ in range(300)]
+    path = tmp_path / "doc.md"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    doc = MarkdownDocument.read(str(path))
+
+    anchor_lists = [
+        ["".join(rng.choice(alphabet + "АБ") for _ in range(rng.randint(1, 6))) for _ in range(3)]
+        for _ in range(200)
+    ]
+    anchor_lists.append(["   ", ""])
+    anchor_lists.append([])
+
+    index = AnchorIndex.for_document(doc)
+    assert index.first_lines(anchor_lists) == [
+        _naive_first_line(doc, anchors) for anchors in anchor_lists
+    ]
+    assert AnchorIndex.for_document(doc) is index
+
+
+def test_evidence_for_anchors_quotes_matched_line(tmp_path: Path) -> None:
+    path = tmp_path / "doc.md"
+    path.write_text("# FAQ\nВозврат в течение 14 дней\n", encoding="utf-8")
+    doc = MarkdownDocument.read(str(path))
+
+    found, missing = evidence_for_anchors(doc, [["ВОЗВРАТ"], ["доставка"]])
+
+    assert missing == []
+    assert found[0].line_start == found[0].line_end == 2
+    assert found[0].quote == "Возврат в течение 14 дней"
+    assert found[0].input_file == "doc.md"
+
+
+def test_evidence_for_anchors_on_mapped_document(tmp_path: Path) -> None:
+    path = tmp_path / "doc.md"
+    path.write_text("# FAQ\r\nВозврат в течение 14 дней\r\nДоставка курьером\r\n", encoding="utf-8")
+    anchor_lists = [["ДОСТАВКА"], ["возврат", "faq"], ["самовывоз"]]
+
+    with MappedMarkdownDocument.read(str(path)) as mapped:
+        assert evidence_for_anchors(mapped, anchor_lists) == evidence_for_anchors(
+            MarkdownDocument.read(str(path)), anchor_lists
+        )
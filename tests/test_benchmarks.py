@@ -0,0 +1,105 @@
+import json
+from pathlib import Path
+
+from benchmarks.compare import compare_results
+from benchmarks.compare import main as compare_main
+from benchmarks.run import main
+from benchmarks.specs import iter_spec_lines, write_spec
+from dataset_generator.core.markdown import MarkdownDocument
+from dataset_generator.extract.case_classifier import detect_case
+from dataset_generator.extract.support_parser import parse_support_faq, parse_support_tickets
+
+
+def test_specs_are_deterministic_and_sized(tmp_path: Path) -> None:
+    for case in ("support_bot", "operator_quality"):
+        first = list(iter_spec_lines(case, 500, seed=3))
+        assert first == list(iter_spec_lines(case, 500, seed=3))
+        assert first != list(iter_spec_lines(case, 500, seed=4))
+
+        doc = MarkdownDocument.read(str(write_spec(tmp_path / f"{case}.md", case, 500, seed=3)))
+        assert doc.n_lines == 500
+        assert detect_case(doc) == case
+
+    support = MarkdownDocument.read(str(tmp_path / "support_bot.md"))
+    tickets = parse_support_tickets(support)
+    assert parse_support_faq(support)
+    assert len({row["ticket_id"] for row in tickets}) == len(tickets) > 100
+
+
+def test_benchmark_results_file(tmp_path: Path) -> None:
+    out = tmp_path / "results.json"
+    assert main(["--lines", "300", "--no-memory", "--out", str(out)]) == 0
+
+    results = json.loads(out.read_text(encoding="utf-8"))
+    runs = {run["case"]: run for run in results["runs"]}
+    assert set(runs) == {"support_bot", "operator_quality"}
+    support_stages = set(runs["support_bot"]["stages"])
+    assert {"read", "parse_support_tickets", "generate_examples", "write"} <= support_stages
+    assert "validate_out_dir" in runs["operator_quality"]["stages"]
+    assert all(stage["wall_s"] >= 0 for stage in runs["support_bot"]["stages"].values())
+
+
+def _results(stages: dict) -> dict:
+    return {"settings": {}, "runs": [{"case": "support_bot", "lines": 1000, "stages": stages}]}
+
+
+def test_compare_flags_regressions_beyond_noise(tmp_path: Path) -> None:
+    baseline = _results(
+        {
+            "generate_examples": {"wall_s": 1.0, "iqr_s": 0.01, "tracemalloc_peak_mb": 10.0},
+            "validate_out_dir": {"wall_s": 1.0, "iqr_s": 0.5, "tracemalloc_peak_mb": 10.0},
+            "read": {"wall_s": 0.001, "iqr_s": 0.0},
+        }
+    )
+    current = _results(
+        {
+            "generate_examples": {"wall_s": 1.5, "iqr_s": 0.01, "tracemalloc_peak_mb": 10.2},
+            # As slow, but within the spread of the runs.
+            "validate_out_dir": {"wall_s": 1.4, "iqr_s": 0.1, "tracemalloc_peak_mb": 20.0},
+            # Doubled, but below the absolute noise floor.
+            "read": {"wall_s": 0.002, "iqr_s": 0.0},
+            "write": {"wall_s": 0.1, "iqr_s": 0.0},
+        }
+    )
+    rows = {(row.stage, row.metric): row for row in compare_results(baseline, current)}
+    assert rows["generate_examples", "wall_s"].status == "REGRESSED"
+    assert rows["generate_examples", "tracemalloc_peak_mb"].status == "ok"
+    assert rows["validate_out_dir", "wall_s"].status == "ok"
+    assert rows["validate_out_dir", "tracemalloc_peak_mb"].status == "REGRESSED"
+    assert rows["read", "wall_s"].status == "ok"
+    assert rows["write", "wall_s"].status == "new"
+    assert rows["generate_examples", "wall_s"].change == "+50.0%"
+
+    baseline_path = tmp_path / "baseline.json"
+    current_path = tmp_path / "current.json"
+    baseline_path.write_text(json.dumps(baseline), encoding="utf-8")
+    current_path.write_text(json.dumps(current), encoding="utf-8")
+    args = ["--baseline", str(baseline_path), "--current", str(current_path)]
+    assert compare_main(args) == 1
+    assert compare_main(args + ["--time-tolerance", "1", "--memory-tolerance", "1.5"]) == 0
+
+
+def test_compare_fails_on_missing_measurements(tmp_path: Path) -> None:
+    stage = {"wall_s": 1.0, "iqr_s": 0.0, "tracemalloc_peak_mb": 10.0}
+    baseline = _results({"read": stage, "write": stage})
+    baseline["runs"].append({"case": "operator_quality", "lines": 1000, "stages": {"read": stage}})
+    current = _results({"read": {"wall_s": 1.0, "iqr_s": 0.0}})
+
+    rows = {(row.case, row.stage, row.metric): row for row in compare_results(baseline, current)}
+    assert rows["support_bot", "read", "wall_s"].status == "ok"
+    assert rows["support_bot", "read", "tracemalloc_peak_mb"].status == "missing"
+    assert rows["support_bot", "write", "wall_s"].status == "missing"
+    assert rows["operator_quality", "read", "wall_s"].status == "missing"
+
+    baseline_path = tmp_path / "baseline.json"
+    current_path = tmp_path / "current.json"
+    baseline_path.write_text(json.dumps(baseline), encoding="utf-8")
+    current_path.write_text(json.dumps(current), encoding="utf-8")
+    args = ["--baseline", str(baseline_path), "--current", str(current_path)]
+    assert compare_main(args) == 1
+    assert compare_main(args + ["--allow-missing"]) == 0
+
+    # Runs left out with --case are not expected.
+    current_path.write_text(json.dumps(_results({"read": stage, "write": stage})), encoding="utf-8")
+    assert compare_main(args) == 1
+    assert compare_main(args + ["--case", "support_bot"]) == 0
@@ -1,4 +1,5 @@
 import json
+import os
 import subprocess
 import sys
 from pathlib import Path
@@ -21,10 +22,14 @@ def test_cli_generate_without_subcommand(tmp_path: Path) -> None:
         ],
         capture_output=True,
         text=True,
+        env={**os.environ, "XDG_CACHE_HOME": str(tmp_path / "cache")},
     )
     assert result.returncode == 0, result.stderr
     manifest = json.loads((out_dir / "run_manifest.json").read_text(encoding="utf-8"))
     assert manifest["input_path"] == str(input_path)
+    # Caches are opt-in, so a plain run neither reads nor writes them.
+    assert not (tmp_path / "cache").exists()
+    assert "stage_cache" not in manifest["metrics"]
 
 
 def test_cli_validate_subcommand(tmp_path: Path) -> None:
@@ -0,0 +1,124 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from dataset_generator.core.markdown import MarkdownDocument
+from dataset_generator.extract.drafts import DraftStats, chunk_document, extract_drafts
+
+
+def _write_doc(tmp_path: Path, n_sections: int) -> MarkdownDocument:
+    lines = []
+    for i in range(n_sections):
+        lines.append(f"## Раздел {i}")
+        lines.extend(f"Строка {i}.{j} с описанием правила" for j in range(20))
+    path = tmp_path / "big.md"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return MarkdownDocument.read(str(path))
+
+
+class SectionEchoLLMClient:
+    model = "dummy"
+
+    def __init__(self) -> None:
+        self.prompts: list[str] = []
+
+    def chat(self, messages, model, temperature, json_mode):
+        chunk = messages[-1]["content"].split("\n\n", 1)[1]
+        self.prompts.append(chunk)
+        headers = [line for line in chunk.splitlines() if line.startswith("## ")]
+        return json.dumps(
+            {
+                "use_cases": [
+                    {"name": header[3:], "description": "d", "anchor_phrases": [header]}
+                    for header in headers
+                ]
+                + [{"name": "Общий сценарий", "description": "d", "anchor_phrases": ["Раздел"]}],
+                "policies": [
+                    {"statement": "Бот  должен быть вежлив.", "type": "style", "anchor_phrases": []}
+                ],
+            },
+            ensure_ascii=False,
+        )
+
+
+def test_chunks_follow_sections_and_cover_document(tmp_path: Path) -> None:
+    doc = _write_doc(tmp_path, n_sections=200)
+    chunks = chunk_document(doc, max_tokens=500)
+
+    assert len(chunks) > 1
+    assert all(chunk.startswith("## Раздел") for chunk in chunks)
+    assert "\n".join(chunks).splitlines() == doc.lines
+
+
+def test_small_document_is_a_single_chunk(tmp_path: Path) -> None:
+    doc = _write_doc(tmp_path, n_sections=2)
+    assert chunk_document(doc) == ["\n".join(doc.lines)]
+
+
+def test_extract_drafts_merges_chunks_beyond_2000_lines(tmp_path: Path) -> None:
+    doc = _write_doc(tmp_path, n_sections=200)
+    assert doc.n_lines > 2000
+
+    client = SectionEchoLLMClient()
+    use_cases, policies = extract_drafts(
+        doc, client, "support_bot", seed=1, max_chunk_tokens=500, concurrency=4
+    )
+
+    assert len(client.prompts) > 1
+    names = [uc.name for uc in use_cases]
+    assert [n for n in names if n.startswith("Раздел")] == [f"Раздел {i}" for i in range(200)]
+    assert names.count("Общий сценарий") == 1
+    assert len(policies) == 1
+
+
+class FailingChunkLLMClient(SectionEchoLLMClient):
+    def __init__(self, failing_header: str | None) -> None:
+        super().__init__()
+        self.failing_header = failing_header
+
+    def chat(self, messages, model, temperature, json_mode):
+        chunk = messages[-1]["content"]
+        if self.failing_header is None or f"{self.failing_header}\n" in chunk:
+            raise RuntimeError("Ollama server unavailable")
+        return super().chat(messages, model, temperature, json_mode)
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_failed_chunk_keeps_drafts_of_other_chunks(tmp_path: Path, concurrency: int) -> None:
+    doc = _write_doc(tmp_path, n_sections=200)
+    client = FailingChunkLLMClient("## Раздел 100")
+    stats = DraftStats()
+
+    use_cases, _ = extract_drafts(
+        doc,
+        client,
+        "support_bot",
+        seed=1,
+        max_chunk_tokens=500,
+        concurrency=concurrency,
+        stats=stats,
+    )
+
+    names = {uc.name for uc in use_cases}
+    assert stats.chunks == len(chunk_document(doc, max_tokens=500))
+    assert stats.failed_chunks == 1
+    assert "Раздел 100" not in names
+    assert {"Раздел 0", "Раздел 199"} <= names
+
+
+def test_extract_drafts_raises_when_every_chunk_fails(tmp_path: Path) -> None:
+    doc = _write_doc(tmp_path, n_sections=200)
+    stats = DraftStats()
+
+    with pytest.raises(RuntimeError):
+        extract_drafts(
+            doc,
+            FailingChunkLLMClient(None),
+            "support_bot",
+            seed=1,
+            max_chunk_tokens=500,
+            concurrency=4,
+            stats=stats,
+        )
+    assert stats.failed_chunks == stats.chunks > 1
@@ -0,0 +1,82 @@
+import json
+from pathlib import Path
+
+import httpx
+
+from dataset_generator.pipeline import PipelineConfig, run_pipeline
+from dataset_generator.validate.validator import validate_out_dir
+from tools.fake_llm_server import Latency, ServerConfig, serve_in_thread
+
+
+def _config(input_name: str, out_dir: Path, base_url: str, **overrides) -> PipelineConfig:
+    options = dict(
+        input_path=str(Path("examples") / input_name),
+        out_dir=str(out_dir),
+        seed=3,
+        case="auto",
+        n_use_cases=5,
+        n_test_cases_per_uc=3,
+        n_examples_per_tc=2,
+        llm_provider="ollama",
+        llm_model=None,
+        ollama_base_url=base_url,
+        llm_temperature=0.2,
+    )
+    options.update(overrides)
+    return PipelineConfig(**options)
+
+
+def _stats(server) -> dict:
+    return httpx.get(f"http://127.0.0.1:{server.port}/stats").json()
+
+
+def test_llm_path_against_fake_server(tmp_path: Path) -> None:
+    config = ServerConfig(latency=Latency.parse("uniform:0.001,0.01"), max_concurrency=2)
+    with serve_in_thread(config) as server:
+        for input_name in (
+            "example_input_raw_support_faq_and_tickets.md",
+            "example_input_raw_operator_quality_checks.md",
+        ):
+            out_dir = tmp_path / input_name
+            run_pipeline(
+                _config(
+                    input_name, out_dir, server.base_url, llm_concurrency=4, llm_batch_size=2
+                )
+            )
+            ok, errors, _ = validate_out_dir(out_dir)
+            assert ok, errors
+
+            manifest = json.loads((out_dir / "run_manifest.json").read_text(encoding="utf-8"))
+            assert manifest["llm"]["provider"] == "ollama"
+            assert manifest["metrics"]["llm"]["fallbacks"] == {
+                "extract": False,
+                "expected_outputs": 0,
+            }
+        stats = _stats(server)
+
+    assert stats["drafts"] >= 2
+    assert stats["batch_expected_output"] > 0
+    assert stats["max_in_flight"] == 2
+
+
+def test_failing_server_falls_back_to_heuristics(tmp_path: Path) -> None:
+    out_dir = tmp_path / "out"
+    with serve_in_thread(ServerConfig(error_rate=1.0)) as server:
+        run_pipeline(
+            _config(
+                "example_input_raw_support_faq_and_tickets.md",
+                out_dir,
+                server.base_url,
+                llm_max_retries=0,
+                llm_breaker_threshold=2,
+            )
+        )
+        stats = _stats(server)
+
+    ok, errors, _ = validate_out_dir(out_dir)
+    assert ok, errors
+    manifest = json.loads((out_dir / "run_manifest.json").read_text(encoding="utf-8"))
+    assert manifest["llm"]["provider"] == "none"
+    assert manifest["metrics"]["llm"]["fallbacks"]["extract"] is True
+    # Extraction fails, so expected outputs are never asked of the LLM.
+    assert stats["requests"] == stats["errors"] == 1
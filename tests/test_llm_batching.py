@@ -0,0 +1,74 @@
+import json
+from pathlib import Path
+
+from dataset_generator.core.models import Policy, TestCase, UseCase
+from dataset_generator.generate.dataset import generate_examples
+
+
+class BatchingLLMClient:
+    model = "dummy"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    @staticmethod
+    def _answer(message: str) -> str:
+        return f"Ответ на сообщение длиной {len(message)}"
+
+    def chat(self, messages, model, temperature, json_mode):
+        self.calls += 1
+        user = messages[-1]["content"]
+        if user.startswith("Сообщение пользователя: "):
+            message = user.split("\n", 1)[0].removeprefix("Сообщение пользователя: ")
+            return {"expected_output": self._answer(message)}
+        items = json.loads(user)
+        # Skip the first item of every batch to exercise the per-item fallback.
+        return {
+            "items": [
+                {"id": item["id"], "expected_output": self._answer(item["message"])}
+                for item in items[1:]
+            ]
+        }
+
+
+def _generate(llm_client, batch_size: int):
+    use_cases = [UseCase(id="uc_1", case="support_bot", name="UC", description="d", evidence=[])]
+    policies = [Policy(id="pol_1", case="support_bot", type="must", statement="s", evidence=[])]
+    test_cases = [
+        TestCase(
+            id=f"tc_{i}",
+            case="support_bot",
+            use_case_id="uc_1",
+            parameters={"axis": "tone"},
+            policy_ids=["pol_1"],
+            description="Test case focusing on axis: tone",
+        )
+        for i in range(1, 7)
+    ]
+    return generate_examples(
+        "support_bot",
+        test_cases,
+        use_cases,
+        policies,
+        n_per_tc=2,
+        seed=1,
+        input_path=str(Path("examples") / "example_input_raw_support_faq_and_tickets.md"),
+        llm_client=llm_client,
+        llm_batch_size=batch_size,
+    )
+
+
+def test_batched_expected_outputs_fall_back_per_item() -> None:
+    single_client = BatchingLLMClient()
+    single = _generate(single_client, batch_size=1)
+    batched_client = BatchingLLMClient()
+    batched = _generate(batched_client, batch_size=4)
+
+    assert single_client.calls == 12
+    assert batched_client.calls == 3
+    assert [ex.id for ex in batched] == [ex.id for ex in single]
+    for idx, (got, want) in enumerate(zip(batched, single)):
+        if idx % 4 == 0:
+            assert not got.expected_output.startswith("Ответ на сообщение")
+        else:
+            assert got.expected_output == want.expected_output
@@ -0,0 +1,119 @@
+import json
+from pathlib import Path
+
+from dataset_generator.llm.cache import CachedLLMClient
+from dataset_generator.pipeline import PipelineConfig, run_pipeline
+
+
+class CountingLLMClient:
+    model = "dummy"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def chat(self, messages, model, temperature, json_mode):
+        self.calls += 1
+        user = messages[-1]["content"]
+        if "Сообщение пользователя" in user:
+            return {"expected_output": f"Ответ {len(user)}"}
+        return {"use_cases": [], "policies": []}
+
+
+def _chat(client, text: str, temperature: float = 0.2):
+    return client.chat(
+        messages=[{"role": "user", "content": text}],
+        model="dummy",
+        temperature=temperature,
+        json_mode=True,
+    )
+
+
+def test_cache_hits_and_key_fields(tmp_path: Path) -> None:
+    inner = CountingLLMClient()
+    cache = CachedLLMClient(inner, path=tmp_path / "cache.sqlite3")
+
+    first = _chat(cache, "a")
+    assert _chat(cache, "a") == first
+    _chat(cache, "a", temperature=0.7)
+
+    assert inner.calls == 2
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+    cache.close()
+
+    reopened = CachedLLMClient(CountingLLMClient(), path=tmp_path / "cache.sqlite3")
+    assert _chat(reopened, "a") == first
+    assert reopened.client.calls == 0
+    reopened.close()
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    inner = CountingLLMClient()
+    cache = CachedLLMClient(inner, path=tmp_path / "cache.sqlite3", max_entries=2)
+
+    _chat(cache, "a")
+    _chat(cache, "b")
+    _chat(cache, "a")
+    _chat(cache, "c")
+
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 2
+    calls = inner.calls
+    _chat(cache, "a")
+    assert inner.calls == calls
+    _chat(cache, "b")
+    assert inner.calls == calls + 1
+    cache.close()
+
+
+def test_pipeline_rerun_served_from_cache(tmp_path: Path, monkeypatch) -> None:
+    from dataset_generator import pipeline as pipeline_module
+
+    inner = CountingLLMClient()
+    monkeypatch.setattr(pipeline_module, "get_llm_client", lambda *args, **kwargs: inner)
+
+    def _run(name: str) -> dict:
+        out_dir = tmp_path / name
+        config = PipelineConfig(
+            input_path=str(Path("examples") / "example_input_raw_support_faq_and_tickets.md"),
+            out_dir=str(out_dir),
+            seed=42,
+            case="auto",
+            n_use_cases=5,
+            n_test_cases_per_uc=3,
+            n_examples_per_tc=1,
+            llm_provider="ollama",
+            llm_model=None,
+            ollama_base_url=None,
+            llm_temperature=0.2,
+            llm_cache=True,
+            llm_cache_path=str(tmp_path / "cache.sqlite3"),
+        )
+        run_pipeline(config)
+        return json.loads((out_dir / "run_manifest.json").read_text(encoding="utf-8"))
+
+    first = _run("first")
+    calls = inner.calls
+    second = _run("second")
+
+    assert inner.calls == calls
+    assert first["llm"]["cache"]["hits"] == 0
+    assert second["llm"]["cache"]["misses"] == 0
+    assert second["llm"]["cache"]["hits"] == first["llm"]["cache"]["misses"]
+
+
+def test_cache_size_shared_between_clients(tmp_path: Path) -> None:
+    path = tmp_path / "cache.sqlite3"
+    first = CachedLLMClient(CountingLLMClient(), path=path, max_entries=2)
+    second = CachedLLMClient(CountingLLMClient(), path=path, max_entries=2)
+
+    _chat(first, "a")
+    _chat(second, "b")
+    _chat(first, "c")
+
+    assert first.stats()["evictions"] == 1
+    assert second.stats()["entries"] == 2
+    _chat(second, "c")
+    assert second.client.calls == 1
+    first.close()
+    second.close()
@@ -1,9 +1,12 @@
-﻿import types
+﻿import asyncio
+import types
 
 import pytest
 
+from dataset_generator.llm.base import aclose_llm_client
 from dataset_generator.llm.factory import get_llm_client
 from dataset_generator.llm.ollama_client import OllamaClient
+from tools.fake_llm_server import serve_in_thread
 
 
 class _FakeCompletions:
@@ -35,3 +38,63 @@ def test_ollama_unavailable_error(monkeypatch):
 def test_provider_none_no_ollama_required():
     client = get_llm_client("none")
     assert client is not None
+
+
+class _CountingOpenAI:
+    instances: list["_CountingOpenAI"] = []
+
+    def __init__(self, *args, **kwargs):
+        self.kwargs = kwargs
+        self.closed = False
+        self.chat = types.SimpleNamespace(completions=self)
+        _CountingOpenAI.instances.append(self)
+
+    def create(self, *args, **kwargs):
+        message = types.SimpleNamespace(content='{"ok": true}')
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+    def close(self):
+        self.closed = True
+
+
+def test_ollama_client_reuses_pooled_connection(monkeypatch):
+    _CountingOpenAI.instances = []
+    fake_openai = types.SimpleNamespace(OpenAI=_CountingOpenAI)
+    monkeypatch.setitem(__import__("sys").modules, "openai", fake_openai)
+
+    with OllamaClient(base_url="http://localhost:11434/v1/", model="m", timeout=3.0) as client:
+        for _ in range(3):
+            assert client.chat(messages=[], json_mode=True) == {"ok": True}
+        assert len(_CountingOpenAI.instances) == 1
+        assert _CountingOpenAI.instances[0].kwargs["timeout"] == 3.0
+
+    assert _CountingOpenAI.instances[0].closed
+
+
+def test_ollama_client_close_closes_pooled_clients():
+    messages = [{"role": "user", "content": "ping"}]
+    with serve_in_thread() as server:
+        client = OllamaClient(base_url=server.base_url, model="fake")
+        client.chat(messages=messages)
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(client.achat(messages=messages))
+            sync_client = client._client
+            async_client = client._async_clients[loop]
+            client.close()
+            assert sync_client.is_closed()
+            assert async_client.is_closed()
+        finally:
+            loop.close()
+
+
+def test_ollama_client_aclose_closes_pool_of_running_loop():
+    async def run(client: OllamaClient):
+        await client.achat(messages=[{"role": "user", "content": "ping"}])
+        async_client = client._async_clients[asyncio.get_running_loop()]
+        await aclose_llm_client(client)
+        return async_client
+
+    with serve_in_thread() as server:
+        async_client = asyncio.run(run(OllamaClient(base_url=server.base_url, model="fake")))
+    assert async_client.is_closed()
@@ -0,0 +1,64 @@
+import asyncio
+import json
+from pathlib import Path
+
+from dataset_generator.pipeline import PipelineConfig, run_pipeline
+
+
+class AsyncDummyLLMClient:
+    model = "dummy"
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @staticmethod
+    def _reply(messages) -> dict:
+        user = messages[-1]["content"]
+        if "Сообщение пользователя" not in user:
+            return {"use_cases": [], "policies": []}
+        return {"expected_output": f"Ответ номер {len(user)}"}
+
+    def chat(self, messages, model, temperature, json_mode):
+        return self._reply(messages)
+
+    async def achat(self, messages, model, temperature, json_mode):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        return self._reply(messages)
+
+
+def _run(tmp_path: Path, monkeypatch, name: str, concurrency: int) -> tuple[str, AsyncDummyLLMClient]:
+    from dataset_generator import pipeline as pipeline_module
+
+    client = AsyncDummyLLMClient()
+    monkeypatch.setattr(pipeline_module, "get_llm_client", lambda *args, **kwargs: client)
+    out_dir = tmp_path / name
+    config = PipelineConfig(
+        input_path=str(Path("examples") / "example_input_raw_support_faq_and_tickets.md"),
+        out_dir=str(out_dir),
+        seed=42,
+        case="auto",
+        n_use_cases=5,
+        n_test_cases_per_uc=3,
+        n_examples_per_tc=4,
+        llm_provider="ollama",
+        llm_model=None,
+        ollama_base_url=None,
+        llm_temperature=0.2,
+        llm_concurrency=concurrency,
+    )
+    run_pipeline(config)
+    return (out_dir / "dataset.json").read_text(encoding="utf-8"), client
+
+
+def test_concurrent_generation_is_byte_identical(tmp_path: Path, monkeypatch) -> None:
+    sequential, _ = _run(tmp_path, monkeypatch, "seq", concurrency=1)
+    concurrent, client = _run(tmp_path, monkeypatch, "conc", concurrency=8)
+
+    assert concurrent == sequential
+    assert 1 < client.max_in_flight <= 8
+    outputs = {ex["expected_output"] for ex in json.loads(concurrent)["examples"]}
+    assert any(out.startswith("Ответ номер") for out in outputs)
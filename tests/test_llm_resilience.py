@@ -0,0 +1,172 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from dataset_generator.llm.ollama_client import OllamaClient
+from dataset_generator.llm.resilience import CircuitOpenError, ResilientLLMClient
+from dataset_generator.pipeline import PipelineConfig, run_pipeline
+from tools.fake_llm_server import ServerConfig, serve_in_thread
+
+
+class FlakyLLMClient:
+    model = "dummy"
+
+    def __init__(self, failures: int, exc: Exception | None = None) -> None:
+        self.failures = failures
+        self.exc = exc or RuntimeError("Ollama server unavailable")
+        self.calls = 0
+
+    def chat(self, messages, model, temperature, json_mode):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.exc
+        return {"ok": True}
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _chat(client):
+    return client.chat(messages=[], model="dummy", temperature=0.2, json_mode=True)
+
+
+def test_retries_transient_errors_with_backoff() -> None:
+    sleeps: list[float] = []
+    client = ResilientLLMClient(
+        FlakyLLMClient(failures=2), max_retries=2, backoff_base=1.0, sleep=sleeps.append
+    )
+
+    assert _chat(client) == {"ok": True}
+    assert client.stats()["retries"] == 2
+    assert len(sleeps) == 2
+    assert 0.0 <= sleeps[0] <= 1.0
+    assert 0.0 <= sleeps[1] <= 2.0
+
+
+def test_non_transient_errors_are_not_retried() -> None:
+    inner = FlakyLLMClient(failures=1, exc=ValueError("Invalid JSON response"))
+    client = ResilientLLMClient(inner, max_retries=3, sleep=lambda _: None)
+
+    with pytest.raises(ValueError):
+        _chat(client)
+    assert inner.calls == 1
+    assert client.stats()["retries"] == 0
+
+
+@pytest.mark.parametrize(("status", "attempts"), [(404, 1), (401, 1), (429, 3), (503, 3)])
+def test_http_status_of_wrapped_sdk_error_decides_retry(status: int, attempts: int) -> None:
+    config = ServerConfig(error_rate=1.0, error_status=status)
+    with serve_in_thread(config) as server:
+        with OllamaClient(base_url=server.base_url, model="fake") as ollama:
+            client = ResilientLLMClient(
+                ollama, max_retries=2, failure_threshold=1, sleep=lambda _: None
+            )
+            with pytest.raises(RuntimeError, match="Ollama server unavailable"):
+                _chat(client)
+        stats = dict(server.stats)
+
+    assert stats["requests"] == attempts
+    assert client.state == ("open" if attempts > 1 else "closed")
+
+
+def test_breaker_opens_and_recovers_after_reset_timeout() -> None:
+    clock = FakeClock()
+    inner = FlakyLLMClient(failures=3)
+    client = ResilientLLMClient(
+        inner,
+        max_retries=0,
+        failure_threshold=3,
+        reset_timeout=10.0,
+        clock=clock,
+        sleep=lambda _: None,
+    )
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            _chat(client)
+    assert client.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        _chat(client)
+    assert inner.calls == 3
+
+    clock.now = 11.0
+    assert client.state == "half_open"
+    assert _chat(client) == {"ok": True}
+    assert client.state == "closed"
+    stats = client.stats()
+    assert stats["breaker_trips"] == 1
+    assert stats["short_circuited"] == 1
+
+
+def test_pipeline_skips_llm_once_breaker_is_open(tmp_path: Path, monkeypatch) -> None:
+    from dataset_generator import pipeline as pipeline_module
+
+    class DeadAfterExtractionClient:
+        model = "dummy"
+
+        def __init__(self) -> None:
+            self.calls = 0
+
+        def chat(self, messages, model, temperature, json_mode):
+            self.calls += 1
+            if "Сообщение пользователя" in messages[-1]["content"]:
+                raise RuntimeError("Ollama server unavailable")
+            return {"use_cases": [], "policies": []}
+
+    inner = DeadAfterExtractionClient()
+    monkeypatch.setattr(pipeline_module, "get_llm_client", lambda *args, **kwargs: inner)
+    out_dir = tmp_path / "out"
+    config = PipelineConfig(
+        input_path=str(Path("examples") / "example_input_raw_support_faq_and_tickets.md"),
+        out_dir=str(out_dir),
+        seed=1,
+        case="auto",
+        n_use_cases=5,
+        n_test_cases_per_uc=3,
+        n_examples_per_tc=2,
+        llm_provider="ollama",
+        llm_model=None,
+        ollama_base_url=None,
+        llm_temperature=0.2,
+        llm_max_retries=0,
+        llm_breaker_threshold=3,
+    )
+    run_pipeline(config)
+
+    manifest = json.loads((out_dir / "run_manifest.json").read_text(encoding="utf-8"))
+    resilience = manifest["llm"]["resilience"]
+    assert inner.calls == 1 + 3
+    assert resilience["breaker_trips"] == 1
+    assert resilience["short_circuited"] == 30 - 3
+    assert resilience["state"] == "open"
+
+
+def test_pipeline_passes_breaker_settings(tmp_path: Path, monkeypatch) -> None:
+    from dataset_generator import pipeline as pipeline_module
+
+    monkeypatch.setattr(pipeline_module, "get_llm_client", lambda *args, **kwargs: FlakyLLMClient(0))
+    config = PipelineConfig(
+        input_path=str(Path("examples") / "example_input_raw_support_faq_and_tickets.md"),
+        out_dir=str(tmp_path / "out"),
+        seed=1,
+        case="auto",
+        n_use_cases=5,
+        n_test_cases_per_uc=3,
+        n_examples_per_tc=2,
+        llm_provider="ollama",
+        llm_model=None,
+        ollama_base_url=None,
+        llm_temperature=0.2,
+        llm_breaker_threshold=4,
+        llm_breaker_reset=1.5,
+    )
+    _, layers = pipeline_module._build_llm_client(config)
+    resilience = layers["resilience"]
+    assert (resilience.failure_threshold, resilience.reset_timeout) == (4, 1.5)
@@ -0,0 +1,61 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from dataset_generator.llm.transcript import TranscriptMissError
+from dataset_generator.pipeline import PipelineConfig, run_pipeline
+from tools.fake_llm_server import ServerConfig, serve_in_thread
+
+
+def _config(out_dir: Path, transcript: Path, mode: str, base_url=None, seed=3) -> PipelineConfig:
+    return PipelineConfig(
+        input_path=str(Path("examples") / "example_input_raw_support_faq_and_tickets.md"),
+        out_dir=str(out_dir),
+        seed=seed,
+        case="auto",
+        n_use_cases=5,
+        n_test_cases_per_uc=3,
+        n_examples_per_tc=2,
+        llm_provider="ollama",
+        llm_model=None,
+        ollama_base_url=base_url,
+        llm_temperature=0.2,
+        llm_batch_size=2,
+        llm_max_retries=0,
+        llm_transcript=str(transcript),
+        llm_transcript_mode=mode,
+    )
+
+
+def test_replay_reproduces_recorded_run(tmp_path: Path) -> None:
+    transcript = tmp_path / "transcript.jsonl"
+    with serve_in_thread(ServerConfig(error_rate=0.3, seed=2)) as server:
+        run_pipeline(_config(tmp_path / "recorded", transcript, "record", server.base_url))
+    entries = [json.loads(line) for line in transcript.read_text(encoding="utf-8").splitlines()]
+    assert any("error" in entry for entry in entries)
+    assert any("response" in entry for entry in entries)
+
+    # No server: every answer, failures included, comes from the transcript.
+    run_pipeline(_config(tmp_path / "replayed", transcript, "replay"))
+    for name in ("use_cases.json", "policies.json", "test_cases.json", "dataset.json"):
+        recorded = (tmp_path / "recorded" / name).read_bytes()
+        assert (tmp_path / "replayed" / name).read_bytes() == recorded, name
+
+    manifest = json.loads((tmp_path / "replayed" / "run_manifest.json").read_text("utf-8"))
+    assert manifest["llm"]["transcript"] == {
+        "path": str(transcript),
+        "mode": "replay",
+        "hits": len(entries),
+        "misses": 0,
+    }
+
+
+def test_replay_fails_on_missing_request(tmp_path: Path) -> None:
+    transcript = tmp_path / "transcript.jsonl"
+    with serve_in_thread() as server:
+        run_pipeline(_config(tmp_path / "recorded", transcript, "record", server.base_url))
+
+    with pytest.raises(TranscriptMissError):
+        run_pipeline(_config(tmp_path / "replayed", transcript, "replay", seed=4))
+    assert not (tmp_path / "replayed" / "run_manifest.json").exists()
@@ -0,0 +1,45 @@
+from pathlib import Path
+
+import pytest
+
+from dataset_generator.core.markdown import (
+    MappedMarkdownDocument,
+    MarkdownDocument,
+    open_markdown,
+)
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "# Заголовок\nСтрока один\n\nСтрока три\n".encode("utf-8"),
+        "# Заголовок\r\nСтрока один\r\n\r\nбез перевода в конце".encode("utf-8"),
+        "# Заголовок\nПравила поддержки\n".encode("cp1251"),
+        b"",
+    ],
+)
+def test_mapped_document_matches_eager_read(tmp_path: Path, raw: bytes) -> None:
+    path = tmp_path / "doc.md"
+    path.write_bytes(raw)
+
+    eager = MarkdownDocument.read(str(path))
+    with MappedMarkdownDocument.read(str(path)) as mapped:
+        assert mapped.n_lines == eager.n_lines
+        assert list(mapped.lines) == eager.lines
+        assert mapped.lines[1:3] == eager.lines[1:3]
+        for start in range(1, eager.n_lines + 1):
+            for end in range(start, eager.n_lines + 1):
+                assert mapped.quote(start, end) == eager.quote(start, end)
+        with pytest.raises(ValueError):
+            mapped.quote(1, eager.n_lines + 1)
+
+
+def test_open_markdown_maps_large_files(tmp_path: Path) -> None:
+    path = tmp_path / "doc.md"
+    path.write_text("# Заголовок\nТекст\n", encoding="utf-8")
+
+    assert isinstance(open_markdown(str(path)), MarkdownDocument)
+    mapped = open_markdown(str(path), mmap_threshold=1)
+    assert isinstance(mapped, MappedMarkdownDocument)
+    assert mapped.lines[-1] == "Текст"
+    mapped.close()
@@ -0,0 +1,91 @@
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+from dataset_generator import pipeline as pipeline_module
+from dataset_generator.metrics import RunMetrics, percentiles
+from dataset_generator.pipeline import PipelineConfig, run_pipeline
+from dataset_generator.validate.validator import validate_out_dir
+
+
+class FlakyLLMClient:
+    """No drafts; every other expected output request fails."""
+
+    model = "dummy"
+
+    def __init__(self) -> None:
+        self.requests = 0
+
+    def chat(self, messages, model, temperature, json_mode):
+        if "expected_output" not in messages[0]["content"]:
+            return {"use_cases": [], "policies": []}
+        self.requests += 1
+        if self.requests % 2 == 0:
+            raise ValueError("bad reply")
+        return {"expected_output": f"Ответ {self.requests}"}
+
+
+def test_percentiles_nearest_rank() -> None:
+    values = [float(v) for v in range(100, 0, -1)]
+    assert percentiles(values) == {"p50": 50.0, "p95": 95.0, "p99": 99.0}
+    assert percentiles([]) == {}
+
+
+def test_nested_stages_exclude_inner_time() -> None:
+    metrics = RunMetrics()
+    tracemalloc.start()
+    try:
+        with metrics.stage("outer"):
+            with metrics.stage("inner"):
+                buffer = bytearray(4 * 2**20)
+                time.sleep(0.05)
+                del buffer
+    finally:
+        tracemalloc.stop()
+
+    stages = metrics.to_dict()["stages"]
+    assert stages["inner"]["wall_s"] >= 0.05
+    assert stages["outer"]["wall_s"] < 0.05
+    assert stages["inner"]["tracemalloc_peak_mb"] >= 4
+    assert stages["outer"]["tracemalloc_peak_mb"] < 4
+
+
+def test_manifest_records_stage_and_llm_metrics(tmp_path, monkeypatch) -> None:
+    client = FlakyLLMClient()
+    monkeypatch.setattr(pipeline_module, "get_llm_client", lambda *a, **k: client)
+    out_dir = tmp_path / "out"
+    config = PipelineConfig(
+        input_path=str(Path("examples") / "example_input_raw_support_faq_and_tickets.md"),
+        out_dir=str(out_dir),
+        seed=5,
+        case="auto",
+        n_use_cases=5,
+        n_test_cases_per_uc=3,
+        n_examples_per_tc=2,
+        llm_provider="ollama",
+        llm_model=None,
+        ollama_base_url=None,
+        llm_temperature=0.2,
+    )
+    run_pipeline(config)
+
+    manifest = json.loads((out_dir / "run_manifest.json").read_text(encoding="utf-8"))
+    metrics = manifest["metrics"]
+    assert {"read", "classify", "extract", "pad", "test_cases", "examples", "write"} <= set(
+        metrics["stages"]
+    )
+    assert all(stage["wall_s"] >= 0 for stage in metrics["stages"].values())
+
+    llm = metrics["llm"]
+    assert llm["expected_outputs_requested"] == 30
+    assert llm["fallbacks"] == {"extract": False, "expected_outputs": 15}
+    assert llm["failures"] == 15
+    assert llm["latency_ms"]["count"] == llm["calls"]
+    assert llm["latency_ms"]["p50"] <= llm["latency_ms"]["p99"] <= llm["latency_ms"]["max"]
+    assert validate_out_dir(out_dir)[0]
+
+    # Manifests written before the metrics block still validate.
+    del manifest["metrics"]
+    (out_dir / "run_manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+    assert validate_out_dir(out_dir)[0]
@@ -0,0 +1,103 @@
+from pathlib import Path
+
+import pytest
+
+import dataset_generator.generate.dataset as dataset_module
+from dataset_generator.core.ids import IdFactory, nth_id
+from dataset_generator.core.models import Policy, TestCase, UseCase
+from dataset_generator.generate.dataset import (
+    VirtualDataset,
+    generate_example,
+    generate_examples,
+    generated_test_cases,
+    iter_examples,
+    shard_bounds,
+)
+
+
+def _args(case: str) -> dict:
+    use_cases = [UseCase(id="uc_1", case=case, name="UC", description="d", evidence=[])]
+    policies = [Policy(id="pol_1", case=case, type="must", statement="s", evidence=[])]
+    # Repeated test case ids make several test cases share id bases.
+    test_cases = [
+        TestCase(
+            id=f"tc_{i % 3}",
+            case=case,
+            use_case_id="uc_1",
+            parameters={"axis": "tone"},
+            policy_ids=["pol_1"],
+            description="Test case focusing on axis: tone",
+        )
+        for i in range(7)
+    ]
+    input_name = (
+        "example_input_raw_support_faq_and_tickets.md"
+        if case == "support_bot"
+        else "example_input_raw_operator_quality_checks.md"
+    )
+    return dict(
+        case=case,
+        test_cases=test_cases,
+        use_cases=use_cases,
+        policies=policies,
+        n_per_tc=5,
+        seed=11,
+        input_path=str(Path("examples") / input_name),
+    )
+
+
+def test_nth_id_matches_id_factory() -> None:
+    factory = IdFactory("ex_")
+    for n in range(1, 5):
+        assert nth_id("ex_", "Same Seed", n) == factory.new("Same Seed")
+
+
+@pytest.mark.parametrize("case", ["support_bot", "operator_quality"])
+def test_sharded_generation_matches_serial(case: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    expected = [e.model_dump() for e in generate_examples(**_args(case))]
+    assert len({e["id"] for e in expected}) == len(expected)
+
+    monkeypatch.setattr(dataset_module, "SHARD_EXAMPLES", 2)
+    assert [e.model_dump() for e in generate_examples(**_args(case))] == expected
+    assert [e.model_dump() for e in generate_examples(**_args(case), workers=2)] == expected
+
+
+@pytest.mark.parametrize("case", ["support_bot", "operator_quality"])
+def test_virtual_dataset_random_access(case: str) -> None:
+    args = _args(case)
+    expected = [e.model_dump() for e in generate_examples(**args)]
+    view = VirtualDataset(**args)
+
+    assert len(view) == len(expected)
+    for k in (0, 1, len(expected) // 2, len(expected) - 1):
+        assert view[k].model_dump() == expected[k]
+        assert generate_example(**args, k=k).model_dump() == expected[k]
+    assert view[-1].model_dump() == expected[-1]
+    assert [e.model_dump() for e in view[1:6:2]] == expected[1:6:2]
+    with pytest.raises(IndexError):
+        view[len(expected)]
+
+
+def test_virtual_dataset_does_not_materialize() -> None:
+    args = _args("support_bot")
+    args["n_per_tc"] = 10**9
+    view = VirtualDataset(**args)
+    assert len(view) == 7 * 10**9
+    last = view[len(view) - 1]
+    assert last.test_case_id == "tc_0"
+    assert last.id.startswith("ex_tc0-")
+
+
+def test_shard_slices_only_test_cases_with_examples() -> None:
+    args = _args("support_bot")
+    orphan = args["test_cases"][0].model_copy(update={"id": "tc_orphan", "use_case_id": "uc_x"})
+    args["test_cases"] = [orphan, orphan, *args["test_cases"]]
+    generated = generated_test_cases(args["test_cases"], args["use_cases"])
+    assert orphan not in generated
+
+    for index in range(1, 4):
+        start, stop = shard_bounds(len(generated), (index, 3))
+        examples = list(iter_examples(**args, shard=(index, 3)))
+        assert [e.test_case_id for e in examples] == [
+            tc.id for tc in generated[start:stop] for _ in range(args["n_per_tc"])
+        ]
@@ -0,0 +1,78 @@
+import json
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from dataset_generator.merge import MergeError, merge_shards, parse_shard
+from dataset_generator.pipeline import PipelineConfig, run_pipeline
+from dataset_generator.validate.validator import validate_out_dir
+
+FILES = ("use_cases.json", "policies.json", "test_cases.json", "dataset.json")
+
+
+def _config(out_dir: Path, input_name: str) -> PipelineConfig:
+    return PipelineConfig(
+        input_path=str(Path("examples") / input_name),
+        out_dir=str(out_dir),
+        seed=3,
+        case="auto",
+        n_use_cases=5,
+        n_test_cases_per_uc=3,
+        n_examples_per_tc=4,
+        llm_provider="none",
+        llm_model=None,
+        ollama_base_url=None,
+        llm_temperature=0.2,
+    )
+
+
+def _run_shards(tmp_path: Path, input_name: str, count: int) -> list[Path]:
+    shard_dirs = []
+    for index in range(1, count + 1):
+        shard_dir = tmp_path / f"shard{index}"
+        config = _config(shard_dir, input_name)
+        run_pipeline(replace(config, shard=(index, count), stream=index % 2 == 0))
+        shard_dirs.append(shard_dir)
+    return shard_dirs
+
+
+@pytest.mark.parametrize(
+    "input_name",
+    ["example_input_raw_support_faq_and_tickets.md", "example_input_raw_operator_quality_checks.md"],
+)
+def test_merged_shards_match_unsharded_run(tmp_path: Path, input_name: str) -> None:
+    full = run_pipeline(_config(tmp_path / "full", input_name))
+    shard_dirs = _run_shards(tmp_path, input_name, 4)
+    assert not (shard_dirs[0] / "run_manifest.json").exists()
+
+    merged = merge_shards(reversed(shard_dirs), tmp_path / "merged")
+    for name in FILES:
+        assert (merged / name).read_bytes() == (full / name).read_bytes()
+    assert validate_out_dir(merged)[0]
+
+
+def test_merge_rejects_incomplete_or_inconsistent_shards(tmp_path: Path) -> None:
+    name = "example_input_raw_support_faq_and_tickets.md"
+    shard_dirs = _run_shards(tmp_path, name, 3)
+
+    with pytest.raises(MergeError, match="Expected shards 1..3"):
+        merge_shards(shard_dirs[:2], tmp_path / "merged")
+
+    dataset_path = shard_dirs[2] / "dataset.json"
+    doc = json.loads(dataset_path.read_text(encoding="utf-8"))
+    first_id = json.loads(
+        (shard_dirs[1] / "dataset.jsonl").read_text(encoding="utf-8").splitlines()[0]
+    )["id"]
+    doc["examples"][0]["id"] = first_id
+    dataset_path.write_text(json.dumps(doc), encoding="utf-8")
+    with pytest.raises(MergeError, match="duplicate example id"):
+        merge_shards(shard_dirs, tmp_path / "merged")
+    assert not (tmp_path / "merged" / "dataset.json").exists()
+
+
+def test_parse_shard() -> None:
+    assert parse_shard("2/4") == (2, 4)
+    for value in ("0/4", "5/4", "2", "a/b"):
+        with pytest.raises(ValueError):
+            parse_shard(value)
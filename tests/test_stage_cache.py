@@ -0,0 +1,123 @@
+import json
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from dataset_generator import pipeline as pipeline_module
+from dataset_generator.pipeline import PipelineConfig, run_pipeline
+from dataset_generator import stage_cache as stage_cache_module
+from dataset_generator.stage_cache import StageCache, stage_key
+
+FILES = ("use_cases.json", "policies.json", "test_cases.json", "dataset.json")
+
+
+class DraftsLLMClient:
+    model = "dummy"
+
+    def __init__(self) -> None:
+        self.extraction_calls = 0
+
+    def chat(self, messages, model, temperature, json_mode):
+        if "expected_output" in messages[0]["content"]:
+            return {"expected_output": "Ответ"}
+        self.extraction_calls += 1
+        return {
+            "use_cases": [{"name": "LLM UC", "description": "desc", "anchor_phrases": ["FAQ"]}],
+            "policies": [{"statement": "LLM Policy", "type": "must", "anchor_phrases": ["FAQ"]}],
+        }
+
+
+class FailingLLMClient:
+    model = "dummy"
+
+    def chat(self, messages, model, temperature, json_mode):
+        raise RuntimeError("down")
+
+
+def _config(tmp_path: Path, name: str, **overrides) -> PipelineConfig:
+    config = PipelineConfig(
+        input_path=str(Path("examples") / "example_input_raw_support_faq_and_tickets.md"),
+        out_dir=str(tmp_path / name),
+        seed=5,
+        case="auto",
+        n_use_cases=5,
+        n_test_cases_per_uc=3,
+        n_examples_per_tc=1,
+        llm_provider="none",
+        llm_model=None,
+        ollama_base_url=None,
+        llm_temperature=0.2,
+        llm_max_retries=0,
+        stage_cache=True,
+        stage_cache_dir=str(tmp_path / "stages"),
+    )
+    return replace(config, **overrides)
+
+
+def test_stage_cache_roundtrip(tmp_path: Path) -> None:
+    cache = StageCache(tmp_path)
+    key = stage_key("extract", {"n_use_cases": 5})
+    assert key != stage_key("extract", {"n_use_cases": 6})
+    assert cache.get("extract", key) is None
+    cache.put("extract", key, {"case": "support_bot"})
+    assert cache.get("extract", key) == {"case": "support_bot"}
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    assert cache.stats()["from_cache"] == {"extract": True}
+
+
+def test_stage_key_changes_with_generator_code(monkeypatch: pytest.MonkeyPatch) -> None:
+    key = stage_key("extract", {"n_use_cases": 5})
+    monkeypatch.setattr(stage_cache_module, "code_fingerprint", lambda: "edited")
+    assert stage_key("extract", {"n_use_cases": 5}) != key
+
+
+def test_rerun_reuses_extraction(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    run_pipeline(_config(tmp_path, "first"))
+
+    def no_extraction(*args, **kwargs):
+        raise AssertionError("extraction should come from the stage cache")
+
+    monkeypatch.setattr(pipeline_module, "_extract_stage", no_extraction)
+    monkeypatch.setattr(pipeline_module, "_test_cases_stage", no_extraction)
+    cached = run_pipeline(_config(tmp_path, "cached", n_examples_per_tc=3))
+    monkeypatch.undo()
+    fresh = run_pipeline(_config(tmp_path, "fresh", n_examples_per_tc=3, stage_cache=False))
+
+    for name in FILES:
+        assert (cached / name).read_bytes() == (fresh / name).read_bytes()
+    manifest = json.loads((cached / "run_manifest.json").read_text(encoding="utf-8"))
+    assert manifest["metrics"]["stage_cache"]["from_cache"] == {
+        "extract": True,
+        "test_cases": True,
+    }
+    assert manifest["metrics"]["stage_cache"]["path"] == str(tmp_path / "stages")
+
+
+def test_uncached_run_does_not_hash_input(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def no_hash(path):
+        raise AssertionError("the input is hashed only for cache keys")
+
+    monkeypatch.setattr(pipeline_module, "_file_sha256", no_hash)
+    run_pipeline(_config(tmp_path, "plain", stage_cache=False))
+
+
+def test_llm_extraction_cached_but_not_fallback(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(pipeline_module, "get_llm_client", lambda *a, **k: FailingLLMClient())
+    run_pipeline(_config(tmp_path, "failed", llm_provider="ollama", llm_cache=False))
+
+    client = DraftsLLMClient()
+    monkeypatch.setattr(pipeline_module, "get_llm_client", lambda *a, **k: client)
+    config = _config(tmp_path, "llm", llm_provider="ollama", llm_cache=False)
+    run_pipeline(config)
+    assert client.extraction_calls > 0
+    assert "LLM UC" in (tmp_path / "llm" / "use_cases.json").read_text(encoding="utf-8")
+
+    client.extraction_calls = 0
+    run_pipeline(replace(config, out_dir=str(tmp_path / "llm2"), n_examples_per_tc=2))
+    assert client.extraction_calls == 0
+    assert "LLM UC" in (tmp_path / "llm2" / "use_cases.json").read_text(encoding="utf-8")
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from dataset_generator.core.models import Policy, TestCase, UseCase
+from dataset_generator.generate.dataset import generate_examples, iter_examples
+from dataset_generator.io.writers import (
+    write_dataset,
+    write_dataset_from_jsonl,
+    write_dataset_jsonl,
+)
+
+
+class EchoLLMClient:
+    model = "dummy"
+
+    def chat(self, messages, model, temperature, json_mode):
+        return {"expected_output": f"Ответ: {messages[-1]['content'][:20]}"}
+
+
+def _example_args() -> dict:
+    use_cases = [UseCase(id="uc_1", case="support_bot", name="UC", description="d", evidence=[])]
+    policies = [Policy(id="pol_1", case="support_bot", type="must", statement="s", evidence=[])]
+    test_cases = [
+        TestCase(
+            id=f"tc_{i}",
+            case="support_bot",
+            use_case_id="uc_1",
+            parameters={"axis": "tone"},
+            policy_ids=["pol_1"],
+            description="Test case focusing on axis: tone",
+        )
+        for i in range(1, 8)
+    ]
+    return dict(
+        case="support_bot",
+        test_cases=test_cases,
+        use_cases=use_cases,
+        policies=policies,
+        n_per_tc=3,
+        seed=5,
+        input_path=str(Path("examples") / "example_input_raw_support_faq_and_tickets.md"),
+        llm_client=EchoLLMClient(),
+    )
+
+
+def test_windowed_iteration_matches_generate_examples() -> None:
+    expected = generate_examples(**_example_args())
+    streamed = list(iter_examples(**_example_args(), window=4))
+    assert [e.model_dump() for e in streamed] == [e.model_dump() for e in expected]
+
+
+def test_jsonl_conversion_is_byte_identical(tmp_path: Path) -> None:
+    examples = generate_examples(**_example_args())
+
+    legacy = write_dataset(tmp_path / "legacy", examples)
+    jsonl = write_dataset_jsonl(tmp_path / "stream", iter(examples))
+    converted = write_dataset_from_jsonl(tmp_path / "stream", jsonl)
+
+    assert len(jsonl.read_text(encoding="utf-8").splitlines()) == len(examples)
+    assert converted.read_bytes() == legacy.read_bytes()
+
+
+def test_jsonl_conversion_of_empty_dataset(tmp_path: Path) -> None:
+    legacy = write_dataset(tmp_path / "legacy", [])
+    jsonl = write_dataset_jsonl(tmp_path / "stream", [])
+    converted = write_dataset_from_jsonl(tmp_path / "stream", jsonl)
+    assert converted.read_bytes() == legacy.read_bytes()
@@ -0,0 +1,64 @@
+from pathlib import Path
+
+from dataset_generator.core.markdown import MarkdownDocument, open_markdown
+from dataset_generator.extract.tokenizer import tokenize
+
+
+def _doc(lines: list[str]) -> MarkdownDocument:
+    return MarkdownDocument(path="doc.md", lines=lines)
+
+
+def test_tokenize_classifies_blocks() -> None:
+    doc = _doc(
+        [
+            "# Правила",
+            "Текст без разметки",
+            "  ## FAQ",
+            "- пункт списка",
+            "-",
+            "1. Как оплатить: картой",
+            "Q: Где заказ?",
+            "A: В пути.",
+            "A: Повтор ответа",
+            "| 1 | «Привет» | Здравствуйте |",
+            "| только | две |",
+        ]
+    )
+    blocks = [(b.kind, b.line, b.end) for b in tokenize(doc).blocks]
+    assert blocks == [
+        ("header", 1, 1),
+        ("header", 3, 3),
+        ("list_item", 4, 4),
+        ("numbered_item", 6, 6),
+        ("faq", 7, 8),
+        ("table_row", 10, 10),
+    ]
+
+    tokens = tokenize(doc)
+    header, faq_header = tokens.of_kind("header")
+    assert (header.title, header.level) == ("Правила", 1)
+    assert faq_header.level == 2
+    assert tokens.of_kind("list_item")[0].title == "пункт списка"
+    assert tokens.of_kind("table_row")[0].cells == ("1", "«Привет»", "Здравствуйте")
+
+
+def test_tokenize_keyword_hits() -> None:
+    doc = _doc(["Оператор должен отвечать", "", "Нельзя грубить, нельзя спорить", "FAQ"])
+    tokens = tokenize(doc)
+    assert tokens.has_keyword("оператор")
+    assert tokens.has_keyword("faq")
+    assert not tokens.has_keyword("тикет")
+    assert tokens.lines_with_any(("нельзя", "должен")) == [1, 3]
+    assert tokens.n_lines == 4
+
+
+def test_tokenize_is_cached_per_document(tmp_path: Path) -> None:
+    path = tmp_path / "doc.md"
+    path.write_text("# Раздел\r\n- пункт\r\n", encoding="utf-8")
+    doc = open_markdown(str(path), mmap_threshold=0)
+    try:
+        tokens = tokenize(doc)
+        assert tokenize(doc) is tokens
+        assert [b.kind for b in tokens.blocks] == ["header", "list_item"]
+    finally:
+        doc.close()
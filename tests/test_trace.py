@@ -0,0 +1,90 @@
+import asyncio
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from dataset_generator.llm.tracing import TracingLLMClient
+from dataset_generator.trace import span, tracing
+
+
+class SlowLLMClient:
+    model = "dummy"
+
+    async def achat(self, messages, model, temperature, json_mode):
+        await asyncio.sleep(0.01)
+        if messages[-1]["content"] == "fail":
+            raise RuntimeError("down")
+        return {"expected_output": "ok"}
+
+
+def _events(path: Path) -> list[dict]:
+    return json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+
+
+def test_concurrent_llm_calls_get_separate_lanes(tmp_path: Path) -> None:
+    client = TracingLLMClient(SlowLLMClient())
+
+    async def run() -> None:
+        calls = [
+            client.achat([{"role": "user", "content": text}], "dummy", 0.2, True)
+            for text in ("a", "bb", "fail")
+        ]
+        await asyncio.gather(*calls, return_exceptions=True)
+
+    trace_path = tmp_path / "trace.json"
+    with tracing(trace_path):
+        with span("outer", "test"):
+            asyncio.run(run())
+
+    spans = [e for e in _events(trace_path) if e.get("cat") == "llm"]
+    assert len({e["tid"] for e in spans}) == 3
+    assert sorted(e["args"]["prompt_chars"] for e in spans) == [1, 2, 4]
+    assert sorted(e["args"]["outcome"] for e in spans) == ["RuntimeError", "ok", "ok"]
+
+
+def test_trace_written_even_on_error(tmp_path: Path) -> None:
+    trace_path = tmp_path / "trace.json"
+    with pytest.raises(ValueError):
+        with tracing(trace_path):
+            with span("broken", "test"):
+                raise ValueError("boom")
+    (event,) = [e for e in _events(trace_path) if e["ph"] == "X"]
+    assert event["args"]["outcome"] == "ValueError"
+
+
+def test_cli_generate_and_validate_trace(tmp_path: Path) -> None:
+    out_dir = tmp_path / "out"
+    generate_trace = tmp_path / "generate.json"
+    validate_trace = tmp_path / "validate.json"
+    base = [sys.executable, "-m", "dataset_generator"]
+    subprocess.run(
+        base
+        + [
+            "generate",
+            "--input",
+            str(Path("examples") / "example_input_raw_support.md"),
+            "--out",
+            str(out_dir),
+            "--seed",
+            "1",
+            "--no-stage-cache",
+            "--trace",
+            str(generate_trace),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    subprocess.run(
+        base + ["validate", "--out", str(out_dir), "--trace", str(validate_trace)],
+        check=True,
+        capture_output=True,
+    )
+
+    names = {(e.get("cat"), e["name"]) for e in _events(generate_trace) if e["ph"] == "X"}
+    assert {("stage", "extract"), ("stage", "examples"), ("io", "write_dataset")} <= names
+    phases = [e["name"] for e in _events(validate_trace) if e.get("cat") == "validate"]
+    assert phases[:-1] == ["load", "dataset", "schemas", "ids", "evidence", "coverage"]
+    assert phases[-1] == "validate"
@@ -0,0 +1,116 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from dataset_generator.pipeline import PipelineConfig, run_pipeline
+from dataset_generator.validate.report import IssueLog
+from dataset_generator.validate.validator import validate_out_dir, validate_report
+
+
+def _generate_broken(out_dir: Path) -> list[dict]:
+    config = PipelineConfig(
+        input_path=str(Path("examples") / "example_input_raw_support.md"),
+        out_dir=str(out_dir),
+        seed=1,
+        case="auto",
+        n_use_cases=5,
+        n_test_cases_per_uc=3,
+        n_examples_per_tc=2,
+        llm_provider="none",
+        llm_model=None,
+        ollama_base_url=None,
+        llm_temperature=0.2,
+    )
+    run_pipeline(config)
+    path = out_dir / "dataset.json"
+    doc = json.loads(path.read_text(encoding="utf-8"))
+    for ex in doc["examples"]:
+        ex["input"]["messages"][0]["role"] = "robot"
+    doc["examples"][3]["metadata"]["split"] = "bad"
+    path.write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+    return doc["examples"]
+
+
+def test_issue_log_caps_per_code_and_keeps_counts() -> None:
+    log = IssueLog(max_per_code=2)
+    for i in range(7):
+        log.add("dataset.role_invalid", "dataset: message role invalid", item_id=f"ex_{i}")
+    log.add("dataset.case_invalid", "dataset: case invalid")
+
+    tail = IssueLog(max_per_code=2)
+    tail.add("dataset.role_invalid", "dataset: message role invalid", item_id="ex_9")
+    log.extend(tail)
+
+    assert log.total == 9
+    assert [issue.code for issue in log.issues] == [
+        "dataset.role_invalid",
+        "dataset.role_invalid",
+        "dataset.case_invalid",
+    ]
+    assert log.omitted() == {"dataset.role_invalid": 6}
+    assert log.summary["dataset.role_invalid"].sample_ids == ["ex_0", "ex_1", "ex_2", "ex_3", "ex_4"]
+
+
+def test_validate_report_aggregates_item_errors(tmp_path: Path) -> None:
+    out_dir = tmp_path / "out"
+    examples = _generate_broken(out_dir)
+
+    report = validate_report(out_dir, max_per_code=3)
+    assert not report.ok
+    role_summary = report.issues.summary["dataset.role_invalid"]
+    assert role_summary.count == len(examples)
+    assert role_summary.sample_ids == [ex["id"] for ex in examples[:5]]
+    role_issues = [issue for issue in report.issues.issues if issue.code == "dataset.role_invalid"]
+    assert len(role_issues) == 3
+    assert role_issues[0].file == "dataset.json"
+    assert role_issues[0].path == "$.examples[0].input.messages[0].role"
+
+    split_issue = next(i for i in report.issues.issues if i.code == "dataset.split_invalid")
+    assert (split_issue.item_id, split_issue.path) == (examples[3]["id"], "$.examples[3].metadata.split")
+
+    # The legacy API still lists every error.
+    ok, errors, _ = validate_out_dir(out_dir)
+    assert not ok
+    assert errors.count("dataset: message role invalid") == len(examples)
+
+
+def test_validate_report_fail_fast(tmp_path: Path) -> None:
+    out_dir = tmp_path / "out"
+    examples = _generate_broken(out_dir)
+
+    report = validate_report(out_dir, fail_fast=True)
+    assert report.stopped_early
+    assert report.issues.total == 1
+    assert report.issues.issues[0].code == "dataset.role_invalid"
+    assert report.issues.issues[0].item_id == examples[0]["id"]
+
+
+def test_cli_writes_json_report(tmp_path: Path) -> None:
+    out_dir = tmp_path / "out"
+    _generate_broken(out_dir)
+    report_path = tmp_path / "report.json"
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "dataset_generator",
+            "validate",
+            "--out",
+            str(out_dir),
+            "--max-errors-per-code",
+            "1",
+            "--report-json",
+            str(report_path),
+        ],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 1
+    assert "more dataset.role_invalid" in result.stdout
+
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert report["ok"] is False
+    assert report["by_code"]["dataset.role_invalid"]["count"] == report["counts"]["dataset"]
+    assert report["omitted"]["dataset.role_invalid"] == report["counts"]["dataset"] - 1
@@ -0,0 +1,79 @@
+import json
+from pathlib import Path
+
+from dataset_generator.pipeline import PipelineConfig, run_pipeline
+from dataset_generator.validate.schemas import compiled_schema, file_schema
+from dataset_generator.validate.validator import validate_out_dir
+
+
+def _generate(out_dir: Path) -> None:
+    config = PipelineConfig(
+        input_path=str(Path("examples") / "example_input_raw_support.md"),
+        out_dir=str(out_dir),
+        seed=1,
+        case="auto",
+        n_use_cases=5,
+        n_test_cases_per_uc=3,
+        n_examples_per_tc=1,
+        llm_provider="none",
+        llm_model=None,
+        ollama_base_url=None,
+        llm_temperature=0.2,
+    )
+    run_pipeline(config)
+
+
+def test_file_schemas_are_typed_and_self_contained() -> None:
+    schema = file_schema("dataset.json")
+    item = schema["properties"]["examples"]["items"]
+    assert "$ref" not in json.dumps(schema)
+    assert item["properties"]["expected_output"]["type"] == "string"
+    assert item["properties"]["input"]["properties"]["messages"]["items"]["required"] == [
+        "role",
+        "content",
+    ]
+    assert file_schema("run_manifest.json")["properties"]["seed"]["type"] == "integer"
+
+
+def test_compiled_schema_is_cached() -> None:
+    assert compiled_schema("policies.json") is compiled_schema("policies.json")
+
+
+def test_item_errors_fall_back_to_jsonschema() -> None:
+    schema = compiled_schema("dataset.json")
+    assert list(schema.iter_item_errors({"id": 1})) != []
+    # Roles are checked by the validator itself, not by the schema.
+    example = {
+        "id": "ex_1",
+        "case": "support_bot",
+        "format": "single_turn_qa",
+        "use_case_id": "uc_1",
+        "test_case_id": "tc_1",
+        "input": {"messages": [{"role": "robot", "content": "hi"}]},
+        "expected_output": "ok",
+        "evaluation_criteria": ["a"],
+        "policy_ids": ["pol_1"],
+        "metadata": {},
+    }
+    assert list(schema.iter_item_errors(example)) == []
+
+
+def test_validate_reports_type_errors(tmp_path: Path) -> None:
+    out_dir = tmp_path / "out"
+    _generate(out_dir)
+    assert validate_out_dir(out_dir)[0]
+
+    path = out_dir / "dataset.json"
+    doc = json.loads(path.read_text(encoding="utf-8"))
+    doc["examples"][2]["expected_output"] = 42
+    path.write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    policies_path = out_dir / "policies.json"
+    policies = json.loads(policies_path.read_text(encoding="utf-8"))
+    policies["policies"][0]["evidence"][0]["line_start"] = "1"
+    policies_path.write_text(json.dumps(policies, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    ok, errors, _ = validate_out_dir(out_dir)
+    assert not ok
+    assert "Schema error in dataset.json: 42 is not of type 'string'" in errors
+    assert "Schema error in policies.json: '1' is not of type 'integer'" in errors
@@ -0,0 +1,118 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from dataset_generator.io.readers import JsonArrayStream
+from dataset_generator.pipeline import PipelineConfig, run_pipeline
+from dataset_generator.validate import validator
+from dataset_generator.validate.validator import validate_out_dir
+
+
+def _generate(out_dir: Path) -> None:
+    config = PipelineConfig(
+        input_path=str(Path("examples") / "example_input_raw_support.md"),
+        out_dir=str(out_dir),
+        seed=1,
+        case="auto",
+        n_use_cases=5,
+        n_test_cases_per_uc=3,
+        n_examples_per_tc=2,
+        llm_provider="none",
+        llm_model=None,
+        ollama_base_url=None,
+        llm_temperature=0.2,
+        stream=True,
+    )
+    run_pipeline(config)
+
+
+def test_json_array_stream_small_chunks(tmp_path: Path) -> None:
+    doc = {"meta": {"n": [1, 2]}, "examples": [{"a": "x\n\"y"}, 2.5, -3e10, None, [], "ё"], "z": 1}
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    stream = JsonArrayStream(path, "examples", chunk_chars=3)
+    assert list(stream) == doc["examples"]
+    assert stream.document == {"meta": {"n": [1, 2]}, "examples": [], "z": 1}
+
+    raw = JsonArrayStream(path, "examples", chunk_chars=3, raw=True)
+    blocks = [(json.loads(f"[{text}]"), count) for text, count in raw]
+    assert all(len(items) == count for items, count in blocks)
+    assert [item for items, _ in blocks for item in items] == doc["examples"]
+
+
+def test_validate_jsonl_only_output(tmp_path: Path) -> None:
+    out_dir = tmp_path / "out"
+    _generate(out_dir)
+    ok, errors, counts = validate_out_dir(out_dir)
+    assert ok, errors
+
+    (out_dir / "dataset.json").unlink()
+    assert validate_out_dir(out_dir) == (ok, errors, counts)
+
+
+def test_validate_reports_schema_error_of_streamed_item(tmp_path: Path) -> None:
+    out_dir = tmp_path / "out"
+    _generate(out_dir)
+    path = out_dir / "dataset.json"
+    doc = json.loads(path.read_text(encoding="utf-8"))
+    del doc["examples"][3]["expected_output"]
+    doc["examples"][1]["id"] = doc["examples"][0]["id"]
+    path.write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    ok, errors, counts = validate_out_dir(out_dir)
+    assert not ok
+    assert "Schema error in dataset.json: 'expected_output' is a required property" in errors
+    assert f"dataset.json: duplicate id '{doc['examples'][0]['id']}'" in errors
+    assert counts["dataset"] == len(doc["examples"])
+
+
+@pytest.mark.parametrize("dataset_name", ["dataset.json", "dataset.jsonl"])
+def test_parallel_validation_matches_serial(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, dataset_name: str
+) -> None:
+    out_dir = tmp_path / "out"
+    _generate(out_dir)
+    path = out_dir / "dataset.json"
+    doc = json.loads(path.read_text(encoding="utf-8"))
+    examples = doc["examples"]
+    examples[4]["metadata"]["split"] = "bad"
+    examples[7]["id"] = examples[2]["id"]
+    examples[9]["expected_output"] = 1
+    examples[11]["input"]["messages"][0]["role"] = "robot"
+    examples.append("not an object")
+    path.write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+    (out_dir / "dataset.jsonl").write_text(
+        "".join(json.dumps(ex, ensure_ascii=False) + "\n" for ex in examples), encoding="utf-8"
+    )
+    if dataset_name == "dataset.jsonl":
+        path.unlink()
+
+    serial = validate_out_dir(out_dir)
+    monkeypatch.setattr(validator, "VALIDATE_CHUNK_SIZE", 3)
+    monkeypatch.setattr(validator, "VALIDATE_BLOCK_CHARS", 2000)
+    parallel = validate_out_dir(out_dir, jobs=2)
+    assert parallel == serial
+    assert not serial[0]
+    assert f"{dataset_name}: duplicate id '{examples[2]['id']}'" in serial[1]
+
+
+def test_parallel_validation_falls_back_on_misleading_layout(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    out_dir = tmp_path / "out"
+    _generate(out_dir)
+    path = out_dir / "dataset.json"
+    doc = json.loads(path.read_text(encoding="utf-8"))
+    # Items of a later array sit at the same indentation, so a block cut by
+    # layout runs past the end of "examples".
+    doc["zz"] = ["a", "b"]
+    doc["examples"][5]["id"] = doc["examples"][0]["id"]
+    path.write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    serial = validate_out_dir(out_dir)
+    monkeypatch.setattr(validator, "VALIDATE_CHUNK_SIZE", 3)
+    monkeypatch.setattr(validator, "VALIDATE_BLOCK_CHARS", 2000)
+    assert validate_out_dir(out_dir, jobs=2) == serial
+    assert f"dataset.json: duplicate id '{doc['examples'][0]['id']}'" in serial[1]
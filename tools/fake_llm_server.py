@@ -0,0 +1,423 @@
+"""Stand-in OpenAI-compatible model server for load tests and LLM-path e2e tests.
+
+Serves ``POST /v1/chat/completions`` in the shape ``OllamaClient`` reads, with
+configurable latency, injected errors, malformed replies and a concurrency
+limit, so concurrency, batching, caching and circuit breaking can be exercised
+without a GPU or network::
+
+    python tools/fake_llm_server.py --port 11435 --latency uniform:0.05,0.3 \\
+        --error-rate 0.05 --max-concurrency 4
+    python -m dataset_generator --input examples/example_input_raw_support.md \\
+        --out out/support --llm-provider ollama --ollama-base-url http://127.0.0.1:11435/v1/
+
+Replies are deterministic functions of the prompt: drafts prompts get use cases
+(one per markdown header) and policies (lines with rule keywords) anchored in
+the chunk; expected output prompts get a Russian answer chosen by the user
+message. ``--canned`` replaces them with fixed replies per prompt kind. Only the
+latency and the injected failures are random (``--seed``). ``GET /stats``
+returns request counters, including the highest number of requests in flight.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+_POLICY_TYPES = (
+    ("нельзя", "must_not"),
+    ("запрещ", "must_not"),
+    ("не должен", "must_not"),
+    ("эскалац", "escalate"),
+    ("вежлив", "style"),
+    ("формат", "format"),
+    ("должен", "must"),
+    ("должна", "must"),
+    ("нужно", "must"),
+)
+
+_ANSWERS = (
+    "Понимаю ваш вопрос. Уточните, пожалуйста, номер заказа — проверим и ответим.",
+    "Спасибо за обращение. Передам ваш запрос оператору, он свяжется с вами.",
+    "К сожалению, у меня нет доступа к личному кабинету. Позвоните, пожалуйста, в поддержку.",
+    "Возврат возможен в течение 14 дней. Подскажите номер заказа, и мы оформим заявку.",
+    "Уточните, пожалуйста, ваш вопрос, чтобы я мог помочь.",
+)
+
+_LEADING_MARKUP_RE = re.compile(r"^[\s#*>\-•\d.)]+")
+_MARKUP_RE = re.compile(r"\*\*|\\|__")
+
+
+@dataclass(frozen=True)
+class Latency:
+    """Per-request delay: ``fixed:S``, ``uniform:A,B``, ``normal:MEAN,SD`` or
+    ``lognormal:MEDIAN,SIGMA`` (seconds; a bare number means fixed)."""
+
+    kind: str = "fixed"
+    params: tuple[float, ...] = (0.0,)
+
+    @classmethod
+    def parse(cls, spec: str) -> Latency:
+        kind, _, raw = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+        arity = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if kind not in arity:
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        params = tuple(float(part) for part in raw.split(","))
+        if len(params) != arity[kind] or any(p < 0 for p in params):
+            raise ValueError(f"Invalid latency spec: {spec}")
+        return cls(kind, params)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "normal":
+            return max(rng.gauss(*self.params), 0.0)
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        return self.params[0]
+
+
+@dataclass
+class ServerConfig:
+    host: str = "127.0.0.1"
+    port: int = 0
+    model: str = "fake"
+    latency: Latency = field(default_factory=Latency)
+    error_rate: float = 0.0
+    error_status: int = 500
+    garbage_rate: float = 0.0
+    max_concurrency: int | None = None
+    reject_when_busy: bool = False
+    canned: dict[str, Any] = field(default_factory=dict)
+    seed: int = 0
+
+
+def _clean(text: str) -> str:
+    return _MARKUP_RE.sub("", _LEADING_MARKUP_RE.sub("", text)).strip()
+
+
+def _anchor(line: str) -> str:
+    # The longest run of plain text in the line, so it occurs in the document verbatim.
+    pieces = [_LEADING_MARKUP_RE.sub("", piece).strip() for piece in _MARKUP_RE.split(line)]
+    return max(pieces, key=len)
+
+
+def _drafts_reply(chunk: str) -> dict[str, Any]:
+    lines = [line for line in chunk.splitlines() if line.strip()]
+    use_cases = []
+    policies = []
+    for idx, line in enumerate(lines):
+        lowered = line.lower()
+        if line.lstrip().startswith("#"):
+            name = _clean(line)
+            following = lines[idx + 1] if idx + 1 < len(lines) else ""
+            description = "" if following.lstrip().startswith("#") else _clean(following)
+            if name:
+                use_cases.append(
+                    {
+                        "name": name,
+                        "description": description or name,
+                        "anchor_phrases": [_anchor(line)],
+                    }
+                )
+            continue
+        policy_type = next((ptype for key, ptype in _POLICY_TYPES if key in lowered), None)
+        if policy_type is not None and _clean(line):
+            policies.append(
+                {"statement": _clean(line), "type": policy_type, "anchor_phrases": [_anchor(line)]}
+            )
+    return {"use_cases": use_cases, "policies": policies}
+
+
+def _answer(message: str) -> str:
+    digest = hashlib.sha256(message.encode("utf-8")).digest()
+    return _ANSWERS[digest[0] % len(_ANSWERS)]
+
+
+def prompt_kind(messages: list[dict[str, Any]]) -> str:
+    """Classify a request by its system prompt.
+
+    One of ``drafts``, ``expected_output``, ``batch_expected_output`` or ``other``.
+    """
+    system = next((str(m.get("content", "")) for m in messages if m.get("role") == "system"), "")
+    if "extract structured drafts" in system:
+        return "drafts"
+    if '"items"' in system:
+        return "batch_expected_output"
+    if "expected_output" in system:
+        return "expected_output"
+    return "other"
+
+
+def reply_for(messages: list[dict[str, Any]], canned: dict[str, Any] | None = None) -> Any:
+    """The JSON reply to a chat request; deterministic in ``messages``."""
+    canned = canned or {}
+    kind = prompt_kind(messages)
+    user = next(
+        (str(m.get("content", "")) for m in reversed(messages) if m.get("role") == "user"), ""
+    )
+    if kind == "drafts":
+        if "drafts" in canned:
+            return canned["drafts"]
+        return _drafts_reply(user.split("\n\n", 1)[-1])
+    if kind == "expected_output":
+        message = user.split("\n", 1)[0]
+        return {"expected_output": canned.get("expected_output", _answer(message))}
+    if kind == "batch_expected_output":
+        try:
+            requests = json.loads(user)
+        except json.JSONDecodeError:
+            requests = []
+        return {
+            "items": [
+                {
+                    "id": item.get("id"),
+                    "expected_output": canned.get(
+                        "expected_output", _answer(str(item.get("message", "")))
+                    ),
+                }
+                for item in requests
+                if isinstance(item, dict)
+            ]
+        }
+    return canned.get("other", {})
+
+
+class FakeLLMServer:
+    def __init__(self, config: ServerConfig) -> None:
+        self.config = config
+        self.stats: Counter[str] = Counter()
+        self._rng = random.Random(config.seed)
+        self._limit = (
+            asyncio.Semaphore(config.max_concurrency) if config.max_concurrency else None
+        )
+        self._in_flight = 0
+        self._server: asyncio.Server | None = None
+
+    @property
+    def port(self) -> int:
+        assert self._server is not None, "server not started"
+        return self._server.sockets[0].getsockname()[1]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.config.host}:{self.port}/v1/"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.config.host, self.config.port
+        )
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload = await self._dispatch(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> tuple[int, Any]:
+        path = path.split("?", 1)[0].rstrip("/")
+        if method == "POST" and path.endswith("/chat/completions"):
+            return await self._chat(body)
+        if method == "GET" and path.endswith("/models"):
+            return 200, {"object": "list", "data": [{"id": self.config.model, "object": "model"}]}
+        if method == "GET" and path == "/stats":
+            return 200, {**self.stats, "in_flight": self._in_flight}
+        return 404, _error("not found", "invalid_request_error")
+
+    async def _chat(self, body: bytes) -> tuple[int, Any]:
+        self.stats["requests"] += 1
+        try:
+            request = json.loads(body)
+            messages = request["messages"]
+        except (json.JSONDecodeError, KeyError, TypeError):
+            self.stats["bad_requests"] += 1
+            return 400, _error("invalid request body", "invalid_request_error")
+
+        if self._limit is not None and self._limit.locked() and self.config.reject_when_busy:
+            self.stats["rejected"] += 1
+            return 429, _error("too many concurrent requests", "rate_limit_error")
+        if self._limit is not None:
+            await self._limit.acquire()
+        self._in_flight += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self._in_flight)
+        try:
+            await asyncio.sleep(self.config.latency.sample(self._rng))
+            if self._rng.random() < self.config.error_rate:
+                self.stats["errors"] += 1
+                return self.config.error_status, _error("injected failure", "server_error")
+            kind = prompt_kind(messages)
+            self.stats[kind] += 1
+            content = json.dumps(reply_for(messages, self.config.canned), ensure_ascii=False)
+            if self._rng.random() < self.config.garbage_rate:
+                self.stats["garbage"] += 1
+                content = content[: len(content) // 2]
+            return 200, _completion(request.get("model") or self.config.model, content)
+        finally:
+            self._in_flight -= 1
+            if self._limit is not None:
+                self._limit.release()
+
+
+def _error(message: str, error_type: str) -> dict[str, Any]:
+    return {"error": {"message": message, "type": error_type}}
+
+
+def _completion(model: str, content: str) -> dict[str, Any]:
+    return {
+        "id": "chatcmpl-" + hashlib.sha256(content.encode("utf-8")).hexdigest()[:12],
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+async def _read_request(
+    reader: asyncio.StreamReader,
+) -> tuple[str, str, dict[str, str], bytes] | None:
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    headers: dict[str, str] = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", "0")))
+    return method, path, headers, body
+
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests"}
+
+
+def _response(status: int, payload: Any, keep_alive: bool) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+@contextmanager
+def serve_in_thread(config: ServerConfig | None = None) -> Iterator[FakeLLMServer]:
+    """Run a server on its own event loop thread for the duration of the block."""
+    server = FakeLLMServer(config or ServerConfig())
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="fake-llm-server", daemon=True)
+    thread.start()
+    try:
+        asyncio.run_coroutine_threadsafe(server.start(), loop).result()
+        yield server
+    finally:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible LLM server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--model", default="fake")
+    parser.add_argument(
+        "--latency",
+        type=Latency.parse,
+        default=Latency(),
+        help="fixed:S, uniform:A,B, normal:MEAN,SD or lognormal:MEDIAN,SIGMA (seconds)",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of failed requests")
+    parser.add_argument("--error-status", type=int, default=500, help="Status of failed requests")
+    parser.add_argument(
+        "--garbage-rate", type=float, default=0.0, help="Share of replies with truncated JSON"
+    )
+    parser.add_argument("--max-concurrency", type=int, help="Requests processed at once")
+    parser.add_argument(
+        "--reject-when-busy",
+        action="store_true",
+        help="Answer 429 instead of queueing when --max-concurrency is reached",
+    )
+    parser.add_argument(
+        "--canned",
+        help="JSON file with fixed replies keyed by prompt kind (drafts, expected_output, other)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of latency and failures")
+    args = parser.parse_args()
+
+    config = ServerConfig(
+        host=args.host,
+        port=args.port,
+        model=args.model,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        garbage_rate=args.garbage_rate,
+        max_concurrency=args.max_concurrency,
+        reject_when_busy=args.reject_when_busy,
+        canned=json.loads(Path(args.canned).read_text(encoding="utf-8")) if args.canned else {},
+        seed=args.seed,
+    )
+
+    async def serve() -> None:
+        server = FakeLLMServer(config)
+        await server.start()
+        print(f"Serving on {server.base_url}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())